@@ -0,0 +1,271 @@
+"""Benchmarks for the VSCode configuration pipeline.
+
+Each stage is measured separately against synthetic projects:
+
+- `read_pyproject_toml` on pyproject files with 10 to 5,000 environments
+- `load_project_mappings` on the same files once cached
+- `get_environment_paths` resolving every mapped environment of those projects
+- `get_environment_mappings` and `infer_test_directory` on the parsed configs
+- `expand_environments` on matrices generating 300 to 3,000 environments
+- `update_vscode_config` against a large pre-existing settings.json
+- `discover_projects`, `scan_workspace` and `EnvironmentResolver` on a deep directory tree
+- a batched `which` query to the `serve` daemon, round trip included
+
+Usage:
+
+    python benchmarks/bench_pipeline.py                   # run and print results
+    python benchmarks/bench_pipeline.py --save main       # store a baseline
+    python benchmarks/bench_pipeline.py --compare main    # flag regressions against it
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from hatch_vsc.excludes import scan_workspace  # noqa: E402
+from hatch_vsc.matrix import expand_environments  # noqa: E402
+from hatch_vsc.monorepo import discover_projects  # noqa: E402
+from hatch_vsc.resolver import EnvironmentResolver  # noqa: E402
+from hatch_vsc.server import Client, ResolverServer  # noqa: E402
+from hatch_vsc.update_vscode_env import (  # noqa: E402
+    get_environment_mappings,
+    get_environment_paths,
+    infer_test_directory,
+    load_project_mappings,
+    read_pyproject_toml,
+    update_vscode_config,
+)
+
+BASELINE_DIR = Path(__file__).resolve().parent / ".baselines"
+ENV_COUNTS = (10, 100, 1000, 5000)
+QUICK_ENV_COUNTS = (10, 100)
+MATRIX_SIZES = (300, 3000)
+
+
+def generate_matrix_envs(member_count: int) -> Dict[str, dict]:
+    """Generate templated matrix environments expanding to about `member_count` members."""
+    envs = {"default": {"dependencies": ["pytest"]}}
+    for i in range(member_count // 60):
+        envs[f"base{i}"] = {"template": "default", "scripts": {"test": "pytest"}}
+        envs[f"matrix{i}"] = {
+            "template": f"base{i}",
+            "matrix": [{"python": ["3.9", "3.10", "3.11", "3.12"],
+                        "django": [str(v) for v in range(15)]}],
+        }
+    return envs
+
+
+def generate_pyproject(env_count: int) -> str:
+    """Generate a pyproject.toml exercising every mapping heuristic."""
+    lines = ['[project]\nname = "bench"\nversion = "0.1"\n']
+    for i in range(env_count):
+        lines.append(f"[tool.hatch.envs.env{i}]")
+        kind = i % 4
+        if kind == 0:
+            lines.append(f'vsc-mapping = "packages/pkg{i}"')
+        elif kind == 1:
+            lines.append(f'scripts.build = "cd tools/tool{i} && make"')
+        elif kind == 2:
+            lines.append('dependencies = ["pytest", "pytest-cov"]')
+            lines.append(f'scripts.test = "pytest tests/suite{i}"')
+        else:
+            lines.append('dependencies = ["behave"]')
+            lines.append(f'scripts.test = "cd features/area{i} && behave"')
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_settings(key_count: int) -> str:
+    """Generate a large pre-existing settings.json."""
+    settings = {f"extension{i}.option": {"enabled": True, "values": list(range(10))}
+                for i in range(key_count)}
+    return json.dumps(settings, indent=2)
+
+
+def generate_tree(root: Path, depth: int, fanout: int) -> List[str]:
+    """Generate a deep directory tree of projects, returning its file paths."""
+    files = []
+    pending = [(root, 0)]
+    while pending:
+        directory, level = pending.pop()
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "pyproject.toml").write_text("")
+        for name in ("module.py", "test_module.py"):
+            (directory / name).write_text("")
+            files.append(str((directory / name).relative_to(root)))
+        if level < depth:
+            pending.extend((directory / f"d{i}", level + 1) for i in range(fanout))
+    return files
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float = 0.2) -> Dict[str, float]:
+    """Time a function, returning the best and median seconds per call."""
+    # Calibrate the number of calls per sample so short stages are measurable
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or number >= 1 << 20:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {"best": min(samples), "median": statistics.median(samples)}
+
+
+def run_benchmarks(env_counts, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark, returning timings keyed by benchmark name."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        # Keep the benchmarks away from the user's cache
+        os.environ["HATCH_VSC_CACHE_DIR"] = str(tmp_path / "cache")
+        for env_count in env_counts:
+            project = tmp_path / f"project{env_count}"
+            (project / ".vscode").mkdir(parents=True)
+            (project / "pyproject.toml").write_text(generate_pyproject(env_count))
+
+            config = read_pyproject_toml(project)
+            envs = list(config["tool"]["hatch"]["envs"].values())
+            mappings = get_environment_mappings(config)
+            env_paths = {name: Path("/envs") / name for name in ["default", *mappings.values()]}
+
+            def update(mappings=mappings, env_paths=env_paths, project=project):
+                # Fresh settings every call so the write is never skipped
+                (project / ".vscode" / "settings.json").write_text(settings_text)
+                update_vscode_config(mappings, env_paths, root=project)
+
+            settings_text = generate_settings(5000)
+            results[f"read_pyproject_toml[{env_count}]"] = measure(
+                lambda project=project: read_pyproject_toml(project), repeat
+            )
+            # An old mtime, as files just written are always verified by hash
+            os.utime(project / "pyproject.toml", (1e9, 1e9))
+            load_project_mappings(project)
+            results[f"load_project_mappings[warm-{env_count}]"] = measure(
+                lambda project=project: load_project_mappings(project), repeat
+            )
+            env_names = ["default", *mappings.values()]
+            results[f"get_environment_paths[{env_count}]"] = measure(
+                lambda env_names=env_names, project=project: get_environment_paths(
+                    env_names, root=project
+                ),
+                repeat,
+            )
+            results[f"get_environment_mappings[{env_count}]"] = measure(
+                lambda config=config: get_environment_mappings(config), repeat
+            )
+            results[f"infer_test_directory[{env_count}]"] = measure(
+                lambda envs=envs: [infer_test_directory(env) for env in envs], repeat
+            )
+            results[f"update_vscode_config[{env_count}]"] = measure(update, repeat)
+
+        for member_count in MATRIX_SIZES:
+            matrix_envs = generate_matrix_envs(member_count)
+            results[f"expand_environments[{member_count}]"] = measure(
+                lambda matrix_envs=matrix_envs: expand_environments(matrix_envs), repeat
+            )
+
+        tree = tmp_path / "tree"
+        files = generate_tree(tree, depth=4, fanout=4)
+        tree_mappings = {"src/**/*": "default"}
+        tree_mappings.update({f"d{i}/d{j}/**/*": f"env{i}{j}" for i in range(4) for j in range(4)})
+        resolver = EnvironmentResolver(tree_mappings, tree)
+        results["discover_projects[deep-tree]"] = measure(lambda: discover_projects(tree), repeat)
+        results["scan_workspace[deep-tree]"] = measure(lambda: scan_workspace(tree), repeat)
+        results[f"resolve[{len(files)}-paths]"] = measure(
+            lambda: list(resolver.resolve_many(files)), repeat
+        )
+
+        # Paths of the last project, whose mappings are cached like in a long-running daemon
+        paths = [f"{pattern[:-len('**/*')]}module.py" for pattern in mappings][:100]
+        server = ResolverServer(tmp_path / "serve.sock")
+        thread = threading.Thread(target=server.serve_until_idle, daemon=True)
+        thread.start()
+        with Client(server.socket_path) as client:
+            params = {"paths": paths, "cwd": str(project)}
+            results[f"serve_which[{len(paths)}-paths]"] = measure(
+                lambda: client.call("which", params), repeat
+            )
+        server.stop()
+        thread.join()
+    return results
+
+
+def format_seconds(seconds: float) -> str:
+    """Format a duration with a readable unit."""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def compare(results, baseline, threshold: float) -> List[str]:
+    """Print results next to a baseline, returning the regressed benchmarks."""
+    regressions = []
+    for name, timing in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:40} {format_seconds(timing['best'])}   (new)")
+            continue
+        change = timing["best"] / previous["best"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:40} {format_seconds(timing['best'])} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Only run the smaller fixtures")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark")
+    parser.add_argument("--save", metavar="NAME", help="Store the results as a baseline")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against a stored baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15,
+        help="Relative slowdown reported as a regression (default: 0.15)",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(QUICK_ENV_COUNTS if args.quick else ENV_COUNTS, args.repeat)
+
+    regressions = []
+    if args.compare:
+        with open(BASELINE_DIR / f"{args.compare}.json") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+    else:
+        for name, timing in results.items():
+            print(f"{name:40} {format_seconds(timing['best'])}  "
+                  f"(median {format_seconds(timing['median']).strip()})")
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        with open(BASELINE_DIR / f"{args.save}.json", "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
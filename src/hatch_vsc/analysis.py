@@ -0,0 +1,185 @@
+"""Pylance analysis scope: site-packages, duplicate packages and index depths."""
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+EXTRA_PATHS = "python.analysis.extraPaths"
+EXCLUDE = "python.analysis.exclude"
+PACKAGE_INDEX_DEPTHS = "python.analysis.packageIndexDepths"
+# Direct dependencies are indexed one level deeper than Pylance's default of 1,
+# so that auto-imports of their submodules work
+DIRECT_DEPENDENCY_DEPTH = 2
+# What Pylance excludes when `python.analysis.exclude` isn't set
+PYLANCE_DEFAULT_EXCLUDE = ["**/node_modules", "**/__pycache__", "**/.git"]
+
+_REQUIREMENT_NAME = re.compile(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+class Distribution(NamedTuple):
+    """A distribution installed in a site-packages directory."""
+
+    name: str
+    version: str
+    top_level: List[str]
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a distribution name as in PEP 503.
+
+    Args:
+        name: The distribution name
+
+    Returns:
+        The normalized name
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def get_direct_dependencies(config: Dict[str, Any]) -> List[str]:
+    """Get the names of the project's direct dependencies.
+
+    Args:
+        config: The parsed pyproject.toml data
+
+    Returns:
+        The normalized names of the project's dependencies, optional
+        dependencies and environment dependencies, sorted
+    """
+    project = config.get("project", {})
+    requirements = list(project.get("dependencies", []))
+    for group in project.get("optional-dependencies", {}).values():
+        requirements.extend(group)
+    envs = config.get("tool", {}).get("hatch", {}).get("envs", {})
+    for env_config in envs.values():
+        requirements.extend(env_config.get("dependencies", []))
+        requirements.extend(env_config.get("extra-dependencies", []))
+
+    names = set()
+    for requirement in requirements:
+        match = _REQUIREMENT_NAME.match(requirement) if isinstance(requirement, str) else None
+        if match:
+            names.add(normalize_name(match.group(1)))
+    return sorted(names)
+
+
+def find_site_packages(env_path: Path, info: Optional[Dict[str, Any]] = None) -> List[Path]:
+    """Find the site-packages directories of an environment.
+
+    Args:
+        env_path: The environment directory
+        info: The probed interpreter metadata, if available
+
+    Returns:
+        The existing site-packages directories
+    """
+    if info and info.get("site_packages"):
+        candidates = [Path(path) for path in info["site_packages"]]
+    else:
+        candidates = sorted((env_path / "lib").glob("python*/site-packages"))
+        candidates.append(env_path / "Lib" / "site-packages")
+    return [path for path in candidates if path.is_dir()]
+
+
+def scan_distributions(site_packages: Path) -> List[Distribution]:
+    """List the distributions installed in a site-packages directory.
+
+    Args:
+        site_packages: The site-packages directory
+
+    Returns:
+        The installed distributions, from their `.dist-info` directories
+    """
+    distributions = []
+    try:
+        entries = list(os.scandir(site_packages))
+    except OSError:
+        return distributions
+
+    for entry in entries:
+        if not entry.name.endswith(".dist-info"):
+            continue
+        name, _, version = entry.name[:-len(".dist-info")].partition("-")
+        try:
+            with open(os.path.join(entry.path, "top_level.txt"), encoding="utf-8") as f:
+                top_level = [line.strip() for line in f if line.strip()]
+        except OSError:
+            top_level = [name.replace("-", "_").lower()]
+        distributions.append(Distribution(name, version, top_level))
+    return distributions
+
+
+def _package_paths(site_packages: Path, top_level: Iterable[str]) -> List[str]:
+    """Get the paths of top-level packages or modules in a site-packages directory."""
+    paths = []
+    for name in top_level:
+        for candidate in (site_packages / name, site_packages / f"{name}.py"):
+            if candidate.exists():
+                paths.append(str(candidate))
+                break
+    return paths
+
+
+def get_analysis_settings(
+    env_names: Iterable[str],
+    env_paths: Dict[str, Path],
+    interpreters: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+    dependencies: Iterable[str] = (),
+) -> Dict[str, List[Any]]:
+    """Compute the Pylance settings bounding analysis to what the project uses.
+
+    Only site-packages directories are added to the analysis paths, rather
+    than whole environments. A distribution installed with the same version in
+    several environments is analyzed in the first one only, its copies in
+    later environments are excluded. Direct dependencies are indexed deeper.
+
+    Args:
+        env_names: The environments to analyze, in order of precedence
+        env_paths: The environment directories keyed by environment name
+        interpreters: The probed interpreter metadata keyed by environment name
+        dependencies: The normalized names of the direct dependencies
+
+    Returns:
+        The generated `extraPaths`, `exclude` and `packageIndexDepths` values
+    """
+    interpreters = interpreters or {}
+    extra_paths: List[str] = []
+    exclude: List[str] = []
+    seen: Set[Tuple[str, str]] = set()
+    top_levels: Dict[str, List[str]] = {}
+    for env_name in dict.fromkeys(env_names):
+        for site_packages in find_site_packages(env_paths[env_name], interpreters.get(env_name)):
+            if str(site_packages) in extra_paths:
+                continue
+            extra_paths.append(str(site_packages))
+            for distribution in scan_distributions(site_packages):
+                key = (normalize_name(distribution.name), distribution.version)
+                top_levels.setdefault(key[0], distribution.top_level)
+                if key in seen:
+                    exclude.extend(_package_paths(site_packages, distribution.top_level))
+                else:
+                    seen.add(key)
+
+    index_depths = []
+    for dependency in dependencies:
+        for name in top_levels.get(normalize_name(dependency), []):
+            if not name.startswith("_"):
+                index_depths.append({"name": name, "depth": DIRECT_DEPENDENCY_DEPTH})
+    return {EXTRA_PATHS: extra_paths, EXCLUDE: exclude, PACKAGE_INDEX_DEPTHS: index_depths}
+
+
+def merge_generated(
+    current: Optional[List[Any]], previous: List[Any], generated: List[Any]
+) -> List[Any]:
+    """Merge generated entries into a user-maintained list setting.
+
+    Args:
+        current: The current value of the setting, None if it isn't set
+        previous: The entries generated last time
+        generated: The newly generated entries
+
+    Returns:
+        The user's entries followed by the generated ones
+    """
+    user_entries = [entry for entry in (current or []) if entry not in previous]
+    return user_entries + [entry for entry in generated if entry not in user_entries]
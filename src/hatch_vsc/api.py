@@ -0,0 +1,258 @@
+"""Library API: generate the VSCode configuration of any project, from any thread.
+
+Every function takes the project root explicitly and never depends on the
+current directory, so one process can serve many projects concurrently,
+e.g. from a thread pool, without `os.chdir`. Generating a configuration
+returns it as data; writing it is a separate step.
+
+The state kept per project, its configuration summary, lives in a
+`ProjectContext` shared by every thread working on that project, and is
+reloaded when pyproject.toml or hatch.toml change, along with what is
+derived from it.
+
+Example:
+    from concurrent.futures import ThreadPoolExecutor
+    from hatch_vsc.api import update_config
+
+    with ThreadPoolExecutor() as pool:
+        updated = list(pool.map(update_config, roots))
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import file_fingerprint
+from .locations import PATH_ENV_VAR, get_hatch_config_file, resolve_env_paths
+from .resolver import EnvironmentResolver
+from .update_vscode_env import (
+    CONFIG_FILES,
+    RACY_WINDOW_NS,
+    GeneratedConfig,
+    environ_changed,
+    generate_vscode_config,
+    get_hatch_env_path,
+    get_interpreter_path,
+    load_project_summary,
+    select_mappings,
+    update_project_config,
+)
+
+# Environment variables environment locations depend on, besides the configuration files
+LOCATION_ENV_VARS = ("HATCH_CONFIG", "HATCH_DATA_DIR", PATH_ENV_VAR)
+
+Interpreters = Optional[Dict[str, Optional[Dict[str, Any]]]]
+
+
+class ProjectContext:
+    """The state of one project, safe to share between threads.
+
+    Use `get_project` rather than creating contexts directly, so that every
+    thread shares the same context for a project.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        self._lock = threading.Lock()
+        self._stamps: Optional[List[Any]] = None
+        self._loaded_ns = 0
+        self._summary: Optional[Dict[str, Any]] = None
+        # Incremented when the summary is reloaded, invalidating what was derived from it
+        self._generation = 0
+        self._derived: Dict[str, Tuple[Any, Any]] = {}
+
+    def _load(self) -> Tuple[int, Dict[str, Any]]:
+        """Get the summary with its generation, reloading it if the configuration changed."""
+        stamps = [file_fingerprint(self.root / name) for name in CONFIG_FILES]
+        with self._lock:
+            # Like the on-disk cache, files changed within a mtime tick of loading are re-read
+            racy = any(
+                stamp and stamp[1] >= self._loaded_ns - RACY_WINDOW_NS for stamp in stamps
+            )
+            stale = self._summary is None or environ_changed(self._summary)
+            if stale or stamps != self._stamps or racy:
+                self._loaded_ns = time.time_ns()
+                summary = load_project_summary(self.root)
+                if summary != self._summary:
+                    self._summary = summary
+                    self._generation += 1
+                self._stamps = stamps
+            return self._generation, self._summary
+
+    def _derive(self, name: str, key: Any, compute: Callable[[], Any]) -> Any:
+        """Get a value derived from the configuration, computed again when its key changes."""
+        with self._lock:
+            cached = self._derived.get(name)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        value = compute()
+        with self._lock:
+            self._derived[name] = (key, value)
+        return value
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the project summary, see `load_project_summary`.
+
+        The summary is shared and must not be modified.
+
+        Returns:
+            The summary of the project's current configuration
+
+        Raises:
+            FileNotFoundError: If the project has no pyproject.toml
+        """
+        return self._load()[1]
+
+    def mappings(self) -> Dict[str, str]:
+        """Get the project's environment mappings.
+
+        Returns:
+            Dictionary mapping patterns to environment names
+        """
+        return dict(self.summary()["mappings"])
+
+    def _location_key(self) -> Tuple[int, Any, List[Optional[str]]]:
+        """Get what environment locations depend on, with the summary."""
+        generation, summary = self._load()
+        return (
+            generation,
+            file_fingerprint(get_hatch_config_file()),
+            [os.getenv(name) for name in LOCATION_ENV_VARS],
+        ), summary
+
+    def env_paths(self) -> Dict[str, Path]:
+        """Get the directories of the default and mapped environments.
+
+        They are computed again when the project's or Hatch's configuration,
+        or the environment variables locating environments, change.
+
+        Returns:
+            A dictionary mapping environment names to their directories
+        """
+        key, summary = self._location_key()
+
+        def compute() -> Dict[str, Path]:
+            return resolve_env_paths(
+                ["default", *summary["mappings"].values()], self.root, summary["project"],
+                get_hatch_env_path(self.root, summary), summary["paths"],
+            )
+
+        return dict(self._derive("env-paths", key, compute))
+
+    def interpreter_paths(self) -> Dict[str, str]:
+        """Get the interpreters of the default and mapped environments.
+
+        Returns:
+            A dictionary mapping environment names to their interpreter paths
+        """
+        key, _ = self._location_key()
+        return self._derive("interpreters", key, lambda: {
+            env_name: str(get_interpreter_path(env_path))
+            for env_name, env_path in self.env_paths().items()
+        })
+
+    def resolver(self) -> EnvironmentResolver:
+        """Get a resolver of the environment owning each file of the project.
+
+        Returns:
+            The resolver of the current mappings
+        """
+        generation, summary = self._load()
+        return self._derive(
+            "resolver", generation, lambda: EnvironmentResolver(summary["mappings"], self.root)
+        )
+
+    def generate(
+        self, interpreters: Interpreters = None, fingerprint: Optional[str] = None
+    ) -> GeneratedConfig:
+        """Generate the project's VSCode configuration without writing anything.
+
+        Args:
+            interpreters: Probed interpreter metadata keyed by environment name
+            fingerprint: A fingerprint of the inputs, stored in python.env.json
+
+        Returns:
+            The content of settings.json, python.env.json and the dotenv files
+        """
+        summary = self.summary()
+        env_paths = self.env_paths()
+        return generate_vscode_config(
+            self.root, select_mappings(summary["mappings"], env_paths), env_paths,
+            interpreters, summary["dependencies"], summary["collector"], fingerprint,
+            summary["env-vars"], summary["tests"],
+        )
+
+    def update(
+        self, interpreters: Interpreters = None, fingerprint: Optional[str] = None
+    ) -> bool:
+        """Update the project's VSCode configuration files.
+
+        Args:
+            interpreters: Probed interpreter metadata keyed by environment name
+            fingerprint: A fingerprint of the inputs, stored in python.env.json
+
+        Returns:
+            True if the configuration was updated, False if a concurrent update covered it
+        """
+        return update_project_config(
+            self.root, self.summary(), self.env_paths(), interpreters, fingerprint
+        )
+
+
+_projects: Dict[Path, ProjectContext] = {}
+_projects_lock = threading.Lock()
+
+
+def get_project(root: Path) -> ProjectContext:
+    """Get the shared context of a project.
+
+    Args:
+        root: The project root
+
+    Returns:
+        The same context for every spelling of the root
+    """
+    root = Path(root)
+    with _projects_lock:
+        if root in _projects:
+            return _projects[root]
+    # Resolving is slow, so contexts are also registered under the spelling used
+    resolved = root.resolve()
+    with _projects_lock:
+        if resolved not in _projects:
+            _projects[resolved] = ProjectContext(resolved)
+        _projects[root] = _projects[resolved]
+        return _projects[root]
+
+
+def generate_config(
+    root: Path, interpreters: Interpreters = None, fingerprint: Optional[str] = None
+) -> GeneratedConfig:
+    """Generate a project's VSCode configuration without writing anything.
+
+    Args:
+        root: The project root
+        interpreters: Probed interpreter metadata keyed by environment name
+        fingerprint: A fingerprint of the inputs, stored in python.env.json
+
+    Returns:
+        The content of settings.json, python.env.json and the dotenv files
+    """
+    return get_project(root).generate(interpreters, fingerprint)
+
+
+def update_config(
+    root: Path, interpreters: Interpreters = None, fingerprint: Optional[str] = None
+) -> bool:
+    """Update a project's VSCode configuration files.
+
+    Args:
+        root: The project root
+        interpreters: Probed interpreter metadata keyed by environment name
+        fingerprint: A fingerprint of the inputs, stored in python.env.json
+
+    Returns:
+        True if the configuration was updated, False if a concurrent update covered it
+    """
+    return get_project(root).update(interpreters, fingerprint)
@@ -0,0 +1,272 @@
+"""Background updates: hand the collector's work off to a detached process.
+
+Hatch waits for collectors on every command, so in background mode the
+collector only starts a worker and returns. The worker runs the same update
+as `hatch-vsc update --no-probe` and records its outcome in a status file,
+which `hatch-vsc status` displays. While a worker runs for a project, further
+submissions don't start another one: they ask it to run once more when it's
+done, since environments may have changed after it started.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .cache import atomic_write_text, cache_key, get_cache_dir
+from .locking import file_lock, get_lock_path
+
+BACKGROUND_ENV_VAR = "HATCH_VSC_BACKGROUND"
+STATUS_DIR = "jobs"
+# Lines of a worker's traceback kept in its status
+TRACEBACK_LINES = 20
+
+
+def background_enabled(collector_config: Optional[Dict[str, Any]] = None) -> bool:
+    """Check whether collector updates run in the background.
+
+    Args:
+        collector_config: The collector options, where `background = true` enables it
+
+    Returns:
+        The value of `HATCH_VSC_BACKGROUND` if set, otherwise the collector option
+    """
+    override = os.getenv(BACKGROUND_ENV_VAR, "").lower()
+    if override:
+        return override in ("1", "true", "yes")
+    return bool((collector_config or {}).get("background", False))
+
+
+def get_status_path(root: Path) -> Path:
+    """Get the status file of a project's background updates.
+
+    Args:
+        root: The project root
+
+    Returns:
+        The path of the status file in the cache directory
+    """
+    return get_cache_dir() / STATUS_DIR / f"{cache_key(str(Path(root).resolve()))[:16]}.json"
+
+
+def read_status(root: Path) -> Dict[str, Any]:
+    """Read the status of a project's background updates.
+
+    Args:
+        root: The project root
+
+    Returns:
+        The status of the last update, empty if none ran
+    """
+    try:
+        with open(get_status_path(root), encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return status if isinstance(status, dict) else {}
+
+
+def _write_status(root: Path, status: Dict[str, Any]) -> None:
+    """Replace the status of a project's background updates."""
+    path = get_status_path(root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(path, json.dumps(status, indent=2))
+
+
+def _status_lock(root: Path):
+    """Lock guarding the status of a project's background updates."""
+    return file_lock(get_lock_path(f"{Path(root).resolve()}#jobs"))
+
+
+def is_process_alive(pid: Any) -> bool:
+    """Check whether a process is still running.
+
+    Args:
+        pid: The process ID
+
+    Returns:
+        True if the process exists
+    """
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if sys.platform == "win32":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        # STILL_ACTIVE
+        return exit_code.value == 259
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _spawn_worker(root: Path, fingerprint: Optional[str]) -> int:
+    """Start a detached worker updating a project, returning its process ID."""
+    kwargs: Dict[str, Any] = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = (
+            subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        # Own session, so the worker survives the terminal and Hatch exiting
+        kwargs["start_new_session"] = True
+    process = subprocess.Popen(
+        [sys.executable, "-m", "hatch_vsc.background", str(root), fingerprint or ""],
+        cwd=str(root),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        **kwargs,
+    )
+    return process.pid
+
+
+def submit_update(root: Path, fingerprint: Optional[str] = None) -> bool:
+    """Update a project's VSCode configuration in the background.
+
+    Args:
+        root: The project root
+        fingerprint: The fingerprint of the collector inputs, stored by the worker
+
+    Returns:
+        True if a worker was started, False if the running one will update again
+    """
+    with _status_lock(root):
+        status = read_status(root)
+        if status.get("state") == "running" and is_process_alive(status.get("pid")):
+            status.update(pending=True, fingerprint=fingerprint)
+            _write_status(root, status)
+            return False
+
+        pid = _spawn_worker(root, fingerprint)
+        _write_status(root, {
+            "state": "running",
+            "pid": pid,
+            "submitted": time.time(),
+            "fingerprint": fingerprint,
+            "pending": False,
+        })
+        return True
+
+
+def update_project(root: Path, fingerprint: Optional[str] = None) -> None:
+    """Update a project's VSCode configuration from its pyproject.toml.
+
+    Environments are precompiled afterwards if the collector's `compile`
+    option is set.
+
+    Args:
+        root: The project root
+        fingerprint: The fingerprint of the collector inputs, stored with the configuration
+
+    Raises:
+        RuntimeError: If precompiling an environment failed
+    """
+    from .precompile import compile_enabled, compile_project
+    from .update_vscode_env import (
+        get_environment_paths,
+        load_project_summary,
+        update_project_config,
+    )
+
+    summary = load_project_summary(root)
+    mappings = summary["mappings"]
+    env_paths = get_environment_paths(["default", *mappings.values()], root=root)
+    update_project_config(root, summary, env_paths, fingerprint=fingerprint)
+    if compile_enabled(summary["collector"]):
+        errors = compile_project(root, mappings, env_paths, summary["collector"])
+        if errors:
+            raise RuntimeError("; ".join(
+                f"Could not compile {env_name}: {error}" for env_name, error in errors.items()
+            ))
+
+
+def run_worker(root: Path, fingerprint: Optional[str] = None) -> bool:
+    """Run background updates of a project until no more are pending.
+
+    Args:
+        root: The project root
+        fingerprint: The fingerprint the update was submitted with
+
+    Returns:
+        True if the last update succeeded
+    """
+    while True:
+        with _status_lock(root):
+            status = read_status(root)
+            fingerprint = status.get("fingerprint", fingerprint)
+            status.update(state="running", pid=os.getpid(), started=time.time(), pending=False)
+            _write_status(root, status)
+
+        started = time.perf_counter()
+        error = None
+        try:
+            update_project(root, fingerprint)
+        except Exception:
+            error = "".join(traceback.format_exc().splitlines(True)[-TRACEBACK_LINES:])
+
+        with _status_lock(root):
+            status = read_status(root)
+            if status.get("pending"):
+                continue
+            status.update(
+                state="failed" if error else "succeeded",
+                finished=time.time(),
+                seconds=time.perf_counter() - started,
+                error=error,
+            )
+            _write_status(root, status)
+            return error is None
+
+
+def format_status(status: Dict[str, Any]) -> str:
+    """Describe the status of a project's background updates.
+
+    Args:
+        status: The status from `read_status`
+
+    Returns:
+        A human readable description
+    """
+    if not status:
+        return "No background update has run for this project"
+
+    def timestamp(key):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(status[key]))
+
+    state = status.get("state", "unknown")
+    if state == "running" and not is_process_alive(status.get("pid")):
+        state = "interrupted"
+    lines = [f"Background update: {state}"]
+    if "started" in status:
+        lines.append(f"  started:   {timestamp('started')} (pid {status.get('pid')})")
+    elif "submitted" in status:
+        lines.append(f"  submitted: {timestamp('submitted')} (pid {status.get('pid')})")
+    if status.get("finished") and state != "running":
+        lines.append(f"  finished:  {timestamp('finished')} ({status.get('seconds', 0):.2f}s)")
+    if status.get("pending") and state == "running":
+        lines.append("  another update is queued")
+    if status.get("error"):
+        lines.append("  error:")
+        lines.extend(f"    {line}" for line in status["error"].rstrip().splitlines())
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_worker(Path(sys.argv[1]), sys.argv[2] or None) else 1)
@@ -0,0 +1,192 @@
+"""Persistent on-disk cache for hatch-vsc."""
+import hashlib
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+CACHE_DIR_ENV_VAR = "HATCH_VSC_CACHE_DIR"
+NO_CACHE_ENV_VAR = "HATCH_VSC_NO_CACHE"
+# Key of python.env.json holding the fingerprint of the inputs it was generated from
+FINGERPRINT_KEY = "hatch-vsc.fingerprint"
+
+
+def cache_enabled() -> bool:
+    """Check whether the persistent cache is enabled.
+
+    Returns:
+        False if caching was disabled through the environment
+    """
+    return os.getenv(NO_CACHE_ENV_VAR, "").lower() not in ("1", "true", "yes")
+
+
+def get_cache_dir() -> Path:
+    """Get the directory holding hatch-vsc caches.
+
+    The directory lives under the Hatch cache directory so that `hatch` cache
+    cleanups also drop our entries.
+
+    Returns:
+        The cache directory (not necessarily existing yet)
+    """
+    override = os.getenv(CACHE_DIR_ENV_VAR)
+    if override:
+        return Path(override)
+
+    hatch_cache = os.getenv("HATCH_CACHE_DIR")
+    if hatch_cache:
+        return Path(hatch_cache) / "hatch-vsc"
+
+    try:
+        from platformdirs import user_cache_dir
+
+        return Path(user_cache_dir("hatch", appauthor=False)) / "hatch-vsc"
+    except ImportError:
+        pass
+
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "hatch" / "hatch-vsc"
+    if sys.platform == "win32":
+        local = os.getenv("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+        return Path(local) / "hatch" / "Cache" / "hatch-vsc"
+    return Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "hatch" / "hatch-vsc"
+
+
+def file_fingerprint(path: Path) -> Optional[List[int]]:
+    """Get a cheap fingerprint of a file.
+
+    Args:
+        path: The file to fingerprint
+
+    Returns:
+        The file size and modification time in nanoseconds, or None if missing
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def file_digest(path: Path) -> Optional[str]:
+    """Get a hash of a file's content.
+
+    Args:
+        path: The file to hash
+
+    Returns:
+        The SHA-256 hex digest of the content, or None if the file doesn't exist
+    """
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def cache_key(*parts: Any) -> str:
+    """Build a stable cache key from JSON-serializable parts.
+
+    Args:
+        parts: The values identifying a cache entry
+
+    Returns:
+        A hex digest of the parts
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write a text file atomically.
+
+    The content goes to a temporary file in the same directory which then
+    replaces the target, so readers never observe a partially written file.
+    The permissions of an existing file are kept.
+
+    Args:
+        path: The file to write
+        text: The new file content
+    """
+    path = Path(path)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = None
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_cache(name: str) -> Dict[str, Any]:
+    """Load a named cache.
+
+    Args:
+        name: The cache name
+
+    Returns:
+        The cached entries, empty if the cache is missing, disabled or corrupt
+    """
+    if not cache_enabled():
+        return {}
+
+    try:
+        with open(get_cache_dir() / f"{name}.json", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return data if isinstance(data, dict) else {}
+
+
+def save_cache(name: str, data: Dict[str, Any]) -> None:
+    """Persist a named cache.
+
+    Failures are ignored, the cache is only an optimization.
+
+    Args:
+        name: The cache name
+        data: The entries to store
+    """
+    if not cache_enabled():
+        return
+
+    cache_dir = get_cache_dir()
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(cache_dir / f"{name}.json", json.dumps(data, sort_keys=True))
+    except OSError:
+        pass
+
+
+def read_stored_fingerprint(vscode_dir: Path) -> Optional[str]:
+    """Get the fingerprint stored with the generated configuration.
+
+    Args:
+        vscode_dir: The `.vscode` directory of the project
+
+    Returns:
+        The stored fingerprint, None if it or the generated files are missing
+    """
+    if not (vscode_dir / "settings.json").is_file():
+        return None
+    try:
+        with open(vscode_dir / "python.env.json", encoding="utf-8") as f:
+            fingerprint = json.load(f).get(FINGERPRINT_KEY)
+    except (OSError, ValueError, AttributeError):
+        return None
+    return fingerprint if isinstance(fingerprint, str) else None
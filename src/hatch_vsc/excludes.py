@@ -0,0 +1,257 @@
+"""Workspace exclusions: keep environments, build output and caches out of VSCode's way.
+
+The project is swept once, one directory listing per task on a thread pool
+since `os.scandir` releases the GIL. Directories ignored by Git are not
+descended into, and neither are the directories being excluded, so the sweep
+only lists what VSCode would otherwise watch and search.
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Set, Tuple
+
+WATCHER_EXCLUDE = "files.watcherExclude"
+SEARCH_EXCLUDE = "search.exclude"
+FILES_EXCLUDE = "files.exclude"
+EXCLUDE_SETTINGS = (WATCHER_EXCLUDE, SEARCH_EXCLUDE, FILES_EXCLUDE)
+
+# Directories holding more files than this are excluded, as they're usually data or generated
+DEFAULT_FILE_THRESHOLD = 2000
+# Caches are pure noise, so they're hidden from the explorer too
+CACHE_DIRS = frozenset({"__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache"})
+ENV_DIRS = frozenset({".hatch"})
+# Only build output when next to the project file that produced it
+BUILD_DIRS = frozenset({"build", "dist"})
+PROJECT_FILES = frozenset({"pyproject.toml", "setup.py", "setup.cfg"})
+# VSCode already leaves VCS metadata alone
+VCS_DIRS = frozenset({".git", ".hg", ".svn"})
+
+
+class Listing(NamedTuple):
+    """The result of listing one directory."""
+
+    files: List[str]
+    dirs: List[str]
+    gitignore: Optional[str]
+
+
+# A compiled .gitignore pattern: the directory it applies to, its regex and whether it's negated
+Rule = Tuple[str, Pattern, bool]
+
+
+def _translate(pattern: str) -> str:
+    """Translate a .gitignore glob into a regular expression."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            content = pattern[i + 1:end]
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            parts.append("[" + content.replace("\\", "\\\\") + "]")
+            i = end + 1
+        else:
+            if pattern[i] == "\\" and i + 1 < len(pattern):
+                i += 1
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+def parse_gitignore(text: str, base: str = "") -> List[Rule]:
+    """Compile the patterns of a .gitignore file.
+
+    Args:
+        text: The content of the .gitignore file
+        base: The directory of the file relative to the project root, "" for the root
+
+    Returns:
+        The compiled rules, in file order
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        line = line.rstrip("/")
+        # A slash other than a trailing one anchors the pattern to the .gitignore's directory
+        anchored = "/" in line
+        regex = _translate(line.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        try:
+            rules.append((base, re.compile(regex + r"\Z"), negated))
+        except re.error:
+            continue
+    return rules
+
+
+def is_ignored(path: str, rules: List[Rule]) -> bool:
+    """Check whether Git ignores a directory.
+
+    Args:
+        path: The directory relative to the project root, with forward slashes
+        rules: The rules applying to the directory, outermost .gitignore first
+
+    Returns:
+        True if the last matching rule ignores the directory
+    """
+    for base, regex, negated in reversed(rules):
+        if base:
+            if not path.startswith(base + "/"):
+                continue
+            relative = path[len(base) + 1:]
+        else:
+            relative = path
+        if regex.match(relative):
+            return not negated
+    return False
+
+
+def _list_directory(path: str) -> Listing:
+    """List the files and subdirectories of a directory, and read its .gitignore."""
+    files = []
+    dirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                (dirs if is_dir else files).append(entry.name)
+    except OSError:
+        return Listing([], [], None)
+
+    gitignore = None
+    if ".gitignore" in files:
+        try:
+            with open(os.path.join(path, ".gitignore"), encoding="utf-8") as f:
+                gitignore = f.read()
+        except (OSError, UnicodeDecodeError):
+            pass
+    return Listing(files, dirs, gitignore)
+
+
+def scan_workspace(
+    root: Path, threshold: int = DEFAULT_FILE_THRESHOLD, jobs: Optional[int] = None
+) -> Dict[str, Set[str]]:
+    """Find the directories of a project that VSCode should leave alone.
+
+    Args:
+        root: The project root
+        threshold: Directories directly containing more files are excluded
+        jobs: The number of threads listing directories
+
+    Returns:
+        Sets of directories relative to the root, keyed by kind: "envs"
+        (virtual environments and `.hatch`), "build", "caches", "large" and
+        "ignored" (ignored by Git)
+    """
+    found: Dict[str, Set[str]] = {
+        "envs": set(), "build": set(), "caches": set(), "large": set(), "ignored": set()
+    }
+    jobs = jobs or min(32, (os.cpu_count() or 1) + 4)
+    root_str = str(root)
+    frontier: List[Tuple[str, List[Rule]]] = [("", [])]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while frontier:
+            listings = executor.map(
+                _list_directory,
+                [os.path.join(root_str, path) if path else root_str for path, _ in frontier],
+            )
+            pending = []
+            for (path, rules), listing in zip(frontier, listings):
+                if path and "pyvenv.cfg" in listing.files:
+                    found["envs"].add(path)
+                    continue
+                if path and len(listing.files) > threshold:
+                    found["large"].add(path)
+                    continue
+                if listing.gitignore is not None:
+                    rules = rules + parse_gitignore(listing.gitignore, path)
+                is_project = not PROJECT_FILES.isdisjoint(listing.files)
+                for name in listing.dirs:
+                    child = f"{path}/{name}" if path else name
+                    if name in VCS_DIRS:
+                        continue
+                    if name in CACHE_DIRS:
+                        found["caches"].add(name)
+                    elif name in ENV_DIRS:
+                        found["envs"].add(child)
+                    elif name in BUILD_DIRS and is_project:
+                        found["build"].add(child)
+                    elif is_ignored(child, rules):
+                        found["ignored"].add(child)
+                    else:
+                        pending.append((child, rules))
+            frontier = pending
+    return found
+
+
+def get_exclude_settings(found: Dict[str, Set[str]]) -> Dict[str, List[str]]:
+    """Turn the directories found in a project into VSCode glob patterns.
+
+    Every directory is excluded from file watching. Environments, build output,
+    caches and large directories are excluded from search too, while ignored
+    directories already are by default. Only caches are hidden from the explorer.
+
+    Args:
+        found: The directories found by `scan_workspace`
+
+    Returns:
+        The sorted glob patterns, keyed by setting
+    """
+    caches = [f"**/{name}" for name in found["caches"]]
+    searched = set(found["envs"]) | found["build"] | found["large"]
+    return {
+        WATCHER_EXCLUDE: sorted(
+            [f"{path}/**" for path in searched | found["ignored"]] + [f"{c}/**" for c in caches]
+        ),
+        SEARCH_EXCLUDE: sorted(list(searched) + caches),
+        FILES_EXCLUDE: sorted(caches),
+    }
+
+
+def merge_generated_globs(
+    current: Any, previous: List[str], generated: List[str]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Merge generated patterns into a user-maintained glob setting.
+
+    Patterns the user set themselves, including to false, are left as they are
+    and not recorded as generated, so they survive when no longer generated.
+
+    Args:
+        current: The current value of the setting, None if it isn't set
+        previous: The patterns generated last time
+        generated: The newly generated patterns
+
+    Returns:
+        The merged setting, and the generated patterns that were added to it
+    """
+    user_entries = {
+        pattern: value
+        for pattern, value in (current if isinstance(current, dict) else {}).items()
+        if pattern not in previous
+    }
+    added = [pattern for pattern in generated if pattern not in user_entries]
+    return {**user_entries, **dict.fromkeys(added, True)}, added
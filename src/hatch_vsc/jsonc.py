@@ -0,0 +1,314 @@
+"""Minimal edits of JSON with comments, as used by VSCode settings files.
+
+VSCode settings are JSONC: JSON plus `//` and `/* */` comments and trailing
+commas. Rather than loading and re-serializing a whole file, which would drop
+comments and reformat hand-maintained settings, the top-level object is
+scanned for member positions and only the values being changed are spliced.
+Nested values are skipped without being parsed, so large files stay cheap.
+"""
+import json
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Whitespace and comments between tokens
+_SKIP = re.compile(r"(?:\s+|//[^\n]*|/\*[\s\S]*?\*/)*")
+_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"')
+_SCALAR = re.compile(r"[^\s,:\[\]{}\"/]+")
+# Tokens that matter while skipping a nested value
+_NESTED = re.compile(r'"(?:[^"\\\n]|\\.)*"|//[^\n]*|/\*[\s\S]*?\*/|[\[\]{}]')
+# The rest of a line after a value, when only a comment follows
+_REST_OF_LINE = re.compile(r"[ \t]*(?://[^\r\n]*)?(?=\r?\n|$)")
+# Comments and trailing commas, the only differences from plain JSON
+_NON_JSON = re.compile(
+    r'("(?:[^"\\\n]|\\.)*")|(//[^\n]*|/\*[\s\S]*?\*/)|,(?=(?:\s|//[^\n]*|/\*[\s\S]*?\*/)*[\]}])'
+)
+
+
+class JSONCError(ValueError):
+    """Raised when a document isn't valid JSONC."""
+
+
+class Member(NamedTuple):
+    """A member of the top-level object and where it is in the document."""
+
+    key: str
+    key_start: int
+    value_start: int
+    value_end: int
+
+
+class TopLevelObject(NamedTuple):
+    """The scanned top-level object of a document."""
+
+    start: int
+    end: int
+    members: List[Member]
+    trailing_comma: Optional[int]
+
+
+def _error(text: str, pos: int, message: str) -> JSONCError:
+    """Create an error pointing at a position of the document."""
+    line = text.count("\n", 0, pos) + 1
+    column = pos - text.rfind("\n", 0, pos)
+    return JSONCError(f"{message} at line {line} column {column}")
+
+
+def _skip(text: str, pos: int) -> int:
+    """Skip whitespace and comments."""
+    return _SKIP.match(text, pos).end()
+
+
+def _skip_value(text: str, pos: int) -> int:
+    """Get the end of the value starting at a position, without parsing it."""
+    if pos >= len(text):
+        raise _error(text, pos, "Expecting value")
+
+    char = text[pos]
+    if char == '"':
+        match = _STRING.match(text, pos)
+        if match is None:
+            raise _error(text, pos, "Unterminated string")
+        return match.end()
+
+    if char in "{[":
+        depth = 0
+        while True:
+            match = _NESTED.search(text, pos)
+            if match is None:
+                raise _error(text, pos, "Unterminated value")
+            token = match.group()
+            if token in "{[":
+                depth += 1
+            elif token in "}]":
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+            pos = match.end()
+
+    match = _SCALAR.match(text, pos)
+    if match is None:
+        raise _error(text, pos, "Expecting value")
+    return match.end()
+
+
+def scan(text: str) -> Optional[TopLevelObject]:
+    """Locate the members of the top-level object.
+
+    Args:
+        text: The document
+
+    Returns:
+        The positions of the object and its members, None for an empty document
+
+    Raises:
+        JSONCError: If the document isn't a valid JSONC object
+    """
+    pos = _skip(text, 1 if text.startswith("\ufeff") else 0)
+    if pos == len(text):
+        return None
+    if text[pos] != "{":
+        raise _error(text, pos, "Expecting object")
+
+    start = pos
+    members = []
+    trailing_comma = None
+    pos = _skip(text, pos + 1)
+    while text[pos:pos + 1] != "}":
+        match = _STRING.match(text, pos)
+        if match is None:
+            raise _error(text, pos, "Expecting property name enclosed in double quotes")
+        key_start = pos
+        pos = _skip(text, match.end())
+        if text[pos:pos + 1] != ":":
+            raise _error(text, pos, "Expecting ':' delimiter")
+        value_start = _skip(text, pos + 1)
+        value_end = _skip_value(text, value_start)
+        key = match.group()
+        key = json.loads(key) if "\\" in key else key[1:-1]
+        members.append(Member(key, key_start, value_start, value_end))
+
+        pos = _skip(text, value_end)
+        trailing_comma = None
+        if text[pos:pos + 1] == ",":
+            trailing_comma = pos
+            pos = _skip(text, pos + 1)
+        elif text[pos:pos + 1] != "}":
+            raise _error(text, pos, "Expecting ',' delimiter")
+
+    end = pos + 1
+    if _skip(text, end) != len(text):
+        raise _error(text, _skip(text, end), "Extra data")
+    return TopLevelObject(start, end, members, trailing_comma)
+
+
+def loads(text: str) -> Any:
+    """Parse a JSONC document.
+
+    Args:
+        text: The document
+
+    Returns:
+        The parsed value, an empty dictionary for an empty document
+
+    Raises:
+        JSONCError: If the document isn't valid JSONC
+    """
+    if not text.strip():
+        return {}
+
+    def replace(match):
+        if match.group(1) is not None:
+            return match.group(1)
+        return " " if match.group(2) is not None else ""
+
+    try:
+        return json.loads(_NON_JSON.sub(replace, text.lstrip("\ufeff")))
+    except ValueError as e:
+        raise JSONCError(str(e)) from None
+
+
+def get_member(text: str, key: str, default: Any = None) -> Any:
+    """Get the value of a member of the top-level object.
+
+    Only the member's value is parsed, duplicate keys resolve to the last one
+    like in VSCode.
+
+    Args:
+        text: The document
+        key: The member key
+        default: The value returned if the member is missing
+
+    Returns:
+        The member's value
+    """
+    return get_members(text, [key]).get(key, default)
+
+
+def get_members(
+    text: str, keys: Iterable[str], document: Optional[TopLevelObject] = None
+) -> Dict[str, Any]:
+    """Get the values of several members of the top-level object in one pass.
+
+    Args:
+        text: The document
+        keys: The member keys
+        document: The result of `scan` for the document, scanned if not given
+
+    Returns:
+        The values of the members that exist, keyed by member key
+    """
+    if document is None:
+        document = scan(text)
+    wanted = set(keys)
+    found = {
+        member.key: member
+        for member in (document.members if document else [])
+        if member.key in wanted
+    }
+    return {
+        key: loads(text[member.value_start:member.value_end]) for key, member in found.items()
+    }
+
+
+def _line_indent(text: str, pos: int) -> Optional[str]:
+    """Get the indentation of the line of a position, None if it isn't at the line start."""
+    line_start = text.rfind("\n", 0, pos) + 1
+    indent = text[line_start:pos]
+    return indent if line_start > 0 and not indent.strip() else None
+
+
+def _render(value: Any, indent: Optional[str], newline: str) -> str:
+    """Serialize a value indented for a member at the given indentation."""
+    if not indent:
+        return json.dumps(value)
+    return json.dumps(value, indent=indent).replace("\n", newline + indent)
+
+
+def patch(
+    text: str, updates: Dict[str, Any], document: Optional[TopLevelObject] = None
+) -> str:
+    """Set members of the top-level object, keeping everything else as it is.
+
+    Existing members have their value replaced in place, new members are
+    appended after the last member with the indentation of the surrounding
+    members. Comments, formatting and member order are preserved.
+
+    Args:
+        text: The document, possibly empty
+        updates: The values to set, keyed by member key
+        document: The result of `scan` for the document, scanned if not given
+
+    Returns:
+        The updated document
+
+    Raises:
+        JSONCError: If the document isn't a valid JSONC object
+    """
+    if document is None:
+        document = scan(text)
+    if document is None:
+        return json.dumps(updates, indent=2)
+
+    newline = "\r\n" if "\r\n" in text else "\n"
+    splices: List[Tuple[int, int, str]] = []
+    last_members = {member.key: member for member in document.members}
+    for key, value in updates.items():
+        member = last_members.get(key)
+        if member is not None:
+            indent = _line_indent(text, member.key_start)
+            splices.append((member.value_start, member.value_end, _render(value, indent, newline)))
+
+    new_members = [key for key in updates if key not in last_members]
+    if new_members:
+        splices.extend(_insertions(text, document, {key: updates[key] for key in new_members}))
+
+    parts = []
+    pos = 0
+    # Sorting is stable, so splices at the same position keep their order
+    for start, end, replacement in sorted(splices, key=lambda splice: splice[0]):
+        parts.append(text[pos:start])
+        parts.append(replacement)
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _insertions(
+    text: str, document: TopLevelObject, members: Dict[str, Any]
+) -> List[Tuple[int, int, str]]:
+    """Get the splices appending members to the top-level object."""
+    newline = "\r\n" if "\r\n" in text else "\n"
+    if not document.members:
+        multiline = "\n" in text[document.start:document.end]
+        indent = "  "
+        rendered = [f"{json.dumps(key)}: {_render(value, indent, newline)}"
+                    for key, value in members.items()]
+        insertion = "".join(f"{',' if i else ''}{newline}{indent}{member}"
+                            for i, member in enumerate(rendered))
+        if not multiline:
+            insertion += newline
+        return [(document.start + 1, document.start + 1, insertion)]
+
+    last = document.members[-1]
+    indent = _line_indent(text, last.key_start)
+    separator = newline + indent if indent is not None else " "
+    rendered = [f"{json.dumps(key)}: {_render(value, indent, newline)}"
+                for key, value in members.items()]
+
+    if document.trailing_comma is not None:
+        # Keep the trailing comma style
+        anchor = document.trailing_comma + 1
+        insertion = "".join(f"{separator}{member}," for member in rendered)
+        splices = []
+    else:
+        anchor = last.value_end
+        insertion = "".join(f"{',' if i else ''}{separator}{member}"
+                            for i, member in enumerate(rendered))
+        splices = [(last.value_end, last.value_end, ",")]
+
+    # A comment on the same line stays with the member it documents
+    rest_of_line = _REST_OF_LINE.match(text, anchor)
+    if indent is not None and rest_of_line is not None:
+        anchor = rest_of_line.end()
+    splices.append((anchor, anchor, insertion))
+    return splices
@@ -0,0 +1,230 @@
+"""Where Hatch stores virtual environments, resolved without running Hatch.
+
+This reproduces Hatch's storage layout for `virtual` environments:
+
+- The data directory is `HATCH_DATA_DIR`, `[dirs] data` of Hatch's
+  `config.toml`, or the platform's user data directory.
+- Environments live in `[dirs.env] virtual` if configured (relative paths
+  being relative to the project), otherwise in `<data>/env/virtual`.
+- A project stores its environments in `<project name>/<project id>`, the
+  name being the normalized `[project]` name (the directory name without a
+  `[project]` table) and the id the first 8 characters of the URL-safe
+  base64 SHA-256 of the project path. Projects storing their environments
+  inside themselves, or in `~/.virtualenvs`, use the directory directly.
+- Each environment is a directory named after it, except `default` which is
+  named after the project. A `path` option (or `HATCH_ENV_TYPE_VIRTUAL_PATH`)
+  overrides the location of an environment.
+"""
+import hashlib
+import os
+import sys
+from base64 import urlsafe_b64encode
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import tomli
+
+from .analysis import normalize_name
+
+PATH_ENV_VAR = "HATCH_ENV_TYPE_VIRTUAL_PATH"
+
+
+def get_hatch_config_file() -> Path:
+    """Get the location of the user's Hatch configuration file.
+
+    Returns:
+        The path of Hatch's `config.toml` (not necessarily existing)
+    """
+    override = os.getenv("HATCH_CONFIG")
+    if override:
+        return Path(override)
+
+    try:
+        from platformdirs import user_config_dir
+
+        return Path(user_config_dir("hatch", appauthor=False)) / "config.toml"
+    except ImportError:
+        pass
+
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Application Support" / "hatch" / "config.toml"
+    if sys.platform == "win32":
+        local = os.getenv("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+        return Path(local) / "hatch" / "config.toml"
+    config_home = os.getenv("XDG_CONFIG_HOME") or str(Path.home() / ".config")
+    return Path(config_home) / "hatch" / "config.toml"
+
+
+def load_hatch_config() -> Dict[str, Any]:
+    """Read the user's Hatch configuration.
+
+    Returns:
+        The parsed `config.toml`, empty if it is missing or invalid
+    """
+    try:
+        with open(get_hatch_config_file(), "rb") as f:
+            return tomli.load(f)
+    except (OSError, tomli.TOMLDecodeError):
+        return {}
+
+
+def _expand(path: str) -> Path:
+    """Expand variables and `~` in a configured path, like Hatch."""
+    return Path(os.path.expanduser(os.path.expandvars(path)))
+
+
+def get_data_dir(hatch_config: Dict[str, Any]) -> Path:
+    """Get Hatch's data directory.
+
+    Args:
+        hatch_config: The user's Hatch configuration
+
+    Returns:
+        The data directory
+    """
+    configured = os.getenv("HATCH_DATA_DIR") or hatch_config.get("dirs", {}).get("data")
+    if configured:
+        return _expand(configured)
+
+    try:
+        from platformdirs import user_data_dir
+
+        return Path(user_data_dir("hatch", appauthor=False))
+    except ImportError:
+        pass
+
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Application Support" / "hatch"
+    if sys.platform == "win32":
+        local = os.getenv("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+        return Path(local) / "hatch"
+    data_home = os.getenv("XDG_DATA_HOME") or str(Path.home() / ".local" / "share")
+    return Path(data_home) / "hatch"
+
+
+def get_virtual_env_dir(root: Path, hatch_config: Dict[str, Any]) -> Path:
+    """Get the directory Hatch creates virtual environments in.
+
+    Args:
+        root: The resolved project root
+        hatch_config: The user's Hatch configuration
+
+    Returns:
+        The directory holding the environments of every project
+    """
+    configured = hatch_config.get("dirs", {}).get("env", {}).get("virtual")
+    if configured:
+        path = _expand(configured)
+        return path if path.is_absolute() else root / path
+    return get_data_dir(hatch_config) / "env" / "virtual"
+
+
+def get_project_id(root: Path) -> str:
+    """Get the identifier Hatch derives from a project's location.
+
+    Args:
+        root: The resolved project root
+
+    Returns:
+        The 8 character identifier
+    """
+    path = str(root)
+    if sys.platform in ("win32", "darwin"):
+        path = path.casefold()
+    return urlsafe_b64encode(hashlib.sha256(path.encode("utf-8")).digest()).decode()[:8]
+
+
+def get_project_name(config: Dict[str, Any], root: Path) -> str:
+    """Get the name Hatch stores a project's environments under.
+
+    Args:
+        config: The parsed pyproject.toml data
+        root: The resolved project root
+
+    Returns:
+        The normalized project name, that of the directory without a `[project]` table
+    """
+    # Hatch manages environments of projects without metadata under the directory name
+    return normalize_name(config.get("project", {}).get("name") or root.name)
+
+
+def get_explicit_paths(config: Dict[str, Any]) -> Dict[str, str]:
+    """Get the `path` option of the environments setting one.
+
+    Args:
+        config: The parsed pyproject.toml data
+
+    Returns:
+        The configured paths of concrete environments, inherited ones included
+    """
+    from .matrix import expand_environments
+
+    envs = expand_environments(config.get("tool", {}).get("hatch", {}).get("envs", {}))
+    return {name: env["path"] for name, env in envs.items() if env.get("path")}
+
+
+def get_storage_path(
+    root: Path, project_name: str, hatch_config: Optional[Dict[str, Any]] = None
+) -> Path:
+    """Get the directory holding a project's environments.
+
+    This is the parent of the directories `hatch env find` reports.
+
+    Args:
+        root: The project root
+        project_name: The name from `get_project_name`
+        hatch_config: The user's Hatch configuration, read if not given
+
+    Returns:
+        The storage directory of the project
+    """
+    root = Path(root).resolve()
+    if hatch_config is None:
+        hatch_config = load_hatch_config()
+    data_directory = get_virtual_env_dir(root, hatch_config)
+    if (
+        data_directory == Path.home() / ".virtualenvs"
+        or root in data_directory.resolve().parents
+    ):
+        return data_directory
+    return data_directory / project_name / get_project_id(root)
+
+
+def resolve_env_paths(
+    env_names: Iterable[str],
+    root: Path,
+    project_name: str,
+    storage_path: Optional[Path] = None,
+    explicit_paths: Optional[Dict[str, str]] = None,
+) -> Dict[str, Path]:
+    """Resolve the directories of a project's environments.
+
+    Everything is derived from configuration files and environment
+    variables, so no environment needs to exist and nothing is spawned.
+
+    Args:
+        env_names: The environment names, including generated matrix ones
+        root: The project root
+        project_name: The name from `get_project_name`
+        storage_path: The storage directory from `get_storage_path`, computed if not given
+        explicit_paths: The paths from `get_explicit_paths`
+
+    Returns:
+        A dictionary mapping environment names to their directories
+    """
+    root = Path(root).resolve()
+    if storage_path is None:
+        storage_path = get_storage_path(root, project_name)
+    explicit_paths = explicit_paths or {}
+    override = os.getenv(PATH_ENV_VAR)
+    env_paths = {}
+    for env_name in env_names:
+        chosen = override or explicit_paths.get(env_name, "")
+        if os.path.isabs(chosen):
+            env_paths[env_name] = Path(chosen)
+        elif chosen:
+            env_paths[env_name] = (root / chosen).resolve()
+        else:
+            venv_name = project_name if env_name == "default" else env_name
+            env_paths[env_name] = storage_path / venv_name
+    return env_paths
@@ -0,0 +1,156 @@
+"""Cross-process locking and coalescing of configuration updates.
+
+Environments are often created in parallel (`xargs -P`, CI matrices), and
+each creation updates the same settings files. Updates are serialized with
+an exclusive lock, and an update whose inputs were covered by one that
+started after it was requested is skipped: every update queued while one
+runs is folded into the next, so a burst of N updates takes a few writes
+rather than N.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator
+
+from .cache import cache_key, get_cache_dir
+
+LOCK_DIR = "locks"
+DEFAULT_LOCK_TIMEOUT = 60.0
+# How long to wait between attempts where locks can't block, i.e. on Windows
+_POLL_INTERVAL = 0.01
+
+
+def get_lock_path(name: str) -> Path:
+    """Get the lock file guarding a resource.
+
+    Lock files live in the cache directory rather than next to the resource,
+    so that nothing shows up in the project.
+
+    Args:
+        name: The resource, e.g. the resolved path of a `.vscode` directory
+
+    Returns:
+        The path of the lock file
+    """
+    return get_cache_dir() / LOCK_DIR / f"{cache_key(name)[:16]}.lock"
+
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(f: IO[bytes]) -> bool:
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(f: IO[bytes]) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _try_lock(f: IO[bytes]) -> bool:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(f: IO[bytes]) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = DEFAULT_LOCK_TIMEOUT) -> Iterator[IO[bytes]]:
+    """Hold an exclusive lock on a file, shared with other processes.
+
+    Args:
+        path: The lock file, created if missing
+        timeout: How many seconds to wait for the lock
+
+    Yields:
+        The open lock file, which the holder may use to store state
+
+    Raises:
+        TimeoutError: If the lock wasn't acquired in time
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(f):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for {path}, held by another hatch-vsc")
+            time.sleep(_POLL_INTERVAL)
+        try:
+            yield f
+        finally:
+            _unlock(f)
+
+
+def _read_state(f: IO[bytes]) -> Dict[str, Any]:
+    """Read the state stored in a held lock file."""
+    f.seek(0)
+    try:
+        state = json.loads(f.read() or b"{}")
+    except ValueError:
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _write_state(f: IO[bytes], state: Dict[str, Any]) -> None:
+    """Replace the state stored in a held lock file."""
+    f.seek(0)
+    f.truncate()
+    f.write(json.dumps(state).encode("utf-8"))
+    f.flush()
+
+
+@contextmanager
+def coalesced_update(
+    name: str, inputs: str, timeout: float = DEFAULT_LOCK_TIMEOUT
+) -> Iterator[bool]:
+    """Serialize an update with other processes, and skip it if already covered.
+
+    The update is covered when another update with the same inputs started
+    after this one was requested: that update saw every change made before
+    the request, like the environment whose creation triggered it.
+
+    Args:
+        name: The resource being updated, see `get_lock_path`
+        inputs: A digest of everything the update is computed from
+        timeout: How many seconds to wait for the lock
+
+    Yields:
+        True if the update must run, False if it is covered. The update
+        runs while the lock is held.
+
+    Raises:
+        TimeoutError: If the lock wasn't acquired in time
+    """
+    requested_ns = time.time_ns()
+    with ExitStack() as stack:
+        try:
+            f = stack.enter_context(file_lock(get_lock_path(name), timeout))
+        except TimeoutError:
+            raise
+        except OSError:
+            # Without a usable lock directory updates are still made, just not serialized
+            f = None
+        if f is None:
+            yield True
+            return
+
+        state = _read_state(f)
+        if state.get("inputs") == inputs and state.get("started_ns", 0) > requested_ns:
+            yield False
+            return
+        started_ns = time.time_ns()
+        yield True
+        _write_state(f, {"inputs": inputs, "started_ns": started_ns, "pid": os.getpid()})
@@ -0,0 +1,188 @@
+"""Matrix and template expansion of Hatch environments.
+
+This reproduces how Hatch turns `[tool.hatch.envs]` into concrete
+environments, without loading Hatch:
+
+- Environments inherit every key of their `template` (`default` unless set,
+  themselves when `detached`) except `matrix`, scripts being merged one by one.
+  Keys starting with `vsc-` configure this plugin and are not inherited.
+- Environments with a `matrix` expand to one environment per combination of
+  variable values, named `<env>.<values>` (just `<values>` for `default`). A
+  `py` or `python` variable comes first and its values get a `py` prefix,
+  other values are formatted with `matrix-name-format` and joined with `-`.
+
+Overrides are not applied, they change configuration but not names.
+"""
+from itertools import product
+from typing import Any, Dict, List, Tuple
+
+VSC_KEY_PREFIX = "vsc-"
+MATRIX_MEMBER_KEY = "vsc-matrix-member"
+PYTHON_VARIABLES = ("py", "python")
+
+
+def resolve_templates(envs: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Resolve template inheritance of environment definitions.
+
+    Each template is resolved once and reused by everything inheriting from
+    it, so the cost is linear in the size of the configuration.
+
+    Args:
+        envs: The raw `[tool.hatch.envs]` table
+
+    Returns:
+        The definitions with inherited keys, `default` always included
+
+    Raises:
+        ValueError: If a template is unknown or inheritance is circular
+    """
+    raw = dict(envs)
+    raw.setdefault("default", {})
+    resolved: Dict[str, Dict[str, Any]] = {}
+    active: List[str] = []
+
+    def resolve(env_name: str) -> Dict[str, Any]:
+        if env_name in resolved:
+            return resolved[env_name]
+
+        data = dict(raw[env_name])
+        if data.pop("detached", False):
+            data["template"] = env_name
+            data["skip-install"] = True
+        template_name = data.pop("template", "default")
+        if template_name not in raw:
+            raise ValueError(
+                f"Field `tool.hatch.envs.{env_name}.template` refers to an unknown "
+                f"environment `{template_name}`"
+            )
+        if env_name in active:
+            active.append(env_name)
+            raise ValueError(
+                "Circular inheritance detected for field `tool.hatch.envs.*.template`: "
+                + " -> ".join(active)
+            )
+
+        if template_name != env_name:
+            active.append(env_name)
+            for key, value in resolve(template_name).items():
+                if key == "matrix" or key.startswith(VSC_KEY_PREFIX):
+                    continue
+                if key == "scripts":
+                    scripts = data["scripts"] = dict(data.get("scripts", {}))
+                    for script, commands in value.items():
+                        scripts.setdefault(script, commands)
+                else:
+                    data.setdefault(key, value)
+            active.pop()
+
+        resolved[env_name] = data
+        return data
+
+    for env_name in raw:
+        resolve(env_name)
+    return resolved
+
+
+def expand_matrix(env_name: str, config: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Expand the matrix of a resolved environment definition.
+
+    Args:
+        env_name: The environment name
+        config: The resolved environment definition
+
+    Returns:
+        The generated environment names and configurations, in Hatch's order;
+        just the environment itself if it has no matrix
+    """
+    if "matrix" not in config:
+        return [(env_name, config)]
+
+    base = {key: value for key, value in config.items() if key != "matrix"}
+    name_format = base.pop("matrix-name-format", "{value}")
+    members: Dict[str, Dict[str, Any]] = {}
+    for matrix in config["matrix"]:
+        variables = {name: matrix[name] for name in PYTHON_VARIABLES if name in matrix}
+        python_selected = bool(variables)
+        variables.update((name, values) for name, values in matrix.items()
+                         if name not in PYTHON_VARIABLES)
+
+        for values in product(*variables.values()):
+            member_config = dict(base)
+            parts = []
+            for i, (variable, value) in enumerate(zip(variables, values)):
+                if i == 0 and python_selected:
+                    member_config["python"] = value
+                    parts.append(value if value.startswith("py") else f"py{value}")
+                else:
+                    parts.append(name_format.format(variable=variable, value=value))
+            member_name = "-".join(parts)
+            if env_name != "default":
+                member_name = f"{env_name}.{member_name}"
+            members[member_name] = member_config
+    return list(members.items())
+
+
+def expand_environments(envs: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Get the concrete environments Hatch generates from a configuration.
+
+    Args:
+        envs: The raw `[tool.hatch.envs]` table
+
+    Returns:
+        The configuration of every concrete environment keyed by its name
+    """
+    expanded = {}
+    for env_name, config in resolve_templates(envs).items():
+        expanded.update(expand_matrix(env_name, config))
+    return expanded
+
+
+def select_member(env_name: str, members: List[str], choice: str = "first") -> str:
+    """Select the matrix member representing an environment definition.
+
+    Args:
+        env_name: The environment definition name
+        members: The names of the generated environments
+        choice: `first`, `last`, or the name of a member, with or without the
+            `<env>.` prefix
+
+    Returns:
+        The selected environment name
+
+    Raises:
+        ValueError: If the choice doesn't name a member
+    """
+    if choice == "first":
+        return members[0]
+    if choice == "last":
+        return members[-1]
+    for member in members:
+        if choice == member or member == f"{env_name}.{choice}":
+            return member
+    raise ValueError(
+        f"Field `tool.hatch.envs.{env_name}.{MATRIX_MEMBER_KEY}` refers to an unknown "
+        f"matrix member `{choice}`"
+    )
+
+
+def get_representative_env_names(envs: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """Get the concrete environment standing for each environment definition.
+
+    Matrices are represented by the member chosen with `vsc-matrix-member`,
+    the first one by default, so each mapped directory gets one interpreter.
+
+    Args:
+        envs: The raw `[tool.hatch.envs]` table
+
+    Returns:
+        A dictionary mapping definition names to environment names
+    """
+    env_names = {}
+    for env_name, config in resolve_templates(envs).items():
+        if "matrix" not in config:
+            env_names[env_name] = env_name
+            continue
+        members = [name for name, _ in expand_matrix(env_name, config)]
+        choice = envs.get(env_name, {}).get(MATRIX_MEMBER_KEY, "first")
+        env_names[env_name] = select_member(env_name, members, choice)
+    return env_names
@@ -0,0 +1,289 @@
+"""Monorepo support: VSCode configuration for many Hatch projects at once."""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import jsonc
+from .update_vscode_env import (
+    get_environment_paths,
+    load_project_config,
+    load_project_summary,
+    update_vscode_config,
+    write_if_changed,
+)
+
+PRUNED_DIRS = frozenset({
+    ".git",
+    ".hg",
+    ".svn",
+    ".hatch",
+    ".tox",
+    ".nox",
+    ".venv",
+    "venv",
+    "node_modules",
+    "__pycache__",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    "build",
+    "dist",
+})
+
+
+def discover_projects(root: Path) -> List[Path]:
+    """Find every Python project below a directory in a single walk.
+
+    VCS metadata, caches, build output and virtual environments are pruned.
+
+    Args:
+        root: The directory to search
+
+    Returns:
+        The directories containing a pyproject.toml, sorted
+    """
+    projects = []
+    pending = [str(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+
+        names = {entry.name for entry in entries}
+        if "pyvenv.cfg" in names:
+            continue
+        if "pyproject.toml" in names:
+            projects.append(Path(directory))
+
+        for entry in entries:
+            if entry.name in PRUNED_DIRS:
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+            except OSError:
+                continue
+
+    return sorted(projects)
+
+
+def is_hatch_project(config: Dict[str, Any]) -> bool:
+    """Check whether a parsed pyproject.toml belongs to a Hatch project.
+
+    Args:
+        config: The parsed pyproject.toml data
+
+    Returns:
+        True if the project is configured for or built with Hatch
+    """
+    if "hatch" in config.get("tool", {}):
+        return True
+    return config.get("build-system", {}).get("build-backend", "").startswith("hatchling")
+
+
+def load_project(project_dir: str) -> Optional[Dict[str, Any]]:
+    """Load the environment mappings and paths of one project.
+
+    This runs in worker processes, so it only takes and returns plain data.
+
+    Args:
+        project_dir: The project directory
+
+    Returns:
+        The project's mappings, environment paths, `env-vars`, test roots,
+        collector options and direct dependencies, None if it isn't a Hatch project
+    """
+    root = Path(project_dir)
+    config, mappings = load_project_config(root)
+    if not is_hatch_project(config):
+        return None
+    summary = load_project_summary(root)
+
+    result: Dict[str, Any] = {
+        "root": project_dir,
+        "mappings": mappings,
+        "env_paths": {},
+        "env_vars": summary["env-vars"],
+        "tests": summary["tests"],
+        "collector": summary["collector"],
+        "dependencies": summary["dependencies"],
+    }
+    try:
+        env_paths = get_environment_paths(["default", *mappings.values()], root=root)
+        result["env_paths"] = {name: str(path) for name, path in env_paths.items()}
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def load_projects(project_dirs: List[Path], jobs: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Load many projects concurrently.
+
+    Parsing is CPU bound, so a process pool is used to scale with cores.
+
+    Args:
+        project_dirs: The project directories
+        jobs: The number of worker processes, defaults to the number of CPUs
+
+    Returns:
+        The loaded Hatch projects, in the order of `project_dirs`
+    """
+    jobs = jobs or os.cpu_count() or 1
+    dirs = [str(project_dir) for project_dir in project_dirs]
+    if jobs == 1 or len(dirs) < 2:
+        results = [load_project(project_dir) for project_dir in dirs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(dirs))) as executor:
+            chunksize = max(1, len(dirs) // (jobs * 4))
+            results = list(executor.map(load_project, dirs, chunksize=chunksize))
+    return [result for result in results if result is not None]
+
+
+def root_patterns(prefix: str, mappings: Dict[str, str], key_prefix: str) -> Dict[str, str]:
+    """Root a project's mapping patterns at its directory.
+
+    Args:
+        prefix: The project directory relative to the repository root, "" for the root
+        mappings: The project's mappings of patterns to environment names
+        key_prefix: A prefix making environment names unique across projects
+
+    Returns:
+        The rooted patterns mapped to prefixed environment names
+    """
+    return {
+        (f"{prefix}/{pattern}" if prefix else pattern): f"{key_prefix}{env_name}"
+        for pattern, env_name in mappings.items()
+    }
+
+
+def consolidate(root: Path, projects: List[Dict[str, Any]]) -> tuple:
+    """Merge the mappings of many projects into a single configuration.
+
+    Args:
+        root: The repository root
+        projects: The loaded projects
+
+    Returns:
+        The merged mappings and environment paths, usable with `update_vscode_config`
+    """
+    mappings: Dict[str, str] = {}
+    env_paths: Dict[str, Path] = {}
+    root_project = None
+
+    # Deeper projects first so their patterns take precedence over enclosing projects
+    for project in sorted(projects, key=lambda p: -len(Path(p["root"]).parts)):
+        prefix = Path(project["root"]).relative_to(root).as_posix()
+        prefix = "" if prefix == "." else prefix
+        key_prefix = f"{prefix}:" if prefix else ""
+        for pattern, key in root_patterns(prefix, project["mappings"], key_prefix).items():
+            mappings.setdefault(pattern, key)
+        for env_name, path in project["env_paths"].items():
+            env_paths[f"{key_prefix}{env_name}"] = Path(path)
+        if not prefix:
+            root_project = project
+
+    # The default interpreter comes from the root project, or the first project otherwise
+    if root_project is None and projects:
+        default_path = projects[0]["env_paths"].get("default")
+        if default_path is not None:
+            env_paths["default"] = Path(default_path)
+    return mappings, env_paths
+
+
+def consolidate_tests(root: Path, projects: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Merge the test roots of many projects, rooted like `consolidate` roots their mappings.
+
+    Args:
+        root: The repository root
+        projects: The loaded projects
+
+    Returns:
+        The test roots relative to the repository root, with prefixed environment names
+    """
+    tests = []
+    for project in projects:
+        prefix = Path(project["root"]).relative_to(root).as_posix()
+        prefix = "" if prefix == "." else prefix
+        key_prefix = f"{prefix}:" if prefix else ""
+        for test in project["tests"]:
+            tests.append({
+                "framework": test["framework"],
+                "root": f"{prefix}/{test['root']}" if prefix else test["root"],
+                "env": f"{key_prefix}{test['env']}",
+            })
+    return tests
+
+
+def write_workspace(workspace_file: Path, projects: List[Dict[str, Any]]) -> bool:
+    """Write a multi-root workspace with one folder per project.
+
+    Existing workspace settings are kept, only the folders are replaced.
+
+    Args:
+        workspace_file: The `.code-workspace` file to write
+        projects: The loaded projects
+
+    Returns:
+        True if the workspace file was written, False if it was up to date
+    """
+    folders = []
+    for project in projects:
+        relative = os.path.relpath(project["root"], workspace_file.parent)
+        folders.append({"path": Path(relative).as_posix()})
+    if not workspace_file.exists():
+        workspace = {"folders": folders, "settings": {}}
+        return write_if_changed(workspace_file, json.dumps(workspace, indent=2))
+
+    # Workspace files are JSONC, so only the folders are patched
+    content = jsonc.patch(workspace_file.read_text(encoding="utf-8"), {"folders": folders})
+    return write_if_changed(workspace_file, content)
+
+
+def update_monorepo(
+    root: Path, workspace_file: Optional[Path] = None, jobs: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Update VSCode configuration for every Hatch project below a directory.
+
+    By default a single configuration is written at `root`, with each project's
+    patterns rooted at its own directory. With `workspace_file`, a multi-root
+    workspace is written instead and every project gets its own `.vscode`.
+
+    Args:
+        root: The repository root
+        workspace_file: The `.code-workspace` file to write, if any
+        jobs: The number of worker processes, defaults to the number of CPUs
+
+    Returns:
+        The loaded Hatch projects
+    """
+    root = Path(root).resolve()
+    projects = load_projects(discover_projects(root), jobs)
+
+    if workspace_file is not None:
+        for project in projects:
+            project_root = Path(project["root"])
+            env_paths = {name: Path(path) for name, path in project["env_paths"].items()}
+            update_vscode_config(
+                project["mappings"], env_paths, root=project_root,
+                dependencies=project["dependencies"], collector_config=project["collector"],
+                env_vars=project["env_vars"], tests=project["tests"],
+            )
+        write_workspace(Path(workspace_file), projects)
+    else:
+        mappings, env_paths = consolidate(root, projects)
+        # Terminals are activated with the root project's default environment,
+        # and the options and dependencies are the root project's too
+        root_project = next((p for p in projects if Path(p["root"]) == root), {})
+        update_vscode_config(
+            mappings, env_paths, root=root,
+            dependencies=root_project.get("dependencies", ()),
+            collector_config=root_project.get("collector"),
+            env_vars=root_project.get("env_vars", {}),
+            tests=consolidate_tests(root, projects),
+        )
+
+    return projects
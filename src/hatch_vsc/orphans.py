@@ -0,0 +1,196 @@
+"""Find the environments Hatch left behind, and the disk space they take.
+
+Renaming or removing an environment in the configuration doesn't remove its
+directory. An environment directory in the project's storage directory, see
+`locations`, is orphaned when no configured environment uses it:
+
+- its name isn't that of a concrete environment (the default environment's
+  directory is named after the project), nor that of an environment's build
+  environment `<name>-build`, nor of one of Hatch's internal `hatch-*`
+  environments,
+- or the environment now has an explicit `path`.
+
+Storage directories of the same location under another project name, left
+behind by renaming the project, are orphaned as a whole.
+
+Sizes are the disk usage of the files, computed by walking the directories
+with `os.scandir` from a thread pool. Files hardlinked several times, e.g.
+from a package cache, are counted once.
+"""
+import os
+import shutil
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .locations import get_project_id
+from .matrix import expand_environments
+from .update_vscode_env import get_hatch_env_path, load_project_config, load_project_summary
+
+INTERNAL_ENV_PREFIX = "hatch-"
+BUILD_ENV_SUFFIX = "-build"
+
+
+class Orphan(NamedTuple):
+    """An environment directory no configured environment uses."""
+
+    path: Path
+    reason: str
+
+
+def find_orphaned_envs(root: Optional[Path] = None) -> List[Orphan]:
+    """Find the orphaned environment directories of a project.
+
+    Args:
+        root: The project root, defaults to the current directory
+
+    Returns:
+        The orphaned directories, sorted by path
+
+    Raises:
+        ValueError: If the environments are stored in a directory shared with
+            other projects without a per-project level, like `~/.virtualenvs`
+    """
+    project_root = (Path.cwd() if root is None else Path(root)).resolve()
+    config, _ = load_project_config(project_root)
+    summary = load_project_summary(project_root)
+    storage = get_hatch_env_path(project_root, summary)
+    nested = storage.name == get_project_id(project_root)
+    if not nested and project_root not in storage.resolve().parents:
+        raise ValueError(f"{storage} is shared with other projects, refusing to look for orphans")
+
+    envs = expand_environments(config.get("tool", {}).get("hatch", {}).get("envs", {}))
+    explicit = set(summary["paths"])
+    names = {
+        summary["project"] if env_name == "default" else env_name
+        for env_name in {"default", *envs}
+        if env_name not in explicit
+    }
+    # Hatch builds each environment's packages in a `<name>-build` environment
+    expected = names | {f"{name}{BUILD_ENV_SUFFIX}" for name in names}
+
+    orphans = []
+    for path in _list_directories(storage):
+        if path.name in explicit:
+            orphans.append(Orphan(path, "has an explicit path"))
+        elif path.name not in expected and not path.name.startswith(INTERNAL_ENV_PREFIX):
+            orphans.append(Orphan(path, "not configured"))
+    if nested:
+        # <env dir>/<project name>/<project id>
+        for project_dir in _list_directories(storage.parent.parent):
+            renamed = project_dir / storage.name
+            if project_dir.name != summary["project"] and renamed.is_dir():
+                orphans.append(Orphan(renamed, f"stored under project name {project_dir.name}"))
+    return sorted(orphans)
+
+
+def _list_directories(path: Path) -> List[Path]:
+    """List the subdirectories of a directory, none if it doesn't exist."""
+    try:
+        with os.scandir(path) as entries:
+            return [
+                Path(entry.path) for entry in entries if entry.is_dir(follow_symlinks=False)
+            ]
+    except OSError:
+        return []
+
+
+def _scan_directory(path: str) -> Tuple[int, List[str], List[Tuple[int, int, int]]]:
+    """Get the disk usage of a directory's files, its subdirectories and hardlinked files."""
+    size = 0
+    subdirectories = []
+    hardlinks = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                usage = _get_usage(stat)
+                if stat.st_nlink > 1:
+                    hardlinks.append((stat.st_dev, stat.st_ino, usage))
+                else:
+                    size += usage
+    except OSError:
+        pass
+    return size, subdirectories, hardlinks
+
+
+def _get_usage(stat: os.stat_result) -> int:
+    """Get the disk usage of a file, its size where blocks aren't reported."""
+    blocks = getattr(stat, "st_blocks", None)
+    return stat.st_size if blocks is None else blocks * 512
+
+
+def get_disk_usage(paths: Iterable[Path], jobs: Optional[int] = None) -> Dict[Path, int]:
+    """Get the disk usage of directories, walking them in parallel.
+
+    Every directory is scanned as a separate task, so large trees are spread
+    over all threads. A file hardlinked several times is counted once, for
+    the first directory it was found in.
+
+    Args:
+        paths: The directories
+        jobs: Number of threads, defaults to 4 per CPU, up to 32
+
+    Returns:
+        The disk usage in bytes of each directory
+    """
+    jobs = jobs or min(32, (os.cpu_count() or 1) * 4)
+    usage = {Path(path): 0 for path in paths}
+    seen: Set[Tuple[int, int]] = set()
+    with ThreadPoolExecutor(jobs) as executor:
+        pending: Dict[Future, Path] = {
+            executor.submit(_scan_directory, str(path)): path for path in usage
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                owner = pending.pop(future)
+                size, subdirectories, hardlinks = future.result()
+                for device, inode, linked_size in hardlinks:
+                    if (device, inode) not in seen:
+                        seen.add((device, inode))
+                        size += linked_size
+                usage[owner] += size
+                for subdirectory in subdirectories:
+                    pending[executor.submit(_scan_directory, subdirectory)] = owner
+    return usage
+
+
+def format_size(size: float) -> str:
+    """Format a number of bytes for humans.
+
+    Args:
+        size: The number of bytes
+
+    Returns:
+        The size with a binary unit, e.g. `1.5 GiB`
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def remove_envs(paths: Iterable[Path]) -> Dict[Path, str]:
+    """Delete environment directories.
+
+    Args:
+        paths: The directories
+
+    Returns:
+        An error message for each directory that couldn't be deleted
+    """
+    errors = {}
+    for path in paths:
+        try:
+            shutil.rmtree(path)
+        except OSError as e:
+            errors[path] = str(e)
+    return errors
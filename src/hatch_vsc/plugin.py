@@ -1,9 +1,12 @@
 """VSCode environment collector plugin."""
+import os
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 from hatch.env.collectors.plugin.interface import EnvironmentCollectorInterface
 
-from .update_vscode_env import update_vscode_config
+# The fingerprints applied by this process, keyed by project root
+_applied_fingerprints: Dict[str, str] = {}
 
 
 class VSCodeEnvironmentCollector(EnvironmentCollectorInterface):
@@ -24,9 +27,211 @@ class VSCodeEnvironmentCollector(EnvironmentCollectorInterface):
     def collect(self, app):
         """Collect environment information and update VSCode configuration.
         
+        Environments are read from the running Hatch application, so neither
+        pyproject.toml nor Hatch itself need to be loaded again. Nothing is
+        done when the fingerprint of the inputs matches the one stored in
+        python.env.json, or the one this process last applied. In background
+        mode the update is handed off to a detached worker. Timings and
+        profiling are enabled with `HATCH_VSC_TIMINGS` and `HATCH_VSC_PROFILE`.
+
+        Args:
+            app: The Hatch application instance
+        """
+        # Imported here so that registering the plugin stays cheap for every Hatch command
+        from .cache import read_stored_fingerprint
+        from .timing import get_timings_options, phase, record_timings
+
+        root = str(self.root)
+        with record_timings(*get_timings_options()):
+            with phase("fingerprint"):
+                fingerprint = get_collector_fingerprint(app, self.config)
+                if _applied_fingerprints.get(root) == fingerprint:
+                    return
+                vscode_dir = Path(self.root) / ".vscode"
+                if read_stored_fingerprint(vscode_dir) == fingerprint:
+                    _applied_fingerprints[root] = fingerprint
+                    return
+
+            from .background import background_enabled, submit_update
+
+            if background_enabled(self.config):
+                with phase("submit"):
+                    submit_update(Path(self.root), fingerprint)
+                _applied_fingerprints[root] = fingerprint
+                return
+
+            from .terminal import get_env_vars
+            from .testing import get_test_roots
+            from .update_vscode_env import map_environments, update_vscode_config
+
+            with phase("mapping inference"):
+                env_definitions = get_env_definitions(app.project.config)
+                mappings = map_environments(*env_definitions)
+                tests = get_test_roots(*env_definitions)
+            with phase("env path resolution"):
+                env_paths = self.get_environment_paths(app, ["default", *mappings.values()])
+            raw_envs = getattr(app.project.config, "config", {}).get("envs", {})
+            with phase("update"):
+                update_vscode_config(
+                    mappings, env_paths, root=Path(self.root),
+                    dependencies=get_project_dependencies(app.project),
+                    collector_config=self.config,
+                    fingerprint=fingerprint,
+                    env_vars=get_env_vars({"tool": {"hatch": {"envs": raw_envs}}}, Path(self.root)),
+                    tests=tests,
+                )
+            _applied_fingerprints[root] = fingerprint
+
+    @staticmethod
+    def get_environment_paths(app, env_names) -> Dict[str, Path]:
+        """Get the virtual environment directories known to Hatch.
+        
         Args:
             app: The Hatch application instance
+            env_names: The environment names
+            
+        Returns:
+            A dictionary mapping environment names to their directories
         """
-        update_vscode_config({})
+        env_paths = {}
+        for env_name in dict.fromkeys(env_names):
+            env_path = get_virtual_env_path(app.get_environment(env_name))
+            if env_path is not None:
+                env_paths[env_name] = env_path
+        return env_paths
+
+
+def get_collector_fingerprint(app: Any, collector_config: Dict[str, Any]) -> str:
+    """Fingerprint everything the generated configuration is derived from.
+    
+    That's the raw environment and dependency configuration, the values of
+    the variables `env-vars` read from the process environment, the collector
+    options, the listing of the project's environment storage directory and
+    the plugin code. Only stats are needed, no environment is resolved. The
+    project tree isn't part of it, so the workspace sweep only runs again
+    along with environment changes or through `hatch-vsc update`.
+    
+    Args:
+        app: The Hatch application instance
+        collector_config: The collector options
+        
+    Returns:
+        A hex digest of the inputs
+    """
+    from .cache import cache_key, file_fingerprint
+    from .terminal import get_environ_references
+    
+    raw_envs = getattr(app.project.config, "config", {}).get("envs", {})
+    environ = {
+        name: os.environ.get(name)
+        for name in get_environ_references({"tool": {"hatch": {"envs": raw_envs}}})
+    }
+    raw_config = getattr(app.project, "raw_config", None)
+    project_table = raw_config.get("project", {}) if isinstance(raw_config, dict) else {}
+    dependencies = {
+        key: project_table.get(key) for key in ("name", "dependencies", "optional-dependencies")
+    }
+    
+    env_dir = Path(app.get_env_directory("virtual"))
+    storage = []
+    # Hatch stores environments in <env dir>/<project name>/<project id>/<env name>
+    for storage_dir in env_dir.glob(f"*/{app.project.location.id}"):
+        storage.append(list_directory(storage_dir))
+    # Environments with an explicit path live elsewhere, usually in the project
+    explicit = {
+        name: file_fingerprint(Path(app.project.location) / config["path"])
+        for name, config in raw_envs.items()
+        if isinstance(config, dict) and isinstance(config.get("path"), str)
+    }
+    
+    package_dir = Path(__file__).parent
+    return cache_key(
+        raw_envs, environ, dependencies, collector_config, str(env_dir), storage, explicit,
+        list_directory(package_dir, suffix=".py"),
+    )
+
+
+def list_directory(path: Path, suffix: str = "") -> List[Tuple[str, int]]:
+    """List a directory with modification times, for fingerprints.
+    
+    Args:
+        path: The directory
+        suffix: Only list entries with this suffix
+        
+    Returns:
+        The sorted entry names and modification times in nanoseconds
+    """
+    import os
+    
+    try:
+        with os.scandir(path) as entries:
+            return sorted(
+                (entry.name, entry.stat(follow_symlinks=False).st_mtime_ns)
+                for entry in entries
+                if entry.name.endswith(suffix)
+            )
+    except OSError:
+        return []
+
+
+def get_env_definitions(project_config: Any) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Get the environment definitions and the environment standing for each.
+    
+    Definitions come from the raw configuration rather than Hatch's resolved
+    environments, which inherit `scripts`, `dependencies` and other keys from
+    their template and would all look like their template to the mapping
+    heuristics. Matrices are represented by the member selected with
+    `vsc-matrix-member`, exactly like on the command line.
+    
+    Args:
+        project_config: The Hatch project configuration (`app.project.config`)
+        
+    Returns:
+        The raw environment definitions, and the concrete environment standing
+        for each definition that Hatch knows about
+    """
+    from .matrix import get_representative_env_names
+    
+    raw_envs = getattr(project_config, "config", {}).get("envs", {})
+    known_envs = project_config.envs
+    env_names = {
+        definition: env_name
+        for definition, env_name in get_representative_env_names(raw_envs).items()
+        if env_name in known_envs
+    }
+    envs = {definition: raw_envs.get(definition, {}) for definition in env_names}
+    return envs, env_names
+
+
+def get_project_dependencies(project: Any) -> List[str]:
+    """Get the direct dependencies of the project Hatch has loaded.
+    
+    Args:
+        project: The Hatch project (`app.project`)
+        
+    Returns:
+        The normalized names of the project and environment dependencies
+    """
+    from .analysis import get_direct_dependencies
+    
+    raw_config = getattr(project, "raw_config", None)
+    project_table = raw_config.get("project", {}) if isinstance(raw_config, dict) else {}
+    raw_envs = getattr(project.config, "config", {}).get("envs", {})
+    config = {"project": project_table, "tool": {"hatch": {"envs": raw_envs}}}
+    return get_direct_dependencies(config)
 
 
+def get_virtual_env_path(environment: Any) -> Optional[Path]:
+    """Get the virtual environment directory of a Hatch environment.
+    
+    Args:
+        environment: The Hatch environment instance
+        
+    Returns:
+        The environment directory, or None for non-virtual environment types
+    """
+    virtual_env = getattr(environment, "virtual_env", None)
+    directory = getattr(virtual_env, "directory", None)
+    if directory is None:
+        directory = getattr(environment, "virtual_env_path", None)
+    return Path(directory) if directory is not None else None
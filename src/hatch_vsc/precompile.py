@@ -0,0 +1,213 @@
+"""Precompile the bytecode of mapped environments.
+
+The first test run or import in a fresh environment is slow since nothing is
+byte-compiled yet. When enabled, the directories each environment is mapped
+to are compiled with that environment's interpreter, so the bytecode matches
+its Python version, and optionally its site-packages too:
+
+    [tool.hatch.env.collectors.vscode]
+    compile = true
+    compile-site-packages = true
+    compile-cpu-budget = 0.5  # Share of the CPUs to use, or a number of processes
+
+Files with syntax errors are skipped. `compileall` only rewrites stale
+`.pyc` files, and site-packages directories are only compiled again when
+packages were installed or removed, i.e. when their modification time or the
+interpreter changed. Environments are compiled one after the other, each
+with a pool of as many processes as the CPU budget allows.
+"""
+import os
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .cache import load_cache, save_cache
+from .probe import get_interpreter_stamp
+
+COMPILE_CACHE = "compiled"
+DEFAULT_CPU_BUDGET = 0.5
+
+_RECURSIVE_SUFFIX = "/**/*"
+
+
+def compile_enabled(collector_config: Optional[Dict[str, Any]]) -> bool:
+    """Check whether precompilation is enabled.
+
+    Args:
+        collector_config: The collector options
+
+    Returns:
+        True if the `compile` option is set
+    """
+    return bool((collector_config or {}).get("compile", False))
+
+
+def get_compile_jobs(cpu_budget: float = DEFAULT_CPU_BUDGET) -> int:
+    """Get how many processes compile concurrently.
+
+    Args:
+        cpu_budget: The share of the CPUs to use, or a number of processes if above 1
+
+    Returns:
+        The number of processes, at least 1
+    """
+    cpus = os.cpu_count() or 1
+    if cpu_budget > 1:
+        return min(int(cpu_budget), cpus)
+    return max(1, int(cpus * cpu_budget))
+
+
+def get_mapped_directories(root: Path, mappings: Dict[str, str]) -> Dict[str, List[Path]]:
+    """Get the existing directories mapped to each environment.
+
+    Only `<dir>/**/*` patterns with a literal directory are considered; the
+    project root itself is never compiled as a whole.
+
+    Args:
+        root: The project root
+        mappings: Dictionary mapping patterns to environment names
+
+    Returns:
+        The directories keyed by environment name
+    """
+    directories: Dict[str, List[Path]] = {}
+    for pattern, env_name in mappings.items():
+        if not pattern.endswith(_RECURSIVE_SUFFIX):
+            continue
+        directory = pattern[:-len(_RECURSIVE_SUFFIX)].strip("/")
+        if not directory or directory == "." or any(char in directory for char in "*?["):
+            continue
+        path = Path(root) / directory
+        if path.is_dir():
+            directories.setdefault(env_name, []).append(path)
+    return directories
+
+
+def compile_environments(
+    root: Path,
+    mappings: Dict[str, str],
+    env_paths: Dict[str, Path],
+    interpreters: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+    site_packages: bool = False,
+    cpu_budget: float = DEFAULT_CPU_BUDGET,
+) -> Dict[str, str]:
+    """Byte-compile the mapped directories of environments with their interpreters.
+
+    Args:
+        root: The project root
+        mappings: Dictionary mapping patterns to environment names
+        env_paths: The environment directories keyed by environment name
+        interpreters: Probed interpreter metadata keyed by environment name,
+            probed when site-packages are compiled and it isn't given
+        site_packages: Also compile the environments' site-packages
+        cpu_budget: The share of the CPUs to use, see `get_compile_jobs`
+
+    Returns:
+        An error message for each environment whose compilation failed
+    """
+    from .update_vscode_env import get_interpreter_path, probe_environments
+
+    directories = get_mapped_directories(root, mappings)
+    if site_packages and interpreters is None:
+        interpreters = probe_environments(env_paths)
+
+    cache = load_cache(COMPILE_CACHE)
+    jobs = get_compile_jobs(cpu_budget)
+    errors = {}
+    # Directories keyed by interpreter, True for site-packages whose compilation is recorded.
+    # Environments sharing an interpreter, e.g. through an explicit path, are compiled once.
+    targets: Dict[str, Dict[str, bool]] = {}
+    env_names: Dict[str, str] = {}
+    for env_name, env_path in env_paths.items():
+        interpreter = str(get_interpreter_path(env_path))
+        env_names.setdefault(interpreter, env_name)
+        interpreter_targets = targets.setdefault(interpreter, {})
+        for directory in directories.get(env_name, []):
+            interpreter_targets.setdefault(str(directory), False)
+        info = (interpreters or {}).get(env_name)
+        if site_packages and info and "error" not in info:
+            interpreter_targets.update((path, True) for path in info["site_packages"])
+
+    for interpreter, paths in targets.items():
+        stamp = get_interpreter_stamp(Path(interpreter))
+        if stamp is None:
+            continue
+        entry = cache.get(interpreter)
+        if not isinstance(entry, dict) or entry.get("stamp") != stamp:
+            entry = {"stamp": stamp, "site-packages": {}}
+        compiled = entry["site-packages"]
+        pending = []
+        for path, is_site_packages in paths.items():
+            mtime_ns = _get_mtime_ns(path)
+            if mtime_ns is None:
+                continue
+            # Sources change without their directory changing, compileall checks them
+            if not is_site_packages or compiled.get(path) != mtime_ns:
+                pending.append(path)
+        if not pending:
+            continue
+
+        error = _run_compileall(interpreter, pending, jobs)
+        if error:
+            errors[env_names[interpreter]] = error
+            continue
+        # Recorded after compiling, which adds `__pycache__` directories
+        for path in pending:
+            if paths[path]:
+                compiled[path] = _get_mtime_ns(path)
+        cache[interpreter] = entry
+    save_cache(COMPILE_CACHE, cache)
+    return errors
+
+
+def _get_mtime_ns(path: str) -> Optional[int]:
+    """Get the modification time of a directory, None if it doesn't exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _run_compileall(interpreter: str, paths: List[str], jobs: int) -> Optional[str]:
+    """Run compileall with an interpreter, returning an error message if it failed."""
+    try:
+        result = subprocess.run(
+            [interpreter, "-I", "-m", "compileall", "-q", "-j", str(jobs), *paths],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+    except OSError as e:
+        return str(e)
+    # 1 means some files have syntax errors, which importing them reports anyway
+    if result.returncode not in (0, 1):
+        lines = result.stdout.decode(errors="replace").strip().splitlines()
+        return lines[-1] if lines else f"exit status {result.returncode}"
+    return None
+
+
+def compile_project(
+    root: Path,
+    mappings: Dict[str, str],
+    env_paths: Dict[str, Path],
+    collector_config: Optional[Dict[str, Any]] = None,
+    interpreters: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+) -> Dict[str, str]:
+    """Precompile a project's environments as configured on the collector.
+
+    Args:
+        root: The project root
+        mappings: Dictionary mapping patterns to environment names
+        env_paths: The environment directories keyed by environment name
+        collector_config: The collector options
+        interpreters: Probed interpreter metadata keyed by environment name
+
+    Returns:
+        An error message for each environment whose compilation failed
+    """
+    collector_config = collector_config or {}
+    return compile_environments(
+        root, mappings, env_paths, interpreters,
+        site_packages=bool(collector_config.get("compile-site-packages", False)),
+        cpu_budget=float(collector_config.get("compile-cpu-budget", DEFAULT_CPU_BUDGET)),
+    )
@@ -0,0 +1,178 @@
+"""Validate environment interpreters and collect their metadata."""
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .cache import load_cache, save_cache
+
+PROBE_CACHE = "interpreters"
+PROBE_TIMEOUT = 30.0
+
+# Run with -I so that neither the environment nor the working directory affect the answer
+PROBE_SCRIPT = """\
+import json, sys, sysconfig
+paths = sysconfig.get_paths()
+print(json.dumps({
+    "version": "%d.%d.%d" % sys.version_info[:3],
+    "prefix": sys.prefix,
+    "site_packages": list(dict.fromkeys([paths["purelib"], paths["platlib"]])),
+}))
+"""
+
+
+def get_interpreter_stamp(interpreter: Path) -> Optional[List[int]]:
+    """Get a stamp of an interpreter that changes when its environment is recreated.
+
+    Environment interpreters are usually symlinks, so both the link and its
+    target are considered.
+
+    Args:
+        interpreter: The interpreter path
+
+    Returns:
+        The modification times of the link and of the executable, or None if
+        the interpreter doesn't exist
+    """
+    try:
+        return [os.lstat(interpreter).st_mtime_ns, os.stat(interpreter).st_mtime_ns]
+    except OSError:
+        return None
+
+
+async def _probe_one(
+    interpreter: str, semaphore: asyncio.Semaphore, timeout: float
+) -> Dict[str, Any]:
+    """Run the probe script with one interpreter."""
+    async with semaphore:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                interpreter, "-I", "-c", PROBE_SCRIPT,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                stdin=asyncio.subprocess.DEVNULL,
+            )
+        except OSError as e:
+            return {"error": str(e)}
+
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return {"error": f"timed out after {timeout:g}s"}
+
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip().splitlines()
+        return {"error": message[-1] if message else f"exit status {process.returncode}"}
+    try:
+        return json.loads(stdout)
+    except ValueError:
+        return {"error": "unexpected probe output"}
+
+
+async def _probe_all(interpreters: List[str], jobs: int, timeout: float) -> List[Dict[str, Any]]:
+    """Probe interpreters concurrently, at most `jobs` at a time."""
+    semaphore = asyncio.Semaphore(jobs)
+    return await asyncio.gather(
+        *(_probe_one(interpreter, semaphore, timeout) for interpreter in interpreters)
+    )
+
+
+def probe_interpreters(
+    interpreters: Iterable[Path], jobs: Optional[int] = None, timeout: float = PROBE_TIMEOUT
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Validate interpreters and collect their version, prefix and site-packages.
+
+    Results are cached keyed by interpreter path and stamp, so warm runs only
+    `stat()` each interpreter. Uncached interpreters are probed concurrently.
+
+    Args:
+        interpreters: The interpreter paths
+        jobs: Maximum number of concurrent probes, defaults to the number of CPUs
+        timeout: Seconds after which a probe is considered failed
+
+    Returns:
+        For each interpreter, None if it doesn't exist, otherwise its metadata
+        (`version`, `prefix` and `site_packages`) or an `error` message
+    """
+    cache = load_cache(PROBE_CACHE)
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    pending: List[Tuple[str, List[int]]] = []
+    for interpreter in dict.fromkeys(str(path) for path in interpreters):
+        stamp = get_interpreter_stamp(Path(interpreter))
+        entry = cache.get(interpreter)
+        if stamp is None:
+            results[interpreter] = None
+        elif isinstance(entry, dict) and entry.get("stamp") == stamp:
+            results[interpreter] = entry["info"]
+        else:
+            pending.append((interpreter, stamp))
+
+    if pending:
+        jobs = jobs or os.cpu_count() or 1
+        infos = asyncio.run(_probe_all([interpreter for interpreter, _ in pending], jobs, timeout))
+        for (interpreter, stamp), info in zip(pending, infos):
+            results[interpreter] = info
+            # Failures may be transient, e.g. an environment being created, so they're retried
+            if "error" not in info:
+                cache[interpreter] = {"stamp": stamp, "info": info}
+        save_cache(PROBE_CACHE, cache)
+
+    return results
+
+
+async def _create_one(
+    env_name: str, root: Optional[Path], semaphore: asyncio.Semaphore
+) -> Tuple[str, str]:
+    """Create one environment with Hatch."""
+    async with semaphore:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "hatch", "env", "create", env_name,
+                cwd=None if root is None else str(root),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                stdin=asyncio.subprocess.DEVNULL,
+            )
+        except OSError as e:
+            return env_name, str(e)
+        _, stderr = await process.communicate()
+
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip().splitlines()
+        return env_name, message[-1] if message else f"exit status {process.returncode}"
+    return env_name, ""
+
+
+async def _create_all(
+    env_names: List[str], root: Optional[Path], jobs: int
+) -> List[Tuple[str, str]]:
+    """Create environments concurrently, at most `jobs` at a time."""
+    semaphore = asyncio.Semaphore(jobs)
+    return await asyncio.gather(*(_create_one(name, root, semaphore) for name in env_names))
+
+
+def create_environments(
+    env_names: Iterable[str], root: Optional[Path] = None, jobs: Optional[int] = None
+) -> Dict[str, str]:
+    """Create Hatch environments in parallel.
+
+    Args:
+        env_names: The environments to create
+        root: The project root, defaults to the current directory
+        jobs: Maximum number of concurrent creations, defaults to the number of CPUs
+
+    Returns:
+        An error message for each environment that couldn't be created
+    """
+    env_names = list(dict.fromkeys(env_names))
+    if not env_names:
+        return {}
+    jobs = jobs or os.cpu_count() or 1
+    return {
+        env_name: error
+        for env_name, error in asyncio.run(_create_all(env_names, root, jobs))
+        if error
+    }
@@ -0,0 +1,134 @@
+"""Resolve which Hatch environment owns a file."""
+import os
+import re
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_RECURSIVE_SUFFIX = "/**/*"
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+
+class _Node:
+    """A path segment in the resolver trie."""
+
+    __slots__ = ("children", "env_name")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.env_name: Optional[str] = None
+
+
+class EnvironmentResolver:
+    """Map file paths to environments using compiled mapping patterns.
+
+    Patterns of the form `<dir>/**/*` are compiled into a trie of path segments,
+    so a lookup costs one dictionary access per segment regardless of how many
+    patterns there are. Other patterns fall back to glob matching.
+
+    Precedence follows the generated VSCode configuration: the most specific
+    pattern wins, i.e. the one with the most literal leading segments. Among
+    equally specific patterns, directory patterns win over other globs and
+    otherwise the first one in mapping order.
+    """
+
+    def __init__(self, mappings: Dict[str, str], root: Optional[Path] = None):
+        """Compile the mappings.
+
+        Args:
+            mappings: Dictionary mapping patterns to environment names
+            root: The project root absolute paths are relative to, defaults to
+                the current directory
+        """
+        self.root = os.path.abspath(root if root is not None else os.getcwd())
+        self._root_prefix = self.root.replace(os.sep, "/").rstrip("/") + "/"
+        self._trie = _Node()
+        self._globs: List[Tuple[int, str, str]] = []
+
+        for pattern, env_name in mappings.items():
+            pattern = pattern.replace("\\", "/")
+            if pattern.startswith("./"):
+                pattern = pattern[2:]
+            directory = None
+            if pattern.endswith(_RECURSIVE_SUFFIX):
+                directory = pattern[:-len(_RECURSIVE_SUFFIX)]
+            if directory and not _GLOB_CHARS.search(directory):
+                node = self._trie
+                for segment in directory.strip("/").split("/"):
+                    node = node.children.setdefault(segment, _Node())
+                if node.env_name is None:
+                    node.env_name = env_name
+            else:
+                self._globs.append((_literal_depth(pattern), pattern, env_name))
+
+    def _relative_segments(self, path: str) -> Optional[List[str]]:
+        """Split a path into segments relative to the root, None if outside of it."""
+        if os.sep != "/":
+            path = path.replace(os.sep, "/")
+        if path.startswith(self._root_prefix):
+            path = path[len(self._root_prefix):]
+        elif os.path.isabs(path):
+            path = os.path.relpath(path, self.root).replace(os.sep, "/")
+
+        segments = path.split("/")
+        # Only paths with `.`, `..` or empty segments need the slower normalization
+        if "" in segments or "." in segments or ".." in segments:
+            segments = os.path.normpath(path).replace(os.sep, "/").split("/")
+            if segments[0] == "..":
+                return None
+            segments = [segment for segment in segments if segment not in ("", ".")]
+        return segments
+
+    def resolve(self, path: str) -> Optional[str]:
+        """Get the environment owning a path.
+
+        Args:
+            path: A file path, relative to the root or absolute
+
+        Returns:
+            The environment name, or None if no pattern matches
+        """
+        segments = self._relative_segments(str(path))
+        if not segments:
+            return None
+
+        env_name = None
+        depth = 0
+        node = self._trie
+        # The last segment is excluded since `<dir>/**/*` only matches below <dir>
+        for i, segment in enumerate(segments[:-1], 1):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.env_name is not None:
+                env_name, depth = node.env_name, i
+
+        if self._globs:
+            relative = "/".join(segments)
+            for glob_depth, pattern, glob_env in self._globs:
+                if glob_depth > depth and fnmatchcase(relative, pattern):
+                    env_name, depth = glob_env, glob_depth
+        return env_name
+
+    def resolve_many(self, paths: Iterable[str]) -> Iterator[Tuple[str, Optional[str]]]:
+        """Resolve many paths lazily.
+
+        Args:
+            paths: File paths, relative to the root or absolute
+
+        Yields:
+            Each path with the environment owning it, or None
+        """
+        resolve = self.resolve
+        for path in paths:
+            yield path, resolve(path)
+
+
+def _literal_depth(pattern: str) -> int:
+    """Count the literal leading segments of a glob pattern."""
+    depth = 0
+    for segment in pattern.split("/"):
+        if _GLOB_CHARS.search(segment):
+            break
+        depth += 1
+    return depth
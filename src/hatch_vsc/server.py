@@ -0,0 +1,450 @@
+"""Resident daemon answering environment queries over a Unix socket.
+
+`hatch-vsc serve` keeps the parsed configuration, mappings, compiled
+resolvers and environment directories of every project it is asked about in
+memory, see `api.ProjectContext`, so tools asking which interpreter applies
+to a file don't pay for starting Python and parsing pyproject.toml on every
+call. Project state is checked against the configuration files on every
+query, so changes are picked up without restarting the daemon.
+
+The protocol is JSON-RPC 2.0, one message per line. A message may be a
+batch, a list of requests answered with a list of responses. Methods:
+
+- `which`: `{"paths": [...], "cwd": ...}` gives the project, environment and
+  interpreter of each path. Paths belong to the project of the nearest
+  directory with a pyproject.toml, and relative paths are relative to `cwd`.
+  Files no mapping matches get the default environment, like in VSCode.
+- `mappings`, `env_paths`: `{"root": ...}` gives a project's environment
+  mappings, or the directories of its environments.
+- `settings`: `{"root": ...}` generates a project's VSCode configuration,
+  without writing it.
+- `ping`, `shutdown`.
+
+The daemon exits once no client has been connected for the idle timeout.
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .api import get_project
+from .cache import get_cache_dir
+from .resolver import EnvironmentResolver
+
+SOCKET_NAME = "serve.sock"
+DEFAULT_IDLE_TIMEOUT = 600.0
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+# socketserver only has Unix stream servers where Unix domain sockets exist, not
+# on Windows; the module stays importable there and `serve` refuses to start
+_StreamServer = getattr(socketserver, "UnixStreamServer", socketserver.BaseServer)
+
+
+class RPCError(Exception):
+    """An error answered to the client."""
+
+    def __init__(self, code: int, message: str):
+        """Initialize the error.
+
+        Args:
+            code: The JSON-RPC error code
+            message: The error message
+        """
+        super().__init__(message)
+        self.code = code
+
+
+def get_socket_path() -> Path:
+    """Get the default location of the daemon's socket.
+
+    Returns:
+        The socket path, in the cache directory
+    """
+    return get_cache_dir() / SOCKET_NAME
+
+
+def find_project_root(directory: str, roots: Dict[str, Optional[str]]) -> Optional[str]:
+    """Find the project a directory belongs to.
+
+    Args:
+        directory: An absolute directory
+        roots: Roots already found for directories, extended with the lookups made
+
+    Returns:
+        The nearest directory with a pyproject.toml, None if there is none
+    """
+    visited = []
+    root = None
+    while True:
+        if directory in roots:
+            root = roots[directory]
+            break
+        visited.append(directory)
+        if os.path.isfile(os.path.join(directory, "pyproject.toml")):
+            root = directory
+            break
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    for directory in visited:
+        roots[directory] = root
+    return root
+
+
+def which(paths: Iterable[str], cwd: Optional[str] = None) -> List[Dict[str, Optional[str]]]:
+    """Get the project, environment and interpreter of each path.
+
+    Args:
+        paths: File paths, absolute or relative to `cwd`
+        cwd: The directory relative paths are relative to
+
+    Returns:
+        For each path its `path`, project `root`, `env` and `interpreter`,
+        None outside of projects
+    """
+    roots: Dict[str, Optional[str]] = {}
+    # Projects are validated against their configuration once per query
+    projects: Dict[str, Tuple[EnvironmentResolver, Dict[str, str]]] = {}
+    results = []
+    for path in paths:
+        if not os.path.isabs(path):
+            if cwd is None:
+                raise RPCError(INVALID_PARAMS, f"Relative path without cwd: {path}")
+            path = os.path.join(cwd, path)
+        path = os.path.normpath(path)
+        root = find_project_root(os.path.dirname(path), roots)
+        env_name = interpreter = None
+        if root is not None:
+            if root not in projects:
+                project = get_project(Path(root))
+                projects[root] = (project.resolver(), project.interpreter_paths())
+            resolver, interpreters = projects[root]
+            env_name = resolver.resolve(path) or "default"
+            interpreter = interpreters.get(env_name)
+        results.append({"path": path, "root": root, "env": env_name, "interpreter": interpreter})
+    return results
+
+
+def _root_param(params: Dict[str, Any]) -> Path:
+    """Get the project root a request is about."""
+    root = params.get("root")
+    if not isinstance(root, str) or not os.path.isabs(root):
+        raise RPCError(INVALID_PARAMS, "`root` must be an absolute path")
+    return Path(root)
+
+
+def _which(params: Dict[str, Any]) -> Any:
+    """Answer `which`."""
+    paths = params.get("paths")
+    if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+        raise RPCError(INVALID_PARAMS, "`paths` must be a list of paths")
+    return which(paths, params.get("cwd"))
+
+
+def _mappings(params: Dict[str, Any]) -> Any:
+    """Answer `mappings`."""
+    return get_project(_root_param(params)).mappings()
+
+
+def _env_paths(params: Dict[str, Any]) -> Any:
+    """Answer `env_paths`."""
+    env_paths = get_project(_root_param(params)).env_paths()
+    return {env_name: str(path) for env_name, path in env_paths.items()}
+
+
+def _settings(params: Dict[str, Any]) -> Any:
+    """Answer `settings`."""
+    generated = get_project(_root_param(params)).generate()
+    return {
+        "settings": generated.settings,
+        "env_config": generated.env_config,
+        "env_files": generated.env_files,
+    }
+
+
+METHODS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "which": _which,
+    "mappings": _mappings,
+    "env_paths": _env_paths,
+    "settings": _settings,
+}
+
+
+class ResolverServer(socketserver.ThreadingMixIn, _StreamServer):
+    """The daemon, serving each client connection from a thread."""
+
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, socket_path: Path, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """Bind the socket.
+
+        Args:
+            socket_path: Where to listen
+            idle_timeout: Seconds without connected clients after which to exit
+
+        Raises:
+            RuntimeError: If another daemon is listening on the socket
+        """
+        self.socket_path = Path(socket_path)
+        self.idle_timeout = idle_timeout
+        self.timeout = min(idle_timeout, 1.0)
+        self._clients = 0
+        self._last_active = time.monotonic()
+        self._stopping = False
+        self._state_lock = threading.Lock()
+
+        if self.socket_path.exists():
+            if _is_listening(self.socket_path):
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            # Left behind by a daemon that didn't exit cleanly
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(str(self.socket_path), _Handler)
+        os.chmod(self.socket_path, 0o600)
+
+    def client_connected(self) -> None:
+        """Count a new client."""
+        with self._state_lock:
+            self._clients += 1
+
+    def client_disconnected(self) -> None:
+        """Count a client leaving, starting the idle timeout when it was the last."""
+        with self._state_lock:
+            self._clients -= 1
+            self._last_active = time.monotonic()
+
+    def stop(self) -> None:
+        """Exit after the current request."""
+        self._stopping = True
+        # Wake up the loop waiting for connections
+        _is_listening(self.socket_path)
+
+    def is_idle(self) -> bool:
+        """Check whether the daemon should exit.
+
+        Returns:
+            True once stopped, or idle for longer than the idle timeout
+        """
+        with self._state_lock:
+            idle_for = time.monotonic() - self._last_active
+            return self._stopping or (self._clients == 0 and idle_for >= self.idle_timeout)
+
+    def serve_until_idle(self) -> None:
+        """Answer clients until the daemon is idle, then remove the socket."""
+        try:
+            while not self.is_idle():
+                self.handle_request()
+        finally:
+            self.server_close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    def handle_message(self, line: bytes) -> Optional[bytes]:
+        """Answer a message.
+
+        Args:
+            line: A JSON-RPC request or batch
+
+        Returns:
+            The serialized response, None if only notifications were sent
+        """
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return _dump(_error(None, PARSE_ERROR, str(e)))
+        if isinstance(message, list):
+            if not message:
+                return _dump(_error(None, INVALID_REQUEST, "Empty batch"))
+            responses = [response for response in map(self.handle_request_object, message)
+                         if response is not None]
+            return _dump(responses) if responses else None
+        response = self.handle_request_object(message)
+        return None if response is None else _dump(response)
+
+    def handle_request_object(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Answer a single request.
+
+        Args:
+            request: The decoded request
+
+        Returns:
+            The response, None for notifications
+        """
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return _error(None, INVALID_REQUEST, "Invalid request")
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params", {})
+        try:
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "`params` must be an object")
+            if method == "ping":
+                result: Any = "pong"
+            elif method == "shutdown":
+                self.stop()
+                result = None
+            elif method in METHODS:
+                result = METHODS[method](params)
+            else:
+                raise RPCError(METHOD_NOT_FOUND, f"Unknown method: {method}")
+        except RPCError as e:
+            response = _error(request_id, e.code, str(e))
+        except Exception as e:
+            response = _error(request_id, SERVER_ERROR, f"{type(e).__name__}: {e}")
+        else:
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        return response if "id" in request else None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answer the messages of one client connection."""
+
+    server: ResolverServer
+
+    def handle(self) -> None:
+        """Answer each line until the client disconnects."""
+        self.server.client_connected()
+        try:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                response = self.server.handle_message(line)
+                if response is not None:
+                    self.wfile.write(response + b"\n")
+        finally:
+            self.server.client_disconnected()
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """Build an error response."""
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def _dump(response: Any) -> bytes:
+    """Serialize a response on one line."""
+    return json.dumps(response, separators=(",", ":")).encode("utf-8")
+
+
+def _is_listening(socket_path: Path) -> bool:
+    """Check whether a daemon accepts connections on a socket."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def serve(
+    socket_path: Optional[Path] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT
+) -> None:
+    """Run the daemon until it is idle or asked to shut down.
+
+    Args:
+        socket_path: Where to listen, defaults to `get_socket_path`
+        idle_timeout: Seconds without connected clients after which to exit
+
+    Raises:
+        RuntimeError: If Unix sockets are unavailable or a daemon is already running
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("The daemon needs Unix domain sockets")
+    ResolverServer(socket_path or get_socket_path(), idle_timeout).serve_until_idle()
+
+
+class Client:
+    """A connection to the daemon."""
+
+    def __init__(self, socket_path: Optional[Path] = None, timeout: Optional[float] = 10.0):
+        """Connect to the daemon.
+
+        Args:
+            socket_path: The daemon's socket, defaults to `get_socket_path`
+            timeout: Seconds to wait for answers, None to wait forever
+
+        Raises:
+            OSError: If no daemon is listening
+        """
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(str(socket_path or get_socket_path()))
+        except OSError:
+            self._sock.close()
+            raise
+        self._file = self._sock.makefile("rwb")
+        self._next_id = 0
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Call a method.
+
+        Args:
+            method: The method name
+            params: The method parameters
+
+        Returns:
+            The result
+
+        Raises:
+            RuntimeError: If the daemon answered with an error
+        """
+        return self.batch([(method, params)])[0]
+
+    def batch(self, calls: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Any]:
+        """Call several methods in one message.
+
+        Args:
+            calls: The method names and parameters
+
+        Returns:
+            The results, in order
+
+        Raises:
+            RuntimeError: If the daemon answered any call with an error
+        """
+        requests = []
+        for method, params in calls:
+            self._next_id += 1
+            requests.append(
+                {"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params or {}}
+            )
+        self._file.write(_dump(requests) + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise RuntimeError("The daemon closed the connection")
+        responses = {response.get("id"): response for response in json.loads(line)}
+        results = []
+        for request in requests:
+            response = responses.get(request["id"], {})
+            if "error" in response or "result" not in response:
+                error = response.get("error", {}).get("message", "No response")
+                raise RuntimeError(f"{request['method']} failed: {error}")
+            results.append(response["result"])
+        return results
+
+    def close(self) -> None:
+        """Disconnect."""
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "Client":
+        """Use the connection as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Disconnect."""
+        self.close()
@@ -0,0 +1,268 @@
+"""Terminal environments: Hatch environments activated without activation scripts.
+
+The Python extension activates the selected interpreter's environment in
+every new terminal by running its activation script, which is slow for large
+environments. The variables activation sets, `VIRTUAL_ENV`, `PATH` and
+Hatch's `HATCH_ENV_ACTIVE` and `env-vars`, are computed once instead:
+
+- The default environment's go in `terminal.integrated.env.<platform>`, so
+  new terminals start activated, and `python.terminal.activateEnvironment`
+  is turned off.
+- Every mapped environment gets a dotenv file in `.vscode/hatch-envs`, to be
+  used as the `envFile` of launch configurations and tasks.
+
+Values refer to the inherited environment with `${env:NAME}`, which VSCode
+resolves both in terminal settings and in dotenv files.
+"""
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ACTIVATE_ENVIRONMENT = "python.terminal.activateEnvironment"
+TERMINAL_ENV_KEYS = {
+    "linux": "terminal.integrated.env.linux",
+    "darwin": "terminal.integrated.env.osx",
+    "win32": "terminal.integrated.env.windows",
+}
+ENV_FILE_DIR = "hatch-envs"
+ENV_ACTIVE = "HATCH_ENV_ACTIVE"
+
+_CONTEXT_FIELD = re.compile(r"\{([^{}]*)\}")
+_PLAIN_VALUE = re.compile(r"[\w${}:/\\.,;@%+=-]*")
+_UNSAFE_FILE_NAME = re.compile(r"[^\w.-]+")
+
+
+def get_terminal_env_key() -> str:
+    """Get the terminal environment setting of the current platform.
+
+    Returns:
+        The `terminal.integrated.env.*` key
+    """
+    return TERMINAL_ENV_KEYS.get(sys.platform, TERMINAL_ENV_KEYS["linux"])
+
+
+def format_env_var(value: str, env_name: str, root: Path) -> str:
+    """Format an `env-vars` value like Hatch's context formatting.
+
+    The `root`, `home`, `env_name`, `env_type`, `/` and `;` fields are
+    replaced. `{env:NAME}` becomes `${env:NAME}`, resolved when the terminal
+    starts, unless it has a default, which can only be applied now. Other
+    fields are kept as written.
+
+    Args:
+        value: The configured value
+        env_name: The environment name
+        root: The project root
+
+    Returns:
+        The formatted value
+    """
+    fields = {
+        "root": str(root),
+        "home": str(Path.home()),
+        "env_name": env_name,
+        "env_type": "virtual",
+        "/": os.sep,
+        ";": os.pathsep,
+    }
+
+    def replace(match: "re.Match[str]") -> str:
+        field = match.group(1)
+        if field in fields:
+            return fields[field]
+        if field.startswith("env:"):
+            name, _, default = field[len("env:"):].partition(":")
+            if default:
+                return os.environ.get(name, default)
+            return f"${{env:{name}}}"
+        return match.group(0)
+
+    return _CONTEXT_FIELD.sub(replace, value)
+
+
+def get_environ_references(config: Dict[str, Any]) -> List[str]:
+    """Get the variables `env-vars` values read from the process environment.
+
+    Only `{env:NAME:default}` fields are resolved when formatting, see
+    `format_env_var`, so formatted values are stale once these change.
+
+    Args:
+        config: The parsed pyproject.toml data
+
+    Returns:
+        The variable names, sorted
+    """
+    names = set()
+
+    def visit(value: Any) -> None:
+        if isinstance(value, dict):
+            for item in value.values():
+                visit(item)
+        elif isinstance(value, list):
+            for item in value:
+                visit(item)
+        elif isinstance(value, str):
+            for match in _CONTEXT_FIELD.finditer(value):
+                field = match.group(1)
+                if field.startswith("env:"):
+                    name, _, default = field[len("env:"):].partition(":")
+                    if default:
+                        names.add(name)
+
+    # Anywhere in the environments, since templates and matrix overrides set env-vars too
+    visit(config.get("tool", {}).get("hatch", {}).get("envs", {}))
+    return sorted(names)
+
+
+def get_env_vars(config: Dict[str, Any], root: Path) -> Dict[str, Dict[str, str]]:
+    """Get the `env-vars` of every concrete environment setting some.
+
+    Args:
+        config: The parsed pyproject.toml data
+        root: The project root
+
+    Returns:
+        The formatted variables keyed by environment name
+    """
+    from .matrix import expand_environments
+
+    envs = expand_environments(config.get("tool", {}).get("hatch", {}).get("envs", {}))
+    env_vars = {}
+    for env_name, env in envs.items():
+        variables = env.get("env-vars")
+        if isinstance(variables, dict) and variables:
+            env_vars[env_name] = {
+                key: format_env_var(str(value), env_name, root)
+                for key, value in variables.items()
+            }
+    return env_vars
+
+
+def get_scripts_dir(env_path: Path) -> Path:
+    """Get the directory of an environment's executables.
+
+    Args:
+        env_path: The environment directory
+
+    Returns:
+        `Scripts` on Windows, `bin` elsewhere
+    """
+    return env_path / ("Scripts" if sys.platform == "win32" else "bin")
+
+
+def get_activation_env(
+    env_name: str, env_path: Path, env_vars: Optional[Dict[str, str]] = None
+) -> Dict[str, Optional[str]]:
+    """Get the variables activating an environment sets.
+
+    Args:
+        env_name: The environment name
+        env_path: The environment directory
+        env_vars: The environment's formatted `env-vars`
+
+    Returns:
+        The variables, None for those activation unsets
+    """
+    activation: Dict[str, Optional[str]] = dict(env_vars or {})
+    activation.update({
+        "VIRTUAL_ENV": str(env_path),
+        "PATH": f"{get_scripts_dir(env_path)}{os.pathsep}${{env:PATH}}",
+        "PYTHONHOME": None,
+        ENV_ACTIVE: env_name,
+    })
+    return activation
+
+
+def format_env_file(activation: Dict[str, Optional[str]]) -> str:
+    """Format activation variables as a dotenv file.
+
+    Args:
+        activation: The variables from `get_activation_env`
+
+    Returns:
+        The file content, without the variables to unset
+    """
+    lines = []
+    for key, value in activation.items():
+        if value is None:
+            continue
+        # Quoted values are taken literally, except for variable references
+        if not _PLAIN_VALUE.fullmatch(value):
+            value = f"'{value}'" if '"' in value else f'"{value}"'
+        lines.append(f"{key}={value}")
+    return "\n".join(lines) + "\n"
+
+
+def get_env_files(
+    env_paths: Dict[str, Path],
+    env_names: Iterable[str],
+    env_vars: Dict[str, Dict[str, str]],
+) -> Dict[str, str]:
+    """Get the dotenv file of each environment.
+
+    Files are named after the environments, with characters that can't be
+    part of file names replaced by `_`.
+
+    Args:
+        env_paths: The environment directories
+        env_names: The environments to get files for
+        env_vars: The formatted `env-vars` keyed by environment name
+
+    Returns:
+        The content of the files keyed by file name
+    """
+    files = {}
+    for env_name in dict.fromkeys(env_names):
+        if env_name not in env_paths:
+            continue
+        activation = get_activation_env(env_name, env_paths[env_name], env_vars.get(env_name))
+        # Monorepo environment names contain project directories
+        files[f"{_UNSAFE_FILE_NAME.sub('_', env_name)}.env"] = format_env_file(activation)
+    return files
+
+
+def write_env_files(vscode_dir: Path, files: Dict[str, str]) -> None:
+    """Write the dotenv files of the environments, removing those of other environments.
+
+    Args:
+        vscode_dir: The `.vscode` directory
+        files: The files from `get_env_files`
+    """
+    from .update_vscode_env import write_if_changed
+
+    env_dir = vscode_dir / ENV_FILE_DIR
+    if files:
+        env_dir.mkdir(exist_ok=True)
+    for name, content in files.items():
+        write_if_changed(env_dir / name, content)
+    if env_dir.is_dir():
+        for path in env_dir.glob("*.env"):
+            if path.name not in files:
+                path.unlink()
+
+
+def merge_generated_env(
+    current: Any, previous: List[str], generated: Dict[str, Optional[str]]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Merge generated variables into a user-maintained terminal environment.
+
+    Variables the user set themselves are left as they are and not recorded
+    as generated, so they survive when no longer generated.
+
+    Args:
+        current: The current value of the setting, None if it isn't set
+        previous: The variables generated last time
+        generated: The newly generated variables
+
+    Returns:
+        The merged setting, and the generated variables that were added to it
+    """
+    user_entries = {
+        key: value
+        for key, value in (current if isinstance(current, dict) else {}).items()
+        if key not in previous
+    }
+    added = [key for key in generated if key not in user_entries]
+    return {**user_entries, **{key: generated[key] for key in added}}, added
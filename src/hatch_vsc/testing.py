@@ -0,0 +1,218 @@
+"""Test discovery: restrict VSCode's test explorer to the projects' test roots.
+
+Without configuration the Python extension's pytest discovery collects the
+whole workspace with the selected interpreter. The environments running
+tests are recognized from their dependencies and scripts, and their test
+roots, the directories they're mapped to, are passed to the framework:
+
+- pytest: `python.testing.pytestArgs` lists the roots, and
+  `python.testing.pytestPath` is the pytest of the environment owning them
+  when that's a single one.
+- unittest, when no environment uses pytest: `python.testing.unittestArgs`
+  starts discovery in the first root.
+- behave: `behave-vsc.featuresPath` of the Behave VSC extension is the first
+  root.
+
+`python.testing.cwd` is the workspace folder, which the roots are relative
+to. Settings the user set themselves are left alone.
+"""
+import fnmatch
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+PYTEST_ENABLED = "python.testing.pytestEnabled"
+PYTEST_ARGS = "python.testing.pytestArgs"
+PYTEST_PATH = "python.testing.pytestPath"
+UNITTEST_ENABLED = "python.testing.unittestEnabled"
+UNITTEST_ARGS = "python.testing.unittestArgs"
+TESTING_CWD = "python.testing.cwd"
+BEHAVE_FEATURES_PATH = "behave-vsc.featuresPath"
+
+# The extensions' defaults, restored when a setting is no longer generated
+TESTING_DEFAULTS: Dict[str, Any] = {
+    PYTEST_ENABLED: False,
+    PYTEST_PATH: "pytest",
+    UNITTEST_ENABLED: False,
+    UNITTEST_ARGS: ["-v", "-s", ".", "-p", "*test*.py"],
+    TESTING_CWD: None,
+    BEHAVE_FEATURES_PATH: "features",
+}
+TESTING_KEYS = (PYTEST_ARGS, *TESTING_DEFAULTS)
+
+TEST_FILE_PATTERNS = {
+    "pytest": ("test_*.py", "*_test.py"),
+    "unittest": ("test*.py",),
+    "behave": ("*.feature",),
+}
+# Rough cost of collecting one test file, mostly importing it
+DISCOVERY_SECONDS_PER_FILE = 0.01
+
+
+def get_test_framework(env_config: Dict[str, Any]) -> Optional[str]:
+    """Recognize the test framework an environment runs.
+
+    Args:
+        env_config: The raw environment definition
+
+    Returns:
+        `pytest`, `behave` or `unittest`, None if the environment doesn't run tests
+    """
+    dependencies = env_config.get("dependencies", [])
+    deps_str = " ".join(str(dep) for dep in dependencies).lower()
+    scripts = env_config.get("scripts", {})
+    commands = " ".join(
+        " ".join(command) if isinstance(command, list) else str(command)
+        for command in (scripts.values() if isinstance(scripts, dict) else [])
+    )
+    for framework in ("pytest", "behave"):
+        if framework in deps_str or framework in commands:
+            return framework
+    if "unittest" in commands:
+        return "unittest"
+    return None
+
+
+def get_test_roots(
+    envs: Dict[str, Dict[str, Any]], env_names: Optional[Dict[str, str]] = None
+) -> List[Dict[str, str]]:
+    """Get the test roots of a project's environments.
+
+    A test environment's root is the directory it is mapped to; the default
+    environment, which is mapped to the sources, uses `infer_test_directory`.
+    Each root is owned by the environment its files are mapped to.
+
+    Args:
+        envs: Raw environment definitions, keyed by name
+        env_names: The concrete environment standing for each definition
+
+    Returns:
+        The `framework`, `root` directory and owning `env` of each test root
+    """
+    from .resolver import EnvironmentResolver
+    from .update_vscode_env import infer_test_directory, map_environments
+
+    env_names = env_names or {}
+    mappings = map_environments(envs, env_names)
+    directories: Dict[str, str] = {}
+    for pattern, env_name in mappings.items():
+        if pattern.endswith("/**/*"):
+            directories.setdefault(env_name, pattern[:-len("/**/*")])
+    resolver = EnvironmentResolver(mappings, Path(os.sep))
+
+    tests = []
+    seen = set()
+    for definition, env_config in envs.items():
+        framework = get_test_framework(env_config)
+        if framework is None:
+            continue
+        env_name = env_names.get(definition, definition)
+        if definition == "default":
+            root = infer_test_directory(env_config) or "tests"
+        else:
+            root = directories.get(env_name)
+        if not root or (framework, root) in seen:
+            continue
+        seen.add((framework, root))
+        owner = resolver.resolve(f"{root}/__init__.py") or env_names.get("default", "default")
+        tests.append({"framework": framework, "root": root, "env": owner})
+    return tests
+
+
+def get_testing_settings(
+    tests: List[Dict[str, str]], env_paths: Dict[str, Path]
+) -> Dict[str, Any]:
+    """Get the settings restricting test discovery to the test roots.
+
+    Args:
+        tests: The test roots from `get_test_roots`
+        env_paths: The environment directories keyed by environment name
+
+    Returns:
+        The settings, empty without test roots
+    """
+    from .terminal import get_scripts_dir
+
+    by_framework: Dict[str, List[Dict[str, str]]] = {}
+    for test in tests:
+        by_framework.setdefault(test["framework"], []).append(test)
+    settings: Dict[str, Any] = {}
+
+    pytest_roots = by_framework.get("pytest", [])
+    if pytest_roots:
+        settings[PYTEST_ENABLED] = True
+        settings[PYTEST_ARGS] = list(dict.fromkeys(test["root"] for test in pytest_roots))
+        owners = {test["env"] for test in pytest_roots}
+        owner = owners.pop() if len(owners) == 1 else None
+        if owner in env_paths:
+            executable = "pytest.exe" if sys.platform == "win32" else "pytest"
+            settings[PYTEST_PATH] = str(get_scripts_dir(env_paths[owner]) / executable)
+    elif "unittest" in by_framework:
+        settings[UNITTEST_ENABLED] = True
+        root = by_framework["unittest"][0]["root"]
+        settings[UNITTEST_ARGS] = ["-v", "-s", root, "-p", "test*.py"]
+    if "behave" in by_framework:
+        settings[BEHAVE_FEATURES_PATH] = by_framework["behave"][0]["root"]
+    if settings:
+        settings[TESTING_CWD] = "${workspaceFolder}"
+    return settings
+
+
+def merge_testing_settings(
+    current: Dict[str, Any], previous: Dict[str, List[Any]], generated: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+    """Merge the generated testing settings into the user's.
+
+    `pytestArgs` keeps the user's own arguments. Other settings are only
+    set when the user didn't set them, and restored to the extension's
+    default once no longer generated.
+
+    Args:
+        current: The current values of the testing settings that are set
+        previous: The entries generated last time, keyed by setting
+        generated: The settings from `get_testing_settings`
+
+    Returns:
+        The settings to write, and the generated entries to record
+    """
+    from .analysis import merge_generated
+
+    settings: Dict[str, Any] = {}
+    recorded: Dict[str, List[Any]] = {}
+    if PYTEST_ARGS in generated or PYTEST_ARGS in previous:
+        values = generated.get(PYTEST_ARGS, [])
+        settings[PYTEST_ARGS] = merge_generated(
+            current.get(PYTEST_ARGS), previous.get(PYTEST_ARGS, []), values
+        )
+        recorded[PYTEST_ARGS] = values
+    for key, default in TESTING_DEFAULTS.items():
+        if key in generated and (key not in current or key in previous):
+            settings[key] = generated[key]
+            recorded[key] = [generated[key]]
+        elif key not in generated and key in previous:
+            settings[key] = default
+    return settings, recorded
+
+
+def estimate_discovery(root: Path, tests: List[Dict[str, str]]) -> List[Tuple[str, int, float]]:
+    """Estimate how long collecting each test root takes, from its number of test files.
+
+    Args:
+        root: The project root
+        tests: The test roots from `get_test_roots`
+
+    Returns:
+        Each test root with its number of test files and estimated seconds
+    """
+    estimates = []
+    for test in tests:
+        patterns = TEST_FILE_PATTERNS[test["framework"]]
+        count = 0
+        for directory, dirs, files in os.walk(Path(root) / test["root"]):
+            dirs[:] = [name for name in dirs if not name.startswith(".") and name != "__pycache__"]
+            count += sum(
+                1 for name in files if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+            )
+        estimates.append((test["root"], count, count * DISCOVERY_SECONDS_PER_FILE))
+    return estimates
@@ -0,0 +1,140 @@
+"""Per-phase timing instrumentation and profiling."""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+TIMINGS_ENV_VAR = "HATCH_VSC_TIMINGS"
+PROFILE_ENV_VAR = "HATCH_VSC_PROFILE"
+FORMATS = ("table", "json")
+
+
+class Timings:
+    """Wall time recorded for each phase of a run."""
+
+    def __init__(self):
+        """Initialize an empty recording."""
+        self.records: List[Tuple[str, int, float]] = []
+        self._depth = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Record the wall time of a phase.
+
+        Phases may be nested, nested phases are indented in the table.
+
+        Args:
+            name: The phase name
+        """
+        index = len(self.records)
+        self.records.append((name, self._depth, 0.0))
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.records[index] = (name, self._depth, time.perf_counter() - start)
+
+    def format_table(self) -> str:
+        """Format the recorded phases as a human readable table.
+
+        Returns:
+            The table, one phase per line
+        """
+        width = max([len(name) + 2 * depth for name, depth, _ in self.records] + [5])
+        lines = [f"{'phase':<{width}}  {'time':>10}"]
+        for name, depth, seconds in self.records:
+            lines.append(f"{'  ' * depth + name:<{width}}  {seconds * 1000:>7.2f} ms")
+        total = sum(seconds for _, depth, seconds in self.records if depth == 0)
+        lines.append(f"{'total':<{width}}  {total * 1000:>7.2f} ms")
+        return "\n".join(lines)
+
+    def format_json_lines(self) -> str:
+        """Format the recorded phases as JSON lines.
+
+        Returns:
+            One JSON object per phase
+        """
+        return "\n".join(
+            json.dumps({"phase": name, "depth": depth, "seconds": seconds})
+            for name, depth, seconds in self.records
+        )
+
+
+# Per thread and task, so that concurrent runs don't record into each other
+_active: "ContextVar[Optional[Timings]]" = ContextVar("hatch_vsc_timings", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record the wall time of a phase if timings are being recorded.
+
+    Args:
+        name: The phase name
+    """
+    timings = _active.get()
+    if timings is None:
+        yield
+        return
+
+    with timings.phase(name):
+        yield
+
+
+def get_timings_options() -> Tuple[Optional[str], Optional[str]]:
+    """Get the timings format and profile path requested through the environment.
+
+    Returns:
+        The timings format (`table` or `json`) and the cProfile output path,
+        each None if not requested
+    """
+    fmt = os.getenv(TIMINGS_ENV_VAR, "").strip().lower() or None
+    if fmt in ("1", "true", "yes"):
+        fmt = "table"
+    elif fmt not in FORMATS:
+        fmt = None
+    return fmt, os.getenv(PROFILE_ENV_VAR) or None
+
+
+@contextmanager
+def record_timings(
+    fmt: Optional[str] = None,
+    profile_path: Optional[str] = None,
+    stream: Optional[TextIO] = None,
+) -> Iterator[Optional[Timings]]:
+    """Record timings and optionally profile the enclosed code.
+
+    The report is written when the block exits, even if it fails.
+
+    Args:
+        fmt: The report format, `table` or `json`, None to not record timings
+        profile_path: Where to dump cProfile statistics, None to not profile
+        stream: Where to write the report, defaults to stderr
+
+    Yields:
+        The recording, or None if timings aren't recorded
+    """
+    timings = Timings() if fmt is not None else None
+    token = _active.set(timings) if timings is not None else None
+
+    profiler = None
+    if profile_path:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield timings
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if token is not None:
+            _active.reset(token)
+        if timings is not None:
+            report = timings.format_json_lines() if fmt == "json" else timings.format_table()
+            print(report, file=stream or sys.stderr)
@@ -1,74 +1,320 @@
 """Updates VSCode configuration for Hatch environments."""
+import argparse
 import json
 import os
 import sys
-import platform
-import subprocess
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
 
 import tomli
 
+from . import jsonc
+from .cache import (
+    FINGERPRINT_KEY,
+    atomic_write_text,
+    cache_enabled,
+    cache_key,
+    file_digest,
+    file_fingerprint,
+    load_cache,
+    save_cache,
+)
+from .locations import (
+    get_explicit_paths,
+    get_project_name,
+    get_storage_path,
+    resolve_env_paths,
+)
+from .timing import FORMATS, get_timings_options, phase, record_timings
 
-def get_macos_hatch_path() -> Path:
-    """Get the path to Hatch environments on macOS.
+GENERATED_KEY = "hatch-vsc.generated"
+CONFIG_CACHE_PREFIX = "config-"
+CONFIG_FILES = ("pyproject.toml", "hatch.toml")
+# Files modified this close to a cache write may change again within the same mtime tick
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def get_hatch_env_path(
+    root: Optional[Path] = None, summary: Optional[Dict[str, Any]] = None
+) -> Path:
+    """Get the directory holding a project's Hatch environments.
+    
+    The location is computed from Hatch's configuration like Hatch does,
+    see `locations`, so no process is spawned.
+    
+    Args:
+        root: The project root, defaults to the current directory
+        summary: The project summary from `load_project_summary`, loaded if not given
+        
+    Returns:
+        The storage directory of the project's environments
+    """
+    project_root = Path.cwd() if root is None else Path(root)
+    if summary is None:
+        summary = _load_location_summary(project_root)
+    return get_storage_path(project_root, summary["project"])
+
+
+def _load_location_summary(root: Path) -> Dict[str, Any]:
+    """Load what environment locations depend on, also for projects without pyproject.toml."""
+    try:
+        return load_project_summary(root)
+    except FileNotFoundError:
+        return {"project": get_project_name({}, root.resolve()), "paths": {}}
+
+
+def read_pyproject_toml(root: Optional[Path] = None) -> Dict[str, Any]:
+    """Read the pyproject.toml file.
     
+    Like Hatch, top-level tables of a hatch.toml next to pyproject.toml take
+    precedence over those of `[tool.hatch]`.
+    
+    Args:
+        root: The project root, defaults to the current directory
+        
     Returns:
-        The path to Hatch environments
+        The parsed TOML data
     """
-    username = os.getenv("USER")
-    if not username:
-        raise RuntimeError("Could not determine username")
-    base_path = Path(f"/Users/{username}/Library/Application Support/hatch/env/virtual")
+    project_root = Path(".") if root is None else Path(root)
+    pyproject_path = project_root / "pyproject.toml"
+    if not pyproject_path.exists():
+        raise FileNotFoundError("pyproject.toml not found")
     
-    # Find the hash directory for this project
-    project_name = Path.cwd().name
-    project_dir = base_path / project_name
+    with open(pyproject_path, "rb") as f:
+        config = tomli.load(f)
     
-    # Find the hash directory (should be the only subdirectory)
-    if project_dir.exists():
-        hash_dirs = [d for d in project_dir.iterdir() if d.is_dir()]
-        if hash_dirs:
-            return hash_dirs[0]  # Return the hash directory path
+    hatch_file = project_root / "hatch.toml"
+    if hatch_file.is_file():
+        with open(hatch_file, "rb") as f:
+            hatch_config = tomli.load(f)
+        tool_config = config.setdefault("tool", {})
+        tool_config["hatch"] = {**tool_config.get("hatch", {}), **hatch_config}
     
-    # If no hash directory found, return project directory
-    return project_dir
+    return config
 
 
-def get_hatch_env_path() -> Path:
-    """Get the path to Hatch environments.
+def extract_hatch_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a parsed pyproject.toml to the parts used by hatch-vsc.
     
+    Args:
+        config: The parsed pyproject.toml data
+        
     Returns:
-        The path to Hatch environments
+        The `[tool.hatch]` table and build backend, in the same layout
     """
-    system = platform.system().lower()
+    extracted: Dict[str, Any] = {}
+    if "hatch" in config.get("tool", {}):
+        extracted["tool"] = {"hatch": config["tool"]["hatch"]}
+    build_backend = config.get("build-system", {}).get("build-backend")
+    if build_backend is not None:
+        extracted["build-system"] = {"build-backend": build_backend}
+    return extracted
+
+
+def get_config_cache_version() -> List[Any]:
+    """Get fingerprints of the code computing mappings, so upgrades invalidate the cache."""
+    here = Path(__file__)
+    return [
+        file_fingerprint(here),
+        file_fingerprint(here.with_name("matrix.py")),
+        file_fingerprint(here.with_name("testing.py")),
+        file_fingerprint(here.with_name("analysis.py")),
+        file_fingerprint(here.with_name("terminal.py")),
+        file_fingerprint(here.with_name("locations.py")),
+    ]
+
+
+def load_project_config(
+    root: Optional[Path] = None
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Read the Hatch configuration of a project and derive its environment mappings.
     
-    if system == "darwin":
-        return get_macos_hatch_path()
+    Results are cached per project, keyed by the size, mtime and content hash
+    of pyproject.toml and hatch.toml. Unchanged files are recognized with a
+    `stat()` each, and touched but identical files with a hash, so neither
+    TOML parsing nor mapping inference runs again.
     
-    # For other systems, use hatch env find
-    try:
-        result = subprocess.run(['hatch', 'env', 'find'], capture_output=True, text=True)
-        if result.returncode == 0:
-            return Path(result.stdout.strip()).parent
-    except Exception:
-        pass
+    Args:
+        root: The project root, defaults to the current directory
+        
+    Returns:
+        The configuration reduced by `extract_hatch_config`, and the mappings
+    """
+    config, summary = _load_project(root, include_config=True)
+    return config, summary["mappings"]
+
+
+def load_project_mappings(root: Optional[Path] = None) -> Dict[str, str]:
+    """Get the environment mappings of a project, cached like `load_project_config`.
+    
+    Only the mappings are loaded from the cache, which keeps warm runs cheap
+    for projects with very large configurations.
     
-    raise NotImplementedError(f"Platform {sys.platform} not supported yet")
+    Args:
+        root: The project root, defaults to the current directory
+        
+    Returns:
+        A dictionary mapping patterns to environment names
+    """
+    return load_project_summary(root)["mappings"]
 
 
-def read_pyproject_toml() -> Dict[str, Any]:
-    """Read the pyproject.toml file.
+def load_project_summary(root: Optional[Path] = None) -> Dict[str, Any]:
+    """Get what the generated configuration needs from a project, cached like `load_project_config`.
     
+    Args:
+        root: The project root, defaults to the current directory
+        
     Returns:
-        The parsed TOML data
+        The environment `mappings`, the names of the direct `dependencies`, the
+        `collector` options, the `project` name and explicit environment
+        `paths` that environment locations depend on, the `env-vars` of
+        the environments with the `environ` values they were formatted with,
+        and the test roots as `tests`
     """
-    pyproject_path = Path("pyproject.toml")
-    if not pyproject_path.exists():
-        raise FileNotFoundError("pyproject.toml not found")
+    return _load_project(root, include_config=False)[1]
+
+
+def _load_project(
+    root: Optional[Path], include_config: bool
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """Load the cached configuration and summary of a project, parsing them if stale."""
+    project_root = Path(".") if root is None else Path(root)
+    paths = [project_root / name for name in CONFIG_FILES]
+    stamps = [file_fingerprint(path) for path in paths]
+    if stamps[0] is None or not cache_enabled():
+        return _parse_project_config(root)
     
-    with open(pyproject_path, "rb") as f:
-        return tomli.load(f)
+    # The large configuration is stored apart so loading only the mappings stays cheap
+    cache_name = CONFIG_CACHE_PREFIX + cache_key(str(project_root.resolve()))[:16]
+    entry = load_cache(cache_name)
+    version = get_config_cache_version()
+    fresh = False
+    digests = None
+    if entry.get("version") == version:
+        written_ns = entry.get("written_ns", 0)
+        racy = any(stamp and stamp[1] >= written_ns - RACY_WINDOW_NS for stamp in stamps)
+        if stamps == entry.get("stamps") and not racy:
+            fresh = True
+        else:
+            digests = [file_digest(path) for path in paths]
+            fresh = digests == entry.get("digests")
+            if fresh and not racy:
+                entry["stamps"] = stamps
+                save_cache(cache_name, entry)
+    
+    if fresh and environ_changed(entry["summary"]):
+        fresh = False
+    if fresh:
+        if not include_config:
+            return None, entry["summary"]
+        config = load_cache(cache_name + "-config").get("config")
+        if config is not None:
+            return config, entry["summary"]
+    
+    if digests is None:
+        digests = [file_digest(path) for path in paths]
+    written_ns = time.time_ns()
+    config, summary = _parse_project_config(root)
+    save_cache(cache_name + "-config", {"config": config})
+    save_cache(cache_name, {
+        "version": version,
+        "stamps": stamps,
+        "digests": digests,
+        "written_ns": written_ns,
+        "summary": summary,
+    })
+    return config, summary
+
+
+def environ_changed(summary: Dict[str, Any]) -> bool:
+    """Check whether variables a summary's `env-vars` were formatted with changed since.
+    
+    Args:
+        summary: A project summary from `load_project_summary`
+        
+    Returns:
+        True if the summary has to be computed again
+    """
+    environ = summary.get("environ", {})
+    return any(os.environ.get(name) != value for name, value in environ.items())
+
+
+def _parse_project_config(root: Optional[Path]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Parse the Hatch configuration of a project and summarize it, bypassing the cache."""
+    from .analysis import get_direct_dependencies
+    from .matrix import get_representative_env_names
+    from .terminal import get_env_vars, get_environ_references
+    from .testing import get_test_roots
+    
+    project_root = Path.cwd() if root is None else Path(root)
+    with phase("parse"):
+        config = read_pyproject_toml(root)
+    with phase("mapping inference"):
+        envs = config.get("tool", {}).get("hatch", {}).get("envs", {})
+        summary = {
+            "mappings": get_environment_mappings(config),
+            "dependencies": get_direct_dependencies(config),
+            "collector": get_collector_config(config),
+            "project": get_project_name(config, project_root.resolve()),
+            "paths": get_explicit_paths(config),
+            "env-vars": get_env_vars(config, project_root.resolve()),
+            "environ": {name: os.environ.get(name) for name in get_environ_references(config)},
+            "tests": get_test_roots(envs, get_representative_env_names(envs)),
+        }
+    return extract_hatch_config(config), summary
+
+
+def get_collector_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the options of the VSCode environment collector.
+    
+    Args:
+        config: The parsed pyproject.toml data
+        
+    Returns:
+        The `[tool.hatch.env.collectors.vscode]` table, empty if not configured
+    """
+    hatch_config = config.get("tool", {}).get("hatch", {})
+    collector_config = hatch_config.get("env", {}).get("collectors", {}).get("vscode", {})
+    return collector_config if isinstance(collector_config, dict) else {}
+
+
+def get_workspace_excludes(
+    root: Optional[Path], collector_config: Optional[Dict[str, Any]] = None
+) -> Dict[str, List[str]]:
+    """Get the workspace exclusions configured for a project.
+    
+    The sweep is controlled by the collector options `exclude`, false to
+    disable it, and `exclude-threshold`, the number of files above which a
+    directory is excluded.
+    
+    Args:
+        root: The project root, defaults to the current directory
+        collector_config: The collector options from `get_collector_config`
+        
+    Returns:
+        The generated glob patterns keyed by setting, none if disabled
+    """
+    from .excludes import (
+        DEFAULT_FILE_THRESHOLD,
+        EXCLUDE_SETTINGS,
+        get_exclude_settings,
+        scan_workspace,
+    )
+    
+    collector_config = collector_config or {}
+    if not collector_config.get("exclude", True):
+        # Previously generated patterns are still removed
+        return {key: [] for key in EXCLUDE_SETTINGS}
+    threshold = collector_config.get("exclude-threshold", DEFAULT_FILE_THRESHOLD)
+    if not isinstance(threshold, int) or isinstance(threshold, bool) or threshold < 1:
+        raise ValueError(
+            "Field `tool.hatch.env.collectors.vscode.exclude-threshold` must be a positive integer"
+        )
+    with phase("workspace scan"):
+        found = scan_workspace(Path.cwd() if root is None else Path(root), threshold)
+    return get_exclude_settings(found)
 
 
 def infer_test_directory(env_config: Dict[str, Any]) -> str:
@@ -110,24 +356,49 @@ def infer_test_directory(env_config: Dict[str, Any]) -> str:
 def get_environment_mappings(config: Dict[str, Any]) -> Dict[str, str]:
     """Get environment mappings from pyproject.toml.
     
+    Matrices are expanded like Hatch does, and each mapped directory points
+    at the member selected with `vsc-matrix-member`.
+    
     Args:
         config: The parsed pyproject.toml data
         
     Returns:
         A dictionary mapping patterns to environment names
     """
-    hatch_config = config.get("tool", {}).get("hatch", {})
-    envs = hatch_config.get("envs", {})
+    from .matrix import get_representative_env_names
+    
+    envs = config.get("tool", {}).get("hatch", {}).get("envs", {})
+    return map_environments(envs, get_representative_env_names(envs))
+
+
+def map_environments(
+    envs: Dict[str, Dict[str, Any]], env_names: Optional[Dict[str, str]] = None
+) -> Dict[str, str]:
+    """Map directory patterns to environments.
+    
+    Only the keys written for each environment are used, keys inherited from
+    templates would make environments look like their template.
+    
+    Args:
+        envs: Raw environment definitions from pyproject.toml, keyed by name
+        env_names: The concrete environment standing for each definition,
+            e.g. a matrix member; definitions map to themselves by default
+        
+    Returns:
+        A dictionary mapping patterns to environment names
+    """
+    env_names = env_names or {}
     
     # Start with default environment for source files
     mappings = {
-        "src/**/*": "default"  # Default environment for source files
+        "src/**/*": env_names.get("default", "default")  # Default environment for source files
     }
     
     # Look for environment-specific directory mappings
-    for env_name, env_config in envs.items():
-        if env_name == "default":
+    for definition, env_config in envs.items():
+        if definition == "default":
             continue
+        env_name = env_names.get(definition, definition)
         
         # 1. Check for explicit VSCode mapping in env config
         if "vsc-mapping" in env_config:
@@ -136,6 +407,7 @@ def get_environment_mappings(config: Dict[str, Any]) -> Dict[str, str]:
             
         # 2. Check for script patterns that indicate directory mapping
         scripts = env_config.get("scripts", {})
+        mapped = False
         for script_cmd in scripts.values():
             if isinstance(script_cmd, str) and script_cmd.startswith("cd "):
                 # Extract directory from cd command
@@ -147,81 +419,709 @@ def get_environment_mappings(config: Dict[str, Any]) -> Dict[str, str]:
                 else:
                     dir_path = script_cmd.split()[1]
                 mappings[f"{dir_path}/**/*"] = env_name
+                mapped = True
                 break
+        if mapped:
+            continue
         
         # 3. Try to infer from standard test framework conventions
-        if env_name not in mappings.values():
-            test_dir = infer_test_directory(env_config)
-            if test_dir:
-                mappings[f"{test_dir}/**/*"] = env_name
-                continue
+        test_dir = infer_test_directory(env_config)
+        if test_dir:
+            mappings[f"{test_dir}/**/*"] = env_name
+            continue
         
         # 4. If no mapping found, use environment name as directory
-        if env_name not in mappings.values():
-            mappings[f"{env_name}/**/*"] = env_name
+        mappings[f"{definition}/**/*"] = env_name
     
     return mappings
 
 
-def update_vscode_config(mappings: Dict[str, str]) -> None:
+def get_environment_paths(
+    env_names: List[str], project_name: Optional[str] = None, root: Optional[Path] = None
+) -> Dict[str, Path]:
+    """Get the directories of Hatch environments.
+    
+    Args:
+        env_names: The environment names
+        project_name: The project name, defaults to the one Hatch uses
+        root: The project root, defaults to the current directory
+        
+    Returns:
+        A dictionary mapping environment names to their directories
+    """
+    project_root = Path.cwd() if root is None else Path(root)
+    summary = _load_location_summary(project_root)
+    storage_path = get_hatch_env_path(project_root, summary)
+    return resolve_env_paths(
+        env_names, project_root, project_name or summary["project"], storage_path,
+        summary["paths"],
+    )
+
+
+def get_interpreter_path(env_path: Path) -> Path:
+    """Get the Python interpreter of an environment.
+    
+    Args:
+        env_path: The environment directory
+        
+    Returns:
+        The path to the environment's Python interpreter, `Scripts/python.exe`
+        on Windows and `bin/python` elsewhere
+    """
+    if sys.platform == "win32":
+        return env_path / "Scripts" / "python.exe"
+    return env_path / "bin" / "python"
+
+
+def probe_environments(
+    env_paths: Dict[str, Path], jobs: Optional[int] = None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Validate the interpreters of environments.
+    
+    Args:
+        env_paths: The environment directories keyed by environment name
+        jobs: Maximum number of concurrent probes, defaults to the number of CPUs
+        
+    Returns:
+        For each environment, None if its interpreter doesn't exist, otherwise
+        the interpreter's metadata or an `error` message
+    """
+    from .probe import probe_interpreters
+    
+    interpreters = {name: get_interpreter_path(path) for name, path in env_paths.items()}
+    results = probe_interpreters(interpreters.values(), jobs)
+    return {name: results[str(interpreter)] for name, interpreter in interpreters.items()}
+
+
+def report_environments(interpreters: Dict[str, Optional[Dict[str, Any]]]) -> List[str]:
+    """Warn about missing or broken environments.
+    
+    Args:
+        interpreters: The probe results keyed by environment name
+        
+    Returns:
+        The names of the missing environments
+    """
+    missing = []
+    for env_name, info in interpreters.items():
+        if info is None:
+            missing.append(env_name)
+            print(
+                f"⚠️  Environment {env_name} does not exist, "
+                f"create it with `hatch env create {env_name}`",
+                file=sys.stderr,
+            )
+        elif "error" in info:
+            print(f"⚠️  Environment {env_name} is broken: {info['error']}", file=sys.stderr)
+    return missing
+
+
+def update_vscode_config(
+    mappings: Dict[str, str],
+    env_paths: Optional[Dict[str, Path]] = None,
+    root: Optional[Path] = None,
+    interpreters: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+    dependencies: Iterable[str] = (),
+    collector_config: Optional[Dict[str, Any]] = None,
+    fingerprint: Optional[str] = None,
+    env_vars: Optional[Dict[str, Dict[str, str]]] = None,
+    tests: Optional[List[Dict[str, str]]] = None,
+) -> bool:
     """Update VSCode configuration files.
     
+    Concurrent updates of a project, e.g. from environments created in
+    parallel, are serialized with a lock. An update is skipped when another
+    one with the same inputs started after it was called, since that one
+    already saw the environments this one would add.
+    
     Args:
         mappings: Dictionary mapping patterns to environment names
+        env_paths: Directories of the mapped environments and the default
+            environment; resolved through Hatch when not provided
+        root: The project root, defaults to the current directory
+        interpreters: Probed interpreter metadata keyed by environment name,
+            used to locate site-packages
+        dependencies: The normalized names of the project's direct
+            dependencies, which Pylance indexes deeper
+        collector_config: The collector options, controlling which workspace
+            directories are excluded from watching and search
+        fingerprint: A fingerprint of the inputs, stored in python.env.json
+            so that unchanged inputs can be recognized later
+        env_vars: The formatted `env-vars` of the environments from
+            `terminal.get_env_vars`, set in their terminal environments
+        tests: The test roots from `testing.get_test_roots`, which test
+            discovery is restricted to
+            
+    Returns:
+        True if the configuration was updated, False if a concurrent update covered it
     """
-    vscode_dir = Path(".vscode")
+    from .locking import coalesced_update
+    
+    vscode_dir = Path(".vscode") if root is None else Path(root) / ".vscode"
     vscode_dir.mkdir(exist_ok=True)
     
-    hatch_path = get_hatch_env_path()
-    project_name = Path.cwd().name
+    if env_paths is None:
+        env_paths = get_environment_paths(["default", *mappings.values()], root=root)
+    
+    mappings = select_mappings(mappings, env_paths)
+    dependencies = list(dependencies)
+    env_vars = env_vars or {}
+    tests = tests or []
+    
+    inputs = cache_key(
+        mappings, env_paths, interpreters, dependencies, collector_config, env_vars, tests
+    )
+    with coalesced_update(str(vscode_dir.resolve()), inputs) as needed:
+        if needed:
+            generated = generate_vscode_config(
+                Path.cwd() if root is None else Path(root), mappings, env_paths, interpreters,
+                dependencies, collector_config, fingerprint, env_vars, tests,
+            )
+            write_vscode_config(vscode_dir, generated)
+    return needed
+
+
+def update_project_config(
+    root: Optional[Path],
+    summary: Dict[str, Any],
+    env_paths: Optional[Dict[str, Path]] = None,
+    interpreters: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+    fingerprint: Optional[str] = None,
+) -> bool:
+    """Update a project's VSCode configuration from everything its summary provides.
+    
+    Args:
+        root: The project root, defaults to the current directory
+        summary: The project summary from `load_project_summary`
+        env_paths: Directories of the mapped environments and the default
+            environment; resolved through Hatch when not provided
+        interpreters: Probed interpreter metadata keyed by environment name
+        fingerprint: A fingerprint of the inputs, stored in python.env.json
+        
+    Returns:
+        True if the configuration was updated, False if a concurrent update covered it
+    """
+    return update_vscode_config(
+        summary["mappings"], env_paths, root=root, interpreters=interpreters,
+        dependencies=summary["dependencies"], collector_config=summary["collector"],
+        fingerprint=fingerprint, env_vars=summary["env-vars"], tests=summary["tests"],
+    )
+
+
+def select_mappings(mappings: Dict[str, str], env_paths: Dict[str, Path]) -> Dict[str, str]:
+    """Keep the mappings of environments with a known directory.
+    
+    Args:
+        mappings: Dictionary mapping patterns to environment names
+        env_paths: The environment directories, missing e.g. for non-virtual types
+        
+    Returns:
+        The mappings that can be configured
+    """
+    return {pattern: env_name for pattern, env_name in mappings.items() if env_name in env_paths}
+
+
+class GeneratedConfig(NamedTuple):
+    """The generated VSCode configuration of a project.
+    
+    `settings` is the content of settings.json, `env_config` that of
+    python.env.json, and `env_files` the dotenv files keyed by name.
+    """
+    
+    settings: str
+    env_config: Dict[str, Any]
+    env_files: Dict[str, str]
+
+
+def generate_vscode_config(
+    root: Path,
+    mappings: Dict[str, str],
+    env_paths: Dict[str, Path],
+    interpreters: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+    dependencies: Iterable[str] = (),
+    collector_config: Optional[Dict[str, Any]] = None,
+    fingerprint: Optional[str] = None,
+    env_vars: Optional[Dict[str, Dict[str, str]]] = None,
+    tests: Optional[List[Dict[str, str]]] = None,
+) -> GeneratedConfig:
+    """Generate the VSCode configuration of a project without writing it.
+    
+    The existing settings.json and python.env.json are read so that what
+    the user maintains is merged in, nothing is written.
+    
+    Args:
+        root: The project root
+        mappings: Dictionary mapping patterns to environment names, all with
+            a directory in `env_paths`
+        env_paths: Directories of the mapped environments and the default environment
+        interpreters: Probed interpreter metadata keyed by environment name
+        dependencies: The normalized names of the project's direct dependencies
+        collector_config: The collector options
+        fingerprint: A fingerprint of the inputs, stored in python.env.json
+        env_vars: The formatted `env-vars` of the environments
+        tests: The test roots of the project
+        
+    Returns:
+        The content of settings.json, python.env.json and the dotenv files
+        
+    Raises:
+        ValueError: If settings.json isn't valid JSONC, or the options are invalid
+    """
+    from .analysis import (
+        EXCLUDE,
+        EXTRA_PATHS,
+        PACKAGE_INDEX_DEPTHS,
+        PYLANCE_DEFAULT_EXCLUDE,
+        get_analysis_settings,
+        merge_generated,
+    )
+    from .excludes import merge_generated_globs
+    from .terminal import (
+        ACTIVATE_ENVIRONMENT,
+        get_activation_env,
+        get_env_files,
+        get_terminal_env_key,
+        merge_generated_env,
+    )
+    from .testing import TESTING_KEYS, get_testing_settings, merge_testing_settings
+    
+    vscode_dir = Path(root) / ".vscode"
+    env_vars = env_vars or {}
+    # Analysis scope, in mapping order so the output is stable
+    with phase("analysis scope"):
+        analysis = get_analysis_settings(
+            mappings.values(), env_paths, interpreters, list(dependencies)
+        )
+    generated: Dict[str, List[Any]] = {
+        key: analysis[key] for key in (EXCLUDE, PACKAGE_INDEX_DEPTHS)
+    }
+    workspace_excludes = get_workspace_excludes(root, collector_config)
+    
+    # Terminals start with the default environment activated, see `terminal`
+    terminal_enabled = (collector_config or {}).get("terminal", True)
+    terminal_key = get_terminal_env_key()
+    activation: Dict[str, Optional[str]] = {}
+    with phase("terminal env"):
+        if terminal_enabled and "default" in env_paths:
+            activation = get_activation_env(
+                "default", env_paths["default"], env_vars.get("default")
+            )
+        env_files = get_env_files(
+            env_paths, ["default", *mappings.values()] if terminal_enabled else [], env_vars
+        )
     
-    # Update python.env.json with environment interpreters
+    # Test discovery is restricted to the test roots, see `testing`
+    testing: Dict[str, Any] = {}
+    if (collector_config or {}).get("testing", True):
+        testing = get_testing_settings(tests or [], env_paths)
+    
+    # Entries of user-maintained settings generated last time, which may be replaced
     env_file = vscode_dir / "python.env.json"
-    env_config = {
+    try:
+        previous = json.loads(env_file.read_text(encoding="utf-8")).get(GENERATED_KEY, {})
+    except (OSError, ValueError, AttributeError):
+        previous = {}
+    
+    # settings.json is JSONC and often hand-maintained, so only the values
+    # we own are patched and comments and formatting are kept
+    settings_file = vscode_dir / "settings.json"
+    settings_text = ""
+    with phase("read settings.json"):
+        if settings_file.exists():
+            settings_text = settings_file.read_text(encoding="utf-8")
+    
+    settings: Dict[str, Any] = {}
+    if "default" in env_paths:
+        settings["python.defaultInterpreterPath"] = str(get_interpreter_path(env_paths["default"]))
+    settings[EXTRA_PATHS] = analysis[EXTRA_PATHS]
+    
+    try:
+        # Scanned once for both reading and patching, settings files can be large
+        document = jsonc.scan(settings_text)
+    except jsonc.JSONCError as e:
+        raise ValueError(f"Could not update {settings_file}: {e}") from None
+    current = jsonc.get_members(
+        settings_text,
+        [*generated, *workspace_excludes, terminal_key, ACTIVATE_ENVIRONMENT, *TESTING_KEYS],
+        document,
+    )
+    for key, values in generated.items():
+        if key not in current and not values:
+            continue
+        if key == EXCLUDE and key not in current:
+            # Setting the exclusions replaces Pylance's defaults, so they're kept
+            current[key] = PYLANCE_DEFAULT_EXCLUDE
+        settings[key] = merge_generated(current.get(key), previous.get(key, []), values)
+    for key, patterns in workspace_excludes.items():
+        if key not in current and not patterns:
+            continue
+        settings[key], generated[key] = merge_generated_globs(
+            current.get(key), previous.get(key, []), patterns
+        )
+    if terminal_key in current or activation:
+        settings[terminal_key], generated[terminal_key] = merge_generated_env(
+            current.get(terminal_key), previous.get(terminal_key, []), activation
+        )
+    if activation and (ACTIVATE_ENVIRONMENT not in current or ACTIVATE_ENVIRONMENT in previous):
+        settings[ACTIVATE_ENVIRONMENT] = False
+        generated[ACTIVATE_ENVIRONMENT] = [False]
+    elif not activation and ACTIVATE_ENVIRONMENT in previous:
+        # Back to the extension's default, since members can't be removed
+        settings[ACTIVATE_ENVIRONMENT] = True
+    testing_settings, testing_generated = merge_testing_settings(current, previous, testing)
+    settings.update(testing_settings)
+    generated.update(testing_generated)
+    
+    # python.env.json has the environment interpreters and the generated entries
+    env_config: Dict[str, Any] = {
         "python.envInterpreters": {
-            pattern: str(hatch_path / (f"{project_name}_{env_name}" if env_name != "default" else project_name) / "bin" / "python")
+            pattern: str(get_interpreter_path(env_paths[env_name]))
             for pattern, env_name in mappings.items()
-        }
+        },
+        GENERATED_KEY: generated,
     }
+    if fingerprint is not None:
+        env_config[FINGERPRINT_KEY] = fingerprint
+    return GeneratedConfig(jsonc.patch(settings_text, settings, document), env_config, env_files)
+
+
+def write_vscode_config(vscode_dir: Path, generated: GeneratedConfig) -> None:
+    """Write a generated VSCode configuration, leaving unchanged files alone.
     
-    with open(env_file, "w") as f:
-        json.dump(env_config, f, indent=2)
+    python.env.json is written last, so its fingerprint is only stored once
+    everything else is up to date.
     
-    # Update settings.json
-    settings_file = vscode_dir / "settings.json"
-    settings = {}
-    if settings_file.exists():
-        with open(settings_file) as f:
-            settings = json.load(f)
-    
-    # Set default interpreter and analysis paths
-    settings["python.defaultInterpreterPath"] = str(hatch_path / project_name / "bin" / "python")
-    settings["python.analysis.extraPaths"] = [
-        str(hatch_path / (f"{project_name}_{env_name}" if env_name != "default" else project_name))
-        for env_name in set(mappings.values())
-    ]
+    Args:
+        vscode_dir: The `.vscode` directory
+        generated: The configuration from `generate_vscode_config`
+    """
+    from .terminal import write_env_files
     
-    with open(settings_file, "w") as f:
-        json.dump(settings, f, indent=2)
+    vscode_dir.mkdir(exist_ok=True)
+    with phase("write settings.json"):
+        write_if_changed(vscode_dir / "settings.json", generated.settings)
+    write_env_files(vscode_dir, generated.env_files)
+    with phase("write python.env.json"):
+        write_if_changed(vscode_dir / "python.env.json", json.dumps(generated.env_config, indent=2))
 
 
-def main() -> None:
-    """Main entry point."""
-    try:
-        print("Updating VSCode configuration with Hatch environments...")
-        config = read_pyproject_toml()
-        mappings = get_environment_mappings(config)
-        
-        print("\nEnvironment mappings (in order of precedence):")
-        for pattern, env_name in mappings.items():
-            print(f"  {pattern} -> {env_name}")
+def write_if_changed(path: Path, content: str) -> bool:
+    """Write a file unless it already has the given content.
+    
+    Rewriting unchanged files makes VSCode extensions reload and re-index the
+    workspace, so identical content is left alone. Writes are atomic.
+    
+    Args:
+        path: The file to write
+        content: The new file content
         
-        update_vscode_config(mappings)
-        print("\n✨ Updated VSCode configuration")
+    Returns:
+        True if the file was written, False if it was already up to date
+    """
+    data = content.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    
+    atomic_write_text(path, content)
+    return True
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser.
+    
+    Returns:
+        The argument parser
+    """
+    parser = argparse.ArgumentParser(
+        prog="hatch-vsc", description="Update VSCode configuration for Hatch environments."
+    )
+    parser.add_argument(
+        "--timings", nargs="?", const="table", choices=FORMATS,
+        help="Print the time spent in each phase to stderr, as a table (default) or JSON lines",
+    )
+    parser.add_argument(
+        "--profile", metavar="FILE", help="Dump cProfile statistics of the run to FILE"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    update_parser = subparsers.add_parser(
+        "update", help="Update the VSCode configuration once (default)"
+    )
+    update_parser.add_argument(
+        "--create-missing", action="store_true",
+        help="Create missing environments in parallel with `hatch env create`",
+    )
+    update_parser.add_argument(
+        "--no-probe", action="store_true", help="Don't check that the interpreters work"
+    )
+    update_parser.add_argument(
+        "--compile", action="store_true",
+        help="Precompile the bytecode of the mapped directories, like the `compile` option",
+    )
+    update_parser.add_argument(
+        "--jobs", "-j", type=int,
+        help="Number of concurrent probes or creations (default: number of CPUs)",
+    )
+    
+    watch_parser = subparsers.add_parser(
+        "watch", help="Regenerate the VSCode configuration when Hatch configuration or envs change"
+    )
+    watch_parser.add_argument(
+        "--debounce", type=float, default=0.2,
+        help="Seconds to wait for a burst of changes to settle",
+    )
+    watch_parser.add_argument(
+        "--poll", action="store_true", help="Poll for changes instead of using inotify"
+    )
+    
+    monorepo_parser = subparsers.add_parser(
+        "monorepo", help="Update the VSCode configuration for every Hatch project below this one"
+    )
+    monorepo_parser.add_argument(
+        "--workspace", type=Path, metavar="FILE",
+        help="Write a multi-root .code-workspace with per-project settings instead",
+    )
+    monorepo_parser.add_argument(
+        "--jobs", "-j", type=int, help="Number of worker processes (default: number of CPUs)"
+    )
+    
+    subparsers.add_parser(
+        "status", help="Show the outcome of the last background update of this project"
+    )
+    
+    serve_parser = subparsers.add_parser(
+        "serve", help="Answer environment queries from a resident daemon on a Unix socket"
+    )
+    serve_parser.add_argument(
+        "--socket", type=Path, metavar="PATH",
+        help="Where to listen (default: serve.sock in the cache directory)",
+    )
+    serve_parser.add_argument(
+        "--idle-timeout", type=float, default=600.0,
+        help="Seconds without clients after which the daemon exits",
+    )
+    
+    gc_parser = subparsers.add_parser(
+        "gc", help="Report environments left behind by removed or renamed environments"
+    )
+    gc_parser.add_argument("--delete", action="store_true", help="Delete them")
+    gc_parser.add_argument(
+        "--jobs", "-j", type=int,
+        help="Number of threads computing disk usage (default: 4 per CPU, up to 32)",
+    )
+    
+    which_parser = subparsers.add_parser(
+        "which", help="Print the Hatch environment owning each path (read from stdin if none)"
+    )
+    which_parser.add_argument("paths", nargs="*", help="Paths to resolve")
+    which_parser.add_argument(
+        "--line-buffered", action="store_true",
+        help="Flush every answer immediately, for use as a co-process",
+    )
+    return parser
+
+
+def run_which(paths: List[str], line_buffered: bool = False) -> None:
+    """Print the environment owning each path as `<path>\t<env>`.
+    
+    Paths without an environment get an empty environment column. When no
+    paths are given they are streamed from stdin, one per line.
+    
+    Args:
+        paths: Paths to resolve
+        line_buffered: Flush every answer immediately
+    """
+    from .resolver import EnvironmentResolver
+    
+    resolver = EnvironmentResolver(load_project_mappings())
+    if paths:
+        lines: Iterable[str] = paths
+    else:
+        lines = (line.rstrip("\r\n") for line in sys.stdin)
+        line_buffered = line_buffered or sys.stdin.isatty()
+    
+    write = sys.stdout.write
+    for path, env_name in resolver.resolve_many(line for line in lines if line):
+        write(f"{path}\t{env_name or ''}\n")
+        if line_buffered:
+            sys.stdout.flush()
+    sys.stdout.flush()
+
+
+def run_gc(delete: bool = False, jobs: Optional[int] = None) -> None:
+    """Report the orphaned environments of the project, largest first, and optionally delete them.
+    
+    Args:
+        delete: Delete the orphaned environments
+        jobs: Number of threads computing disk usage
+    """
+    from .orphans import find_orphaned_envs, format_size, get_disk_usage, remove_envs
+    
+    orphans = find_orphaned_envs()
+    if not orphans:
+        print("No orphaned environments")
+        return
+    with phase("disk usage"):
+        sizes = get_disk_usage([orphan.path for orphan in orphans], jobs)
+    orphans.sort(key=lambda orphan: sizes[orphan.path], reverse=True)
+    for orphan in orphans:
+        print(f"{format_size(sizes[orphan.path]):>10}  {orphan.path}  ({orphan.reason})")
+    
+    if not delete:
+        print(
+            f"\n{format_size(sum(sizes.values()))} in {len(orphans)} orphaned environments, "
+            "remove them with `hatch-vsc gc --delete`"
+        )
+        return
+    with phase("delete"):
+        errors = remove_envs(orphan.path for orphan in orphans)
+    for path, error in errors.items():
+        print(f"⚠️  Could not delete {path}: {error}", file=sys.stderr)
+    freed = sum(size for path, size in sizes.items() if path not in errors)
+    print(f"\n✨ Deleted {len(orphans) - len(errors)} orphaned environments, {format_size(freed)}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Main entry point.
+    
+    Timings and profiling can also be enabled with the `HATCH_VSC_TIMINGS`
+    and `HATCH_VSC_PROFILE` environment variables.
+    
+    Args:
+        argv: Command line arguments, defaults to sys.argv
+    """
+    args = build_parser().parse_args(argv)
+    env_timings, env_profile = get_timings_options()
+    try:
+        with record_timings(args.timings or env_timings, args.profile or env_profile):
+            run_command(args)
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
         print(f"⚠️  Error: {e}", file=sys.stderr)
         sys.exit(1)
 
 
+def report_test_discovery(
+    root: Path, tests: List[Dict[str, str]], collector_config: Optional[Dict[str, Any]] = None
+) -> None:
+    """Print the test roots discovery is restricted to, with an estimate of its duration.
+    
+    Args:
+        root: The project root
+        tests: The test roots from `testing.get_test_roots`
+        collector_config: The collector options
+    """
+    from .testing import estimate_discovery
+    
+    if not tests or not (collector_config or {}).get("testing", True):
+        return
+    
+    print("\nTest discovery:")
+    total = 0.0
+    with phase("test discovery estimate"):
+        estimates = estimate_discovery(root, tests)
+    for test, (test_root, count, seconds) in zip(tests, estimates):
+        print(f"  {test_root} ({test['framework']}, {test['env']}): {count} test files")
+        total += seconds
+    print(f"  Estimated discovery time: {total:.1f}s")
+
+
+def run_command(args: argparse.Namespace) -> None:
+    """Run the command selected on the command line.
+    
+    Args:
+        args: The parsed command line arguments
+    """
+    if args.command == "watch":
+        from .watch import watch
+        
+        print("Watching Hatch configuration and environments, press Ctrl+C to stop...")
+        watch(Path.cwd(), debounce=args.debounce, force_polling=args.poll)
+        return
+    
+    if args.command == "serve":
+        from .server import serve
+        
+        serve(args.socket, args.idle_timeout)
+        return
+    
+    if args.command == "gc":
+        run_gc(args.delete, args.jobs)
+        return
+    
+    if args.command == "which":
+        run_which(args.paths, args.line_buffered)
+        return
+    
+    if args.command == "status":
+        from .background import format_status, read_status
+        
+        status = read_status(Path.cwd())
+        print(format_status(status))
+        if status.get("state") == "failed":
+            sys.exit(1)
+        return
+    
+    if args.command == "monorepo":
+        from .monorepo import update_monorepo
+        
+        print("Updating VSCode configuration for all Hatch projects...")
+        projects = update_monorepo(Path.cwd(), args.workspace, args.jobs)
+        for project in projects:
+            if "error" in project:
+                print(f"⚠️  {project['root']}: {project['error']}", file=sys.stderr)
+        print(f"\n✨ Updated VSCode configuration for {len(projects)} projects")
+        return
+    
+    print("Updating VSCode configuration with Hatch environments...")
+    with phase("config"):
+        summary = load_project_summary()
+    mappings = summary["mappings"]
+    
+    print("\nEnvironment mappings (in order of precedence):")
+    for pattern, env_name in mappings.items():
+        print(f"  {pattern} -> {env_name}")
+    
+    with phase("env path resolution"):
+        env_paths = get_environment_paths(["default", *mappings.values()])
+    
+    interpreters = None
+    if not getattr(args, "no_probe", False):
+        jobs = getattr(args, "jobs", None)
+        with phase("probe"):
+            interpreters = probe_environments(env_paths, jobs)
+        missing = [name for name, info in interpreters.items() if info is None]
+        if missing and getattr(args, "create_missing", False):
+            from .probe import create_environments
+            
+            print(f"\nCreating {len(missing)} missing environments...")
+            with phase("create"):
+                for env_name, error in create_environments(missing, jobs=jobs).items():
+                    print(f"⚠️  Could not create {env_name}: {error}", file=sys.stderr)
+            with phase("probe"):
+                interpreters = probe_environments(env_paths, jobs)
+        report_environments(interpreters)
+    
+    with phase("update"):
+        update_project_config(None, summary, env_paths, interpreters)
+    report_test_discovery(Path.cwd(), summary["tests"], summary["collector"])
+    
+    from .precompile import compile_enabled, compile_project
+    
+    if getattr(args, "compile", False) or compile_enabled(summary["collector"]):
+        print("\nPrecompiling environments...")
+        with phase("compile"):
+            errors = compile_project(
+                Path.cwd(), mappings, env_paths, summary["collector"], interpreters
+            )
+        for env_name, error in errors.items():
+            print(f"⚠️  Could not compile {env_name}: {error}", file=sys.stderr)
+    print("\n✨ Updated VSCode configuration")
+
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,349 @@
+"""Watch mode regenerating VSCode configuration when its inputs change."""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from .update_vscode_env import get_hatch_env_path, load_project_summary, update_project_config
+
+CONFIG = "config"
+ENVS = "envs"
+_ENVS_PARENT = "envs-parent"
+CONFIG_FILES = ("pyproject.toml", "hatch.toml")
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_IGNORED = 0x00008000
+_EVENT_HEADER = struct.Struct("iIII")
+
+_CONFIG_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_CREATE | _IN_DELETE
+_ENVS_MASK = (
+    _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+_ENVS_PARENT_MASK = _IN_CREATE | _IN_MOVED_TO
+
+
+class PollingWatcher:
+    """Detect changes by periodically comparing file fingerprints."""
+
+    def __init__(self, root: Path, env_path: Optional[Path], interval: float = 0.5):
+        """Initialize the watcher.
+
+        Args:
+            root: The project root containing the Hatch configuration files
+            env_path: The Hatch environment storage directory, if known
+            interval: Seconds between two polls
+        """
+        self.root = Path(root)
+        self.env_path = env_path
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def set_env_path(self, env_path: Optional[Path]) -> None:
+        """Change the watched environment storage directory."""
+        if env_path != self.env_path:
+            self.env_path = env_path
+            self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Dict[str, tuple]:
+        """Get the current signatures of all watched paths."""
+        snapshot = {}
+        for name in CONFIG_FILES:
+            snapshot[name] = _stat_signature(self.root / name)
+        if self.env_path is not None:
+            snapshot[ENVS] = _stat_signature(self.env_path)
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Wait for changes.
+
+        Args:
+            timeout: Maximum number of seconds to wait, None to wait forever
+
+        Returns:
+            The changed inputs (`config` and/or `envs`), empty on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._take_snapshot()
+            changes = {
+                ENVS if key == ENVS else CONFIG
+                for key, signature in snapshot.items()
+                if self._snapshot.get(key) != signature
+            }
+            self._snapshot = snapshot
+            if changes:
+                return changes
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+    def close(self) -> None:
+        """Release resources held by the watcher."""
+
+
+class InotifyWatcher:
+    """Detect changes through Linux inotify, idling without CPU usage."""
+
+    def __init__(self, root: Path, env_path: Optional[Path]):
+        """Initialize the watcher.
+
+        Args:
+            root: The project root containing the Hatch configuration files
+            env_path: The Hatch environment storage directory, if known
+
+        Raises:
+            OSError: If inotify is unavailable
+        """
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        self.root = Path(root)
+        self.env_path = None
+        self._watches: Dict[int, str] = {}
+        self._env_wd: Optional[int] = None
+        self._env_watches_parent = False
+        self._add_watch(self.root, CONFIG, _CONFIG_MASK)
+        self.set_env_path(env_path)
+
+    def _add_watch(self, path: Path, kind: str, mask: int) -> Optional[int]:
+        """Watch a directory, returning its watch descriptor."""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            if kind == CONFIG:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno), str(path))
+            return None
+        self._watches[wd] = kind
+        return wd
+
+    def set_env_path(self, env_path: Optional[Path]) -> None:
+        """Change the watched environment storage directory.
+
+        Until the directory exists, e.g. before the first `hatch env create`,
+        its nearest existing parent is watched so that its creation is seen.
+        """
+        if self._env_wd is not None and not self._env_watches_parent and env_path == self.env_path:
+            return
+        self._remove_env_watch()
+
+        self.env_path = env_path
+        if env_path is None:
+            return
+
+        self._env_wd = self._add_watch(env_path, ENVS, _ENVS_MASK)
+        self._env_watches_parent = False
+        for parent in Path(env_path).parents:
+            if self._env_wd is not None:
+                break
+            self._env_wd = self._add_watch(parent, _ENVS_PARENT, _ENVS_PARENT_MASK)
+            self._env_watches_parent = True
+
+    def _remove_env_watch(self) -> None:
+        """Stop watching the environment storage directory or its parent."""
+        if self._env_wd is not None:
+            self._libc.inotify_rm_watch(self._fd, self._env_wd)
+            self._watches.pop(self._env_wd, None)
+            self._env_wd = None
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Wait for changes.
+
+        Args:
+            timeout: Maximum number of seconds to wait, None to wait forever
+
+        Returns:
+            The changed inputs (`config` and/or `envs`), empty on timeout
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changes = set()
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return changes
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+
+            kind = self._watches.get(wd)
+            if kind == CONFIG and name in CONFIG_FILES:
+                changes.add(CONFIG)
+            elif kind == ENVS:
+                changes.add(ENVS)
+                if mask & (_IN_IGNORED | _IN_DELETE_SELF | _IN_MOVE_SELF):
+                    self._watches.pop(wd, None)
+                    self._env_wd = None
+                    self.set_env_path(self.env_path)
+            elif kind == _ENVS_PARENT:
+                # Something appeared on the way to the storage directory, move closer to it
+                self.set_env_path(self.env_path)
+                if not self._env_watches_parent:
+                    changes.add(ENVS)
+        return changes
+
+    def close(self) -> None:
+        """Release resources held by the watcher."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _stat_signature(path: Path) -> tuple:
+    """Get a signature of a path that changes whenever it is modified."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ()
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def create_watcher(
+    root: Path, env_path: Optional[Path], force_polling: bool = False, interval: float = 0.5
+):
+    """Create the most efficient watcher available on this platform.
+
+    Args:
+        root: The project root
+        env_path: The Hatch environment storage directory, if known
+        force_polling: Use the polling watcher even if inotify is available
+        interval: Seconds between two polls of the polling watcher
+
+    Returns:
+        An inotify watcher on Linux, a polling watcher otherwise
+    """
+    if not force_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, env_path)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, env_path, interval)
+
+
+class ConfigWatcher:
+    """Keep VSCode configuration in sync with Hatch configuration and environments."""
+
+    def __init__(
+        self,
+        root: Path,
+        debounce: float = 0.2,
+        force_polling: bool = False,
+        interval: float = 0.5,
+    ):
+        """Initialize the watcher.
+
+        Args:
+            root: The project root
+            debounce: Seconds without events before a burst of changes is processed
+            force_polling: Use the polling watcher even if inotify is available
+            interval: Seconds between two polls of the polling watcher
+        """
+        self.root = Path(root)
+        self.debounce = debounce
+        self.force_polling = force_polling
+        self.interval = interval
+        self.summary: Optional[Dict[str, Any]] = None
+        self.env_path: Optional[Path] = None
+
+    def refresh(self, changes: Set[str]) -> bool:
+        """Re-run the pipeline stages affected by the given changes.
+
+        Args:
+            changes: The changed inputs (`config` and/or `envs`)
+
+        Returns:
+            True if the VSCode configuration was regenerated
+        """
+        config_changed = CONFIG in changes or self.summary is None
+        if config_changed:
+            summary = load_project_summary(self.root)
+            if summary == self.summary and ENVS not in changes:
+                return False
+            self.summary = summary
+
+        self.env_path = get_hatch_env_path(self.root, self.summary)
+        update_project_config(self.root, self.summary)
+        return True
+
+    def collect_changes(self, watcher, timeout: Optional[float]) -> Set[str]:
+        """Wait for a burst of changes and merge it.
+
+        Args:
+            watcher: The file watcher
+            timeout: Maximum number of seconds to wait for the first change
+
+        Returns:
+            All inputs changed during the burst
+        """
+        changes = watcher.wait(timeout)
+        if not changes:
+            return changes
+
+        while True:
+            more = watcher.wait(self.debounce)
+            if not more:
+                return changes
+            changes |= more
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """Watch until interrupted or until `stop` is set.
+
+        Args:
+            stop: An event ending the loop when set
+        """
+        # The watcher starts first so that edits made during the initial run are not lost
+        watcher = create_watcher(self.root, None, self.force_polling, self.interval)
+        try:
+            self._refresh_and_report({CONFIG, ENVS})
+            watcher.set_env_path(self.env_path)
+            while stop is None or not stop.is_set():
+                # A finite timeout lets the loop notice `stop` without busy waiting
+                changes = self.collect_changes(watcher, 1.0 if stop is not None else None)
+                if changes:
+                    self._refresh_and_report(changes)
+                    watcher.set_env_path(self.env_path)
+        finally:
+            watcher.close()
+
+    def _refresh_and_report(self, changes: Set[str]) -> None:
+        """Refresh, reporting errors without leaving the watch loop."""
+        try:
+            if self.refresh(changes):
+                print(f"✨ Updated VSCode configuration ({', '.join(sorted(changes))} changed)")
+        except Exception as e:
+            print(f"⚠️  Error: {e}", file=sys.stderr)
+
+
+def watch(root: Path, debounce: float = 0.2, force_polling: bool = False) -> None:
+    """Regenerate VSCode configuration whenever Hatch configuration or environments change.
+
+    Args:
+        root: The project root
+        debounce: Seconds without events before a burst of changes is processed
+        force_polling: Use the polling watcher even if inotify is available
+    """
+    ConfigWatcher(root, debounce, force_polling).run()
+
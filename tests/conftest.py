@@ -37,4 +37,22 @@ def mock_pyproject_toml(temp_project_dir):
     pyproject_file = temp_project_dir / "pyproject.toml"
     with open(pyproject_file, "w") as f:
         json.dump(content, f)
-    return pyproject_file 
\ No newline at end of file
+    return pyproject_file
+
+
+@pytest.fixture
+def hatch_dirs(tmp_path, monkeypatch):
+    """Point Hatch's data directory and configuration file into a temporary directory."""
+    monkeypatch.setenv("HATCH_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("HATCH_CONFIG", str(tmp_path / "config.toml"))
+    monkeypatch.delenv("HATCH_ENV_TYPE_VIRTUAL_PATH", raising=False)
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep the persistent cache inside the test's temporary directory."""
+    cache_dir = tmp_path / "hatch-vsc-cache"
+    monkeypatch.setenv("HATCH_VSC_CACHE_DIR", str(cache_dir))
+    monkeypatch.delenv("HATCH_VSC_NO_CACHE", raising=False)
+    return cache_dir
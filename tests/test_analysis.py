@@ -0,0 +1,131 @@
+"""Tests for the Pylance analysis scope."""
+import json
+
+from hatch_vsc.analysis import (
+    EXCLUDE,
+    EXTRA_PATHS,
+    PACKAGE_INDEX_DEPTHS,
+    find_site_packages,
+    get_analysis_settings,
+    get_direct_dependencies,
+    merge_generated,
+    scan_distributions,
+)
+from hatch_vsc.update_vscode_env import GENERATED_KEY, update_vscode_config
+
+
+def install(site_packages, name, version, top_level=None):
+    """Install a fake distribution into a site-packages directory."""
+    top_level = top_level or [name]
+    dist_info = site_packages / f"{name}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "top_level.txt").write_text("\n".join(top_level) + "\n")
+    for package in top_level:
+        (site_packages / package).mkdir(exist_ok=True)
+
+
+def make_env(tmp_path, name):
+    """Create an environment directory with an empty site-packages."""
+    env_path = tmp_path / name
+    site_packages = env_path / "lib" / "python3.12" / "site-packages"
+    site_packages.mkdir(parents=True)
+    return env_path, site_packages
+
+
+def test_get_direct_dependencies():
+    """Test project, optional and environment dependencies are collected and normalized."""
+    config = {
+        "project": {
+            "dependencies": ["Requests>=2", "typing_extensions; python_version < '3.10'"],
+            "optional-dependencies": {"yaml": ["PyYAML"]},
+        },
+        "tool": {"hatch": {"envs": {
+            "test": {"dependencies": ["pytest"], "extra-dependencies": ["pytest-cov[toml]"]},
+        }}},
+    }
+    assert get_direct_dependencies(config) == [
+        "pytest", "pytest-cov", "pyyaml", "requests", "typing-extensions"
+    ]
+    assert get_direct_dependencies({}) == []
+
+
+def test_find_site_packages(tmp_path):
+    """Test site-packages come from the probe, or are found in the environment."""
+    env_path, site_packages = make_env(tmp_path, "default")
+    assert find_site_packages(env_path) == [site_packages]
+    assert find_site_packages(env_path, {"site_packages": [str(tmp_path / "gone")]}) == []
+    assert find_site_packages(tmp_path / "missing") == []
+
+
+def test_scan_distributions(tmp_path):
+    """Test distributions are read from their dist-info directories."""
+    _, site_packages = make_env(tmp_path, "default")
+    install(site_packages, "PyYAML", "6.0.1", ["_yaml", "yaml"])
+    (site_packages / "six-1.16.0.dist-info").mkdir()
+
+    distributions = sorted(scan_distributions(site_packages))
+    assert [(d.name, d.version, d.top_level) for d in distributions] == [
+        ("PyYAML", "6.0.1", ["_yaml", "yaml"]),
+        ("six", "1.16.0", ["six"]),
+    ]
+    assert scan_distributions(tmp_path / "missing") == []
+
+
+def test_get_analysis_settings(tmp_path):
+    """Test duplicate packages are excluded and direct dependencies indexed deeper."""
+    default_path, default_site = make_env(tmp_path, "default")
+    test_path, test_site = make_env(tmp_path, "test")
+    install(default_site, "requests", "2.31.0")
+    install(test_site, "requests", "2.31.0")
+    install(test_site, "pytest", "8.0.0", ["_pytest", "pytest"])
+    install(test_site, "attrs", "23.1.0", ["attr"])
+    install(default_site, "attrs", "22.2.0", ["attr"])
+
+    settings = get_analysis_settings(
+        ["default", "test", "default"],
+        {"default": default_path, "test": test_path},
+        dependencies=["pytest", "requests"],
+    )
+    assert settings[EXTRA_PATHS] == [str(default_site), str(test_site)]
+    # Only the identical copy is excluded, attrs differs between the environments
+    assert settings[EXCLUDE] == [str(test_site / "requests")]
+    assert sorted(settings[PACKAGE_INDEX_DEPTHS], key=lambda entry: entry["name"]) == [
+        {"name": "pytest", "depth": 2},
+        {"name": "requests", "depth": 2},
+    ]
+
+
+def test_merge_generated():
+    """Test user entries are kept and stale generated entries dropped."""
+    assert merge_generated(None, [], ["a"]) == ["a"]
+    assert merge_generated(["user", "old"], ["old"], ["new", "user"]) == ["user", "new"]
+
+
+def test_update_vscode_config_keeps_user_excludes(temp_project_dir, monkeypatch):
+    """Test regenerating the analysis scope only replaces generated entries."""
+    monkeypatch.chdir(temp_project_dir)
+    default_path, default_site = make_env(temp_project_dir, "default")
+    test_path, test_site = make_env(temp_project_dir, "test")
+    install(default_site, "requests", "2.31.0")
+    install(test_site, "requests", "2.31.0")
+    env_paths = {"default": default_path, "test": test_path}
+    mappings = {"src/**/*": "default", "tests/**/*": "test"}
+    settings_file = temp_project_dir / ".vscode" / "settings.json"
+
+    update_vscode_config(mappings, env_paths, dependencies=["requests"])
+    settings = json.loads(settings_file.read_text())
+    assert settings[EXCLUDE] == [
+        "**/node_modules", "**/__pycache__", "**/.git", str(test_site / "requests")
+    ]
+    assert settings[PACKAGE_INDEX_DEPTHS] == [{"name": "requests", "depth": 2}]
+
+    settings[EXCLUDE].append("build")
+    settings_file.write_text(json.dumps(settings))
+    (test_site / "requests-2.31.0.dist-info" / "top_level.txt").unlink()
+    (test_site / "requests-2.31.0.dist-info").rename(test_site / "requests-2.32.0.dist-info")
+
+    update_vscode_config(mappings, env_paths, dependencies=["requests"])
+    settings = json.loads(settings_file.read_text())
+    assert settings[EXCLUDE] == ["**/node_modules", "**/__pycache__", "**/.git", "build"]
+    env_file = json.loads((temp_project_dir / ".vscode" / "python.env.json").read_text())
+    assert env_file[GENERATED_KEY][EXCLUDE] == []
@@ -0,0 +1,95 @@
+"""Tests for the root-parameterized library API."""
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hatch_vsc.api import generate_config, get_project, update_config
+from hatch_vsc.locations import get_project_id
+from hatch_vsc.timing import phase, record_timings
+from hatch_vsc.update_vscode_env import get_interpreter_path
+
+
+@pytest.fixture
+def projects(tmp_path, hatch_dirs):
+    """Create projects mapping tests to a test environment, under a temporary data directory."""
+    roots = []
+    for i in range(16):
+        root = tmp_path / "projects" / f"project{i}"
+        root.mkdir(parents=True)
+        (root / "pyproject.toml").write_text(
+            f'[project]\nname = "project{i}"\n\n[tool.hatch.envs.test]\nvsc-mapping = "tests"\n'
+        )
+        roots.append(root.resolve())
+    return roots
+
+
+def expected_interpreter(tmp_path, root, env_name):
+    """Get where Hatch would put an environment's interpreter."""
+    storage = tmp_path / "data" / "env" / "virtual" / root.name / get_project_id(root)
+    return str(get_interpreter_path(storage / env_name))
+
+
+def test_generate_config_concurrently(projects, tmp_path, monkeypatch):
+    """Test projects are generated from threads, from another directory, without writing."""
+    monkeypatch.chdir(tmp_path)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(generate_config, projects))
+
+    assert os.getcwd() == str(tmp_path)
+    for root, generated in zip(projects, results):
+        assert generated.env_config["python.envInterpreters"] == {
+            "src/**/*": expected_interpreter(tmp_path, root, root.name),
+            "tests/**/*": expected_interpreter(tmp_path, root, "test"),
+        }
+        assert sorted(generated.env_files) == ["default.env", "test.env"]
+        assert not (root / ".vscode").exists()
+
+
+def test_update_config_concurrently(projects, tmp_path):
+    """Test concurrent updates of the same and of different projects."""
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(update_config, projects + projects))
+
+    for root in projects:
+        settings = json.loads((root / ".vscode" / "settings.json").read_text())
+        assert settings["python.defaultInterpreterPath"] == (
+            expected_interpreter(tmp_path, root, root.name)
+        )
+
+
+def test_project_context_reloads(projects):
+    """Test contexts are shared per project, and see configuration changes."""
+    root = projects[0]
+    project = get_project(root / "tests" / "..")
+    assert project is get_project(root)
+    assert "tests/**/*" in project.mappings()
+
+    (root / "pyproject.toml").write_text('[project]\nname = "project0"\n')
+    assert "tests/**/*" not in project.mappings()
+
+
+def test_timings_per_thread():
+    """Test phases are only recorded by the thread recording timings."""
+    recording = threading.Event()
+    done = threading.Event()
+
+    def other_thread():
+        recording.wait()
+        with phase("other"):
+            pass
+        done.set()
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    with record_timings("json", stream=io.StringIO()) as timings:
+        recording.set()
+        done.wait()
+        with phase("own"):
+            pass
+    thread.join()
+
+    assert [name for name, _, _ in timings.records] == ["own"]
@@ -0,0 +1,138 @@
+"""Tests for background updates."""
+import os
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+from hatch.utils.fs import Path as HatchPath
+
+from hatch_vsc import background
+from hatch_vsc.background import (
+    background_enabled,
+    format_status,
+    is_process_alive,
+    read_status,
+    run_worker,
+    submit_update,
+)
+from hatch_vsc.plugin import VSCodeEnvironmentCollector
+from hatch_vsc.update_vscode_env import main
+
+
+def test_background_enabled(monkeypatch):
+    """Test the mode is enabled by the collector option, or the environment."""
+    monkeypatch.delenv("HATCH_VSC_BACKGROUND", raising=False)
+    assert not background_enabled({})
+    assert background_enabled({"background": True})
+
+    monkeypatch.setenv("HATCH_VSC_BACKGROUND", "0")
+    assert not background_enabled({"background": True})
+    monkeypatch.setenv("HATCH_VSC_BACKGROUND", "yes")
+    assert background_enabled(None)
+
+
+def test_is_process_alive():
+    """Test running processes are recognized."""
+    assert is_process_alive(os.getpid())
+    assert not is_process_alive(None)
+    assert not is_process_alive(-1)
+
+
+def test_submit_update_deduplicates(temp_project_dir):
+    """Test a submission while a worker runs queues another run instead of a worker."""
+    with patch.object(background, "_spawn_worker", return_value=os.getpid()) as mock_spawn:
+        assert submit_update(temp_project_dir, "first") is True
+        assert submit_update(temp_project_dir, "second") is False
+    mock_spawn.assert_called_once_with(temp_project_dir, "first")
+
+    status = read_status(temp_project_dir)
+    assert status["state"] == "running"
+    assert status["pending"] is True
+    assert status["fingerprint"] == "second"
+
+
+def test_submit_update_after_crash(temp_project_dir):
+    """Test a worker that died without finishing doesn't block new ones."""
+    with patch.object(background, "_spawn_worker", return_value=os.getpid()):
+        submit_update(temp_project_dir)
+    with patch.object(background, "is_process_alive", return_value=False), \
+         patch.object(background, "_spawn_worker", return_value=1) as mock_spawn:
+        assert submit_update(temp_project_dir) is True
+    mock_spawn.assert_called_once()
+
+
+def test_run_worker_pending(temp_project_dir):
+    """Test the worker updates again when asked to while running."""
+    fingerprints = []
+
+    def update_project(root, fingerprint):
+        fingerprints.append(fingerprint)
+        if len(fingerprints) == 1:
+            with patch.object(background, "_spawn_worker", return_value=os.getpid()):
+                submit_update(root, "second")
+
+    with patch.object(background, "update_project", side_effect=update_project):
+        assert run_worker(temp_project_dir, "first") is True
+
+    assert fingerprints == ["first", "second"]
+    status = read_status(temp_project_dir)
+    assert status["state"] == "succeeded"
+    assert status["error"] is None
+
+
+def test_run_worker_failure(temp_project_dir, monkeypatch, capsys):
+    """Test failures are recorded and reported by the status command."""
+    with patch.object(background, "update_project", side_effect=RuntimeError("no hatch")):
+        assert run_worker(temp_project_dir) is False
+
+    status = read_status(temp_project_dir)
+    assert status["state"] == "failed"
+    assert "RuntimeError: no hatch" in status["error"]
+
+    monkeypatch.chdir(temp_project_dir)
+    with pytest.raises(SystemExit):
+        main(["status"])
+    output = capsys.readouterr().out
+    assert "Background update: failed" in output
+    assert "    RuntimeError: no hatch" in output
+
+
+def test_format_status_interrupted():
+    """Test workers that died while running are reported as interrupted."""
+    assert format_status({}) == "No background update has run for this project"
+    status = {"state": "running", "pid": -1, "submitted": 0, "pending": True}
+    assert format_status(status).startswith("Background update: interrupted")
+
+
+def test_update_project(temp_project_dir):
+    """Test the worker's update runs the command line pipeline with the fingerprint."""
+    (temp_project_dir / "pyproject.toml").write_text(
+        '[tool.hatch.envs.test]\nvsc-mapping = "tests"\n'
+    )
+    with patch("hatch_vsc.update_vscode_env.get_environment_paths",
+               return_value={"default": Path("/envs/default"), "test": Path("/envs/test")}), \
+         patch("hatch_vsc.update_vscode_env.update_vscode_config") as mock_update:
+        background.update_project(temp_project_dir, "fingerprint")
+
+    args, kwargs = mock_update.call_args
+    assert args[0] == {"src/**/*": "default", "tests/**/*": "test"}
+    assert kwargs["fingerprint"] == "fingerprint"
+
+
+def test_collector_background(tmp_path, monkeypatch):
+    """Test the collector only submits the update in background mode."""
+    monkeypatch.delenv("HATCH_VSC_BACKGROUND", raising=False)
+    collector = VSCodeEnvironmentCollector(root=tmp_path, config={"background": True})
+    app = Mock()
+    app.project.config.config = {"envs": {}}
+    app.project.location = HatchPath(tmp_path)
+    app.get_env_directory.return_value = tmp_path / "envs"
+
+    with patch.object(background, "submit_update") as mock_submit, \
+         patch("hatch_vsc.update_vscode_env.update_vscode_config") as mock_update:
+        collector.collect(app)
+        collector.collect(app)
+
+    mock_submit.assert_called_once()
+    assert mock_submit.call_args.args[0] == tmp_path
+    mock_update.assert_not_called()
@@ -0,0 +1,128 @@
+"""Tests for the persistent cache."""
+import os
+from unittest.mock import patch
+
+from hatch_vsc.cache import (
+    atomic_write_text,
+    cache_key,
+    file_fingerprint,
+    get_cache_dir,
+    load_cache,
+    save_cache,
+)
+from hatch_vsc.update_vscode_env import load_project_config
+
+PYPROJECT = """\
+[build-system]
+build-backend = "hatchling.build"
+
+[project]
+name = "sample"
+
+[tool.hatch.envs.test]
+vsc-mapping = "tests"
+"""
+
+
+def test_get_cache_dir_override(isolated_cache):
+    """Test the cache directory honours the override variable."""
+    assert get_cache_dir() == isolated_cache
+
+
+def test_get_cache_dir_hatch_cache(monkeypatch, tmp_path):
+    """Test the cache directory lives under the Hatch cache directory."""
+    monkeypatch.delenv("HATCH_VSC_CACHE_DIR")
+    monkeypatch.setenv("HATCH_CACHE_DIR", str(tmp_path))
+    assert get_cache_dir() == tmp_path / "hatch-vsc"
+
+
+def test_save_and_load_cache():
+    """Test cache entries round-trip."""
+    save_cache("sample", {"a": 1})
+    assert load_cache("sample") == {"a": 1}
+
+
+def test_load_cache_corrupt(isolated_cache):
+    """Test a corrupt cache file is treated as empty."""
+    isolated_cache.mkdir()
+    (isolated_cache / "sample.json").write_text("{not json")
+    assert load_cache("sample") == {}
+
+
+def test_cache_disabled(monkeypatch, isolated_cache):
+    """Test caching can be disabled."""
+    monkeypatch.setenv("HATCH_VSC_NO_CACHE", "1")
+    save_cache("sample", {"a": 1})
+    assert not isolated_cache.exists()
+    assert load_cache("sample") == {}
+
+
+def test_cache_key_stable():
+    """Test cache keys are stable and sensitive to their parts."""
+    assert cache_key("a", [1, 2]) == cache_key("a", [1, 2])
+    assert cache_key("a", [1, 2]) != cache_key("a", [2, 1])
+
+
+def test_file_fingerprint(tmp_path):
+    """Test file fingerprints track size and mtime."""
+    path = tmp_path / "file"
+    assert file_fingerprint(path) is None
+    path.write_text("abc")
+    size, mtime_ns = file_fingerprint(path)
+    assert size == 3
+    assert mtime_ns == os.stat(path).st_mtime_ns
+
+
+def test_atomic_write_text(tmp_path):
+    """Test atomic writes replace the file and leave no temporary files."""
+    path = tmp_path / "settings.json"
+    path.write_text("old")
+    atomic_write_text(path, "new")
+    assert path.read_text() == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["settings.json"]
+
+
+def test_load_project_config_cached(tmp_path):
+    """Test unchanged projects are neither parsed nor mapped again."""
+    (tmp_path / "pyproject.toml").write_text(PYPROJECT)
+    config, mappings = load_project_config(tmp_path)
+    assert config == {
+        "tool": {"hatch": {"envs": {"test": {"vsc-mapping": "tests"}}}},
+        "build-system": {"build-backend": "hatchling.build"},
+    }
+    assert mappings == {"src/**/*": "default", "tests/**/*": "test"}
+
+    # Freshly written files are verified by content hash
+    with patch("hatch_vsc.update_vscode_env.read_pyproject_toml") as mock_read:
+        assert load_project_config(tmp_path) == (config, mappings)
+        mock_read.assert_not_called()
+
+
+def test_load_project_config_stat_only(tmp_path):
+    """Test files older than the cache entry are validated with stat() alone."""
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(PYPROJECT)
+    os.utime(pyproject, (1_000_000_000, 1_000_000_000))
+    expected = load_project_config(tmp_path)
+
+    with patch("hatch_vsc.update_vscode_env.file_digest") as mock_digest, \
+         patch("hatch_vsc.update_vscode_env.read_pyproject_toml") as mock_read:
+        assert load_project_config(tmp_path) == expected
+        mock_digest.assert_not_called()
+        mock_read.assert_not_called()
+
+
+def test_load_project_config_invalidated(tmp_path):
+    """Test edits to pyproject.toml or hatch.toml are picked up."""
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(PYPROJECT)
+    load_project_config(tmp_path)
+
+    # Same size and mtime, different content
+    stat = os.stat(pyproject)
+    pyproject.write_text(PYPROJECT.replace('"tests"', '"specs"'))
+    os.utime(pyproject, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_project_config(tmp_path)[1]["specs/**/*"] == "test"
+
+    (tmp_path / "hatch.toml").write_text('[envs.docs]\nvsc-mapping = "docs"\n')
+    assert load_project_config(tmp_path)[1]["docs/**/*"] == "docs"
@@ -0,0 +1,146 @@
+"""Tests for workspace exclusions."""
+import json
+from unittest.mock import patch
+
+import pytest
+
+from hatch_vsc import excludes
+from hatch_vsc.excludes import (
+    FILES_EXCLUDE,
+    SEARCH_EXCLUDE,
+    WATCHER_EXCLUDE,
+    get_exclude_settings,
+    is_ignored,
+    merge_generated_globs,
+    parse_gitignore,
+    scan_workspace,
+)
+from hatch_vsc.update_vscode_env import (
+    GENERATED_KEY,
+    load_project_summary,
+    update_vscode_config,
+)
+
+
+@pytest.fixture
+def workspace(temp_project_dir):
+    """Create a project with environments, build output, caches and ignored directories."""
+    root = temp_project_dir
+    (root / "pyproject.toml").write_text("")
+    (root / ".gitignore").write_text("# Local files\n/local/\nnotes*\n!notes-shared\n")
+    for directory in [
+        ".git/objects", ".venv/lib", ".hatch/env", "dist", "src/pkg/build", "src/pkg/__pycache__",
+        "tests/.mypy_cache", "local/huge", "docs/notes-private", "docs/notes-shared", "data/raw",
+    ]:
+        (root / directory).mkdir(parents=True)
+    (root / ".venv" / "pyvenv.cfg").write_text("home = /usr/bin\n")
+    (root / "docs" / ".gitignore").write_text("_build\n")
+    (root / "docs" / "_build").mkdir()
+    for i in range(5):
+        (root / "data" / "raw" / f"{i}.csv").write_text("")
+    return root
+
+
+@pytest.mark.parametrize("pattern, path, ignored", [
+    ("build", "src/build", True),
+    ("/build", "src/build", False),
+    ("/build/", "build", True),
+    ("src/*.egg-info", "src/pkg.egg-info", True),
+    ("src/*.egg-info", "src/a/pkg.egg-info", False),
+    ("**/logs", "a/b/logs", True),
+    ("data/**", "data/raw", True),
+    ("cache-[0-9]", "cache-1", True),
+    ("cache-[!0-9]", "cache-1", False),
+])
+def test_gitignore_patterns(pattern, path, ignored):
+    """Test .gitignore patterns match directories like Git."""
+    assert is_ignored(path, parse_gitignore(pattern)) is ignored
+
+
+def test_gitignore_negation_and_base():
+    """Test later rules win and nested .gitignore files only apply below them."""
+    rules = parse_gitignore("logs*\n!logs-kept\n") + parse_gitignore("out\n", "docs")
+    assert is_ignored("logs-old", rules)
+    assert not is_ignored("logs-kept", rules)
+    assert is_ignored("docs/out", rules)
+    assert not is_ignored("out", rules)
+
+
+def test_scan_workspace(workspace):
+    """Test every kind of directory is found without descending into it."""
+    with patch.object(excludes, "_list_directory", wraps=excludes._list_directory) as mock_list:
+        found = scan_workspace(workspace, threshold=3, jobs=4)
+
+    assert found == {
+        "envs": {".venv", ".hatch"},
+        "build": {"dist"},
+        "caches": {"__pycache__", ".mypy_cache"},
+        "large": {"data/raw"},
+        "ignored": {"local", "docs/notes-private", "docs/_build"},
+    }
+    listed = {call.args[0] for call in mock_list.call_args_list}
+    assert str(workspace / "src" / "pkg" / "build") in listed
+    assert not any(".git" in path or "local" in path for path in listed)
+
+
+def test_get_exclude_settings():
+    """Test directories become glob patterns for the settings they belong in."""
+    found = {
+        "envs": {".venv"}, "build": {"dist"}, "caches": {"__pycache__"},
+        "large": set(), "ignored": {"local"},
+    }
+    assert get_exclude_settings(found) == {
+        WATCHER_EXCLUDE: ["**/__pycache__/**", ".venv/**", "dist/**", "local/**"],
+        SEARCH_EXCLUDE: ["**/__pycache__", ".venv", "dist"],
+        FILES_EXCLUDE: ["**/__pycache__"],
+    }
+
+
+def test_merge_generated_globs():
+    """Test user patterns, even disabled ones, are kept and not taken over."""
+    current = {"old/**": True, "user/**": True, "dist/**": False}
+    merged, added = merge_generated_globs(current, ["old/**"], ["dist/**", "new/**"])
+    assert merged == {"user/**": True, "dist/**": False, "new/**": True}
+    assert added == ["new/**"]
+    assert merge_generated_globs("invalid", [], ["a"]) == ({"a": True}, ["a"])
+
+
+def test_update_vscode_config_excludes(workspace, monkeypatch):
+    """Test exclusions are merged into settings.json and removed once disabled."""
+    monkeypatch.chdir(workspace)
+    settings_file = workspace / ".vscode" / "settings.json"
+    settings_file.write_text('{\n  // Mine\n  "search.exclude": {"**/*.log": true}\n}\n')
+    collector_config = {"exclude-threshold": 3}
+
+    update_vscode_config({}, {}, collector_config=collector_config)
+    text = settings_file.read_text()
+    assert "// Mine" in text
+    settings = json.loads(text.replace("// Mine", ""))
+    assert settings[SEARCH_EXCLUDE] == {
+        "**/*.log": True, "**/.mypy_cache": True, "**/__pycache__": True,
+        ".hatch": True, ".venv": True, "data/raw": True, "dist": True,
+    }
+    assert "local/**" in settings[WATCHER_EXCLUDE]
+    env_file = json.loads((workspace / ".vscode" / "python.env.json").read_text())
+    assert env_file[GENERATED_KEY][FILES_EXCLUDE] == ["**/.mypy_cache", "**/__pycache__"]
+
+    update_vscode_config({}, {}, collector_config={"exclude": False})
+    settings = json.loads(settings_file.read_text().replace("// Mine", ""))
+    assert settings[SEARCH_EXCLUDE] == {"**/*.log": True}
+    assert settings[WATCHER_EXCLUDE] == {}
+
+
+def test_update_vscode_config_invalid_threshold(temp_project_dir, monkeypatch):
+    """Test an invalid threshold is reported with the field name."""
+    monkeypatch.chdir(temp_project_dir)
+    with pytest.raises(ValueError, match="exclude-threshold"):
+        update_vscode_config({}, {}, collector_config={"exclude-threshold": "many"})
+
+
+def test_collector_options_from_pyproject(temp_project_dir):
+    """Test the collector options are read from pyproject.toml."""
+    (temp_project_dir / "pyproject.toml").write_text(
+        "[tool.hatch.env.collectors.vscode]\nexclude-threshold = 10\n"
+    )
+    summary = load_project_summary(temp_project_dir)
+    assert summary["collector"] == {"exclude-threshold": 10}
@@ -0,0 +1,65 @@
+"""Import-time budget for plugin registration.
+
+Hatch imports `hatch_vsc.hatch_hooks` on every command, including ones where
+the collector never runs, so it must not pull in the configuration pipeline.
+"""
+import os
+import subprocess
+import sys
+
+# Cumulative import time of hatch_vsc.hatch_hooks in microseconds, with the
+# modules Hatch itself has already loaded by then imported beforehand.
+IMPORT_BUDGET_US = 15000
+
+PRELOADED = "import pathlib, typing, hatch.env.collectors.plugin.interface"
+
+HEAVY_MODULES = (
+    "hatch_vsc.update_vscode_env",
+    "hatch_vsc.cache",
+    "tomli",
+    "argparse",
+    "json",
+    "subprocess",
+)
+
+
+def run_python(code, *args):
+    """Run Python code in a fresh interpreter sharing this test's import path."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    return subprocess.run(
+        [sys.executable, *args, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into cumulative times keyed by module."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_register_does_not_import_pipeline():
+    """Test importing and registering the plugin leaves heavy modules unloaded."""
+    code = (
+        f"{PRELOADED}; import sys; from unittest.mock import Mock\n"
+        "before = set(sys.modules)\n"
+        "from hatch_vsc.hatch_hooks import hatch_register_environment_collector\n"
+        "hatch_register_environment_collector(Mock())\n"
+        "print('\\n'.join(set(sys.modules) - before))"
+    )
+    loaded = set(run_python(code).stdout.split())
+    assert loaded.isdisjoint(HEAVY_MODULES), sorted(loaded.intersection(HEAVY_MODULES))
+
+
+def test_hatch_hooks_import_budget():
+    """Test the import cost of the hook module stays within budget."""
+    # Best of several runs to keep the check stable on busy machines
+    costs = []
+    for _ in range(3):
+        result = run_python(f"{PRELOADED}; import hatch_vsc.hatch_hooks", "-X", "importtime")
+        costs.append(parse_importtime(result.stderr)["hatch_vsc.hatch_hooks"])
+    assert min(costs) < IMPORT_BUDGET_US, f"import took {min(costs)}us"
@@ -0,0 +1,89 @@
+"""Tests for JSONC editing."""
+import json
+
+import pytest
+
+from hatch_vsc.jsonc import JSONCError, get_member, loads, patch, scan
+
+SETTINGS = """\
+{
+  // Shared editor settings
+  "editor.rulers": [100], // keep in sync with DeepSource
+  "python.analysis.extraPaths": [
+    "old"
+  ],
+  /* Formatting */
+  "files.exclude": {"**/*.pyc": true, "weird}key": "]"},
+}
+"""
+
+
+def test_loads():
+    """Test comments and trailing commas are accepted."""
+    assert loads(SETTINGS) == {
+        "editor.rulers": [100],
+        "python.analysis.extraPaths": ["old"],
+        "files.exclude": {"**/*.pyc": True, "weird}key": "]"},
+    }
+    assert loads("") == {}
+    assert loads('{"url": "http://example.com/*x*/"}') == {"url": "http://example.com/*x*/"}
+
+
+def test_scan_members():
+    """Test member positions point at their keys and values."""
+    document = scan(SETTINGS)
+    keys = [member.key for member in document.members]
+    assert keys == ["editor.rulers", "python.analysis.extraPaths", "files.exclude"]
+    member = document.members[2]
+    assert json.loads(SETTINGS[member.value_start:member.value_end])["weird}key"] == "]"
+    assert document.trailing_comma is not None
+
+
+@pytest.mark.parametrize("text", ["[]", '{"a": 1', '{"a" 1}', '{"a": 1} x', '{"a": /* 1}'])
+def test_scan_invalid(text):
+    """Test invalid documents are rejected with their position."""
+    with pytest.raises(JSONCError, match="line 1 column"):
+        scan(text)
+
+
+def test_patch_replaces_in_place():
+    """Test existing values are replaced without touching anything else."""
+    result = patch(SETTINGS, {"python.analysis.extraPaths": ["a", "b"]})
+    assert result == SETTINGS.replace('[\n    "old"\n  ]', '[\n    "a",\n    "b"\n  ]')
+
+
+def test_patch_appends_members():
+    """Test new members keep the trailing comma style and indentation."""
+    result = patch(SETTINGS, {"python.defaultInterpreterPath": "/env/bin/python"})
+    assert result.endswith(
+        '"weird}key": "]"},\n  "python.defaultInterpreterPath": "/env/bin/python",\n}\n'
+    )
+    assert "// Shared editor settings" in result
+
+
+def test_patch_keeps_line_comment_with_member():
+    """Test a comment after the last member stays on its line."""
+    text = '{\n\t"a": 1 // one\n}'
+    assert patch(text, {"b": [2]}) == '{\n\t"a": 1, // one\n\t"b": [\n\t\t2\n\t]\n}'
+
+
+@pytest.mark.parametrize("text", ["", "{}", "  {  }  "])
+def test_patch_empty(text):
+    """Test empty documents and objects get the new members."""
+    assert loads(patch(text, {"a": 1, "b": [2]})) == {"a": 1, "b": [2]}
+
+
+def test_patch_compact_and_crlf():
+    """Test single-line documents stay on one line and CRLF line endings are kept."""
+    assert patch('{"a":1}', {"b": [1, 2]}) == '{"a":1, "b": [1, 2]}'
+    assert patch('{\r\n  "a": 1\r\n}\r\n', {"b": [1]}) == (
+        '{\r\n  "a": 1,\r\n  "b": [\r\n    1\r\n  ]\r\n}\r\n'
+    )
+
+
+def test_patch_duplicate_keys():
+    """Test duplicate keys resolve to the last one, like in VSCode."""
+    text = '{"a": 1, "a": 2}'
+    assert get_member(text, "a") == 2
+    assert patch(text, {"a": 3}) == '{"a": 1, "a": 3}'
+    assert get_member(text, "missing", []) == []
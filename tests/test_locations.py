@@ -0,0 +1,124 @@
+"""Tests for resolving Hatch environment locations."""
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from hatch.utils.fs import Path as HatchPath
+
+from hatch_vsc.locations import (
+    get_data_dir,
+    get_explicit_paths,
+    get_project_id,
+    get_project_name,
+    get_storage_path,
+    resolve_env_paths,
+)
+from hatch_vsc.update_vscode_env import get_environment_paths, get_interpreter_path
+
+PYPROJECT = """\
+[project]
+name = "My.Project"
+
+[tool.hatch.envs.test]
+[[tool.hatch.envs.test.matrix]]
+python = ["3.11", "3.12"]
+
+[tool.hatch.envs.docs]
+path = ".docs"
+
+[tool.hatch.envs.lint]
+template = "docs"
+"""
+
+
+@pytest.fixture
+def project(hatch_dirs):
+    """Create a project with matrix, templated and explicitly located environments."""
+    root = hatch_dirs / "project"
+    root.mkdir()
+    (root / "pyproject.toml").write_text(PYPROJECT)
+    return root.resolve()
+
+
+def test_get_project_id(tmp_path):
+    """Test project ids match Hatch's."""
+    assert get_project_id(tmp_path) == HatchPath(tmp_path).id
+
+
+def test_get_project_name(tmp_path):
+    """Test projects are named after their metadata, or their directory."""
+    assert get_project_name({"project": {"name": "My_Project"}}, tmp_path) == "my-project"
+    assert get_project_name({}, tmp_path / "Env.Only") == "env-only"
+
+
+def test_get_data_dir(hatch_dirs, monkeypatch):
+    """Test the data directory comes from the environment, then the configuration."""
+    assert get_data_dir({"dirs": {"data": "/configured"}}) == hatch_dirs / "data"
+    monkeypatch.delenv("HATCH_DATA_DIR")
+    monkeypatch.setenv("HOME", str(hatch_dirs))
+    assert get_data_dir({"dirs": {"data": "~/hatch"}}) == hatch_dirs / "hatch"
+
+
+def test_get_explicit_paths():
+    """Test paths are inherited from templates and by matrix members."""
+    config = {"tool": {"hatch": {"envs": {
+        "docs": {"path": ".docs"}, "lint": {"template": "docs"},
+        "test": {"path": ".test", "matrix": [{"python": ["3.12"]}]},
+    }}}}
+    assert get_explicit_paths(config) == {"docs": ".docs", "lint": ".docs", "test.py3.12": ".test"}
+
+
+def test_resolve_env_paths(project, hatch_dirs):
+    """Test environments are stored by project name and id, named after themselves."""
+    storage = hatch_dirs / "data" / "env" / "virtual" / "my-project" / get_project_id(project)
+    explicit_paths = {"docs": ".docs", "lint": ".docs", "abs": "/envs/abs"}
+    assert resolve_env_paths(
+        ["default", "test.py3.12", "docs", "lint", "abs"], project, "my-project",
+        explicit_paths=explicit_paths,
+    ) == {
+        "default": storage / "my-project",
+        "test.py3.12": storage / "test.py3.12",
+        "docs": project / ".docs",
+        "lint": project / ".docs",
+        "abs": Path("/envs/abs"),
+    }
+
+
+def test_resolve_env_paths_override(project, monkeypatch):
+    """Test the path set through the environment applies to every environment."""
+    monkeypatch.setenv("HATCH_ENV_TYPE_VIRTUAL_PATH", "/envs/shared")
+    paths = resolve_env_paths(["default", "test"], project, "project")
+    assert paths == {"default": Path("/envs/shared"), "test": Path("/envs/shared")}
+
+
+@pytest.mark.parametrize("virtual, flat", [
+    (".hatch", True),
+    ("{home}/.virtualenvs", True),
+    ("{home}/venvs", False),
+])
+def test_get_storage_path_configured(project, hatch_dirs, monkeypatch, virtual, flat):
+    """Test configured directories inside the project, or ~/.virtualenvs, are flat."""
+    monkeypatch.setenv("HOME", str(hatch_dirs))
+    (hatch_dirs / "config.toml").write_text(
+        f'[dirs.env]\nvirtual = "{virtual.format(home="~")}"\n'
+    )
+    directory = Path(virtual.format(home=hatch_dirs))
+    directory = directory if directory.is_absolute() else project / directory
+    expected = directory if flat else directory / "my-project" / get_project_id(project)
+    assert get_storage_path(project, "my-project") == expected
+
+
+def test_get_environment_paths_fake_tree(project, hatch_dirs):
+    """Test the interpreters of existing environments are found without running Hatch."""
+    storage = hatch_dirs / "data" / "env" / "virtual" / "my-project" / get_project_id(project)
+    for env_dir in [storage / "my-project", storage / "test.py3.11", project / ".docs"]:
+        get_interpreter_path(env_dir).parent.mkdir(parents=True)
+        get_interpreter_path(env_dir).touch()
+
+    with patch("subprocess.run") as mock_run, patch("subprocess.Popen") as mock_popen:
+        env_paths = get_environment_paths(["default", "test.py3.11", "docs"], root=project)
+
+    mock_run.assert_not_called()
+    mock_popen.assert_not_called()
+    assert all(get_interpreter_path(path).is_file() for path in env_paths.values())
+    assert env_paths["default"] == storage / "my-project"
@@ -0,0 +1,112 @@
+"""Tests for cross-process locking and update coalescing."""
+import json
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from hatch_vsc import locking
+from hatch_vsc.locking import coalesced_update, file_lock, get_lock_path
+from hatch_vsc.update_vscode_env import update_vscode_config
+
+
+def test_file_lock_timeout(tmp_path):
+    """Test a held lock makes others wait and eventually time out."""
+    path = tmp_path / "locks" / "settings.lock"
+    with file_lock(path):
+        with pytest.raises(TimeoutError, match="settings.lock"):
+            with file_lock(path, timeout=0.05):
+                pass
+    with file_lock(path, timeout=0):
+        pass
+
+
+def test_get_lock_path(isolated_cache):
+    """Test lock files live in the cache directory, one per resource."""
+    assert get_lock_path("/a/.vscode").parent == isolated_cache / "locks"
+    assert get_lock_path("/a/.vscode") != get_lock_path("/b/.vscode")
+
+
+def test_coalesced_update_sequential():
+    """Test updates made one after the other all run."""
+    for _ in range(2):
+        with coalesced_update("project", "inputs") as needed:
+            assert needed
+
+
+def test_coalesced_update_burst():
+    """Test updates queued behind a running one are coalesced into a single one."""
+    waiting = set()
+    try_lock = locking._try_lock
+
+    def record_waiting(f):
+        acquired = try_lock(f)
+        if not acquired:
+            waiting.add(threading.get_ident())
+        return acquired
+
+    results = []
+
+    def update():
+        with coalesced_update("project", "inputs") as needed:
+            results.append(needed)
+
+    with patch.object(locking, "_try_lock", record_waiting):
+        with coalesced_update("project", "inputs") as needed:
+            assert needed
+            threads = [threading.Thread(target=update) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + 5
+            while len(waiting) < 3 and time.monotonic() < deadline:
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join()
+
+    # The first queued update saw the state every other queued update would
+    assert sorted(results) == [False, False, True]
+
+
+def test_coalesced_update_different_inputs():
+    """Test an update isn't skipped for one computed from other inputs."""
+    with patch("time.time_ns", side_effect=[1, 3]):
+        with coalesced_update("project", "old") as needed:
+            assert needed
+    with patch("time.time_ns", side_effect=[2, 4]):
+        with coalesced_update("project", "new") as needed:
+            assert needed
+
+
+def test_coalesced_update_failure_not_recorded():
+    """Test a failed update doesn't cover updates waiting for it."""
+    with patch("time.time_ns", side_effect=[2, 3]):
+        with pytest.raises(OSError):
+            with coalesced_update("project", "inputs"):
+                raise OSError("disk full")
+    with patch("time.time_ns", side_effect=[1, 4]):
+        with coalesced_update("project", "inputs") as needed:
+            assert needed
+
+
+def test_update_vscode_config_concurrent(temp_project_dir):
+    """Test concurrent updates of a project write it at most twice, completely."""
+    env_paths = {name: Path("/envs") / name for name in ("default", "test", "docs")}
+    mappings = {"src/**/*": "default", "tests/**/*": "test", "docs/**/*": "docs"}
+    barrier = threading.Barrier(8)
+    results = []
+
+    def update():
+        barrier.wait()
+        results.append(update_vscode_config(mappings, env_paths, root=temp_project_dir))
+
+    threads = [threading.Thread(target=update) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 1 <= results.count(True) <= 2
+    env_file = json.loads((temp_project_dir / ".vscode" / "python.env.json").read_text())
+    assert list(env_file["python.envInterpreters"]) == list(mappings)
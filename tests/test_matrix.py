@@ -0,0 +1,100 @@
+"""Tests for matrix and template expansion."""
+import copy
+
+import pytest
+
+from hatch_vsc.matrix import (
+    expand_environments,
+    get_representative_env_names,
+    resolve_templates,
+    select_member,
+)
+from hatch_vsc.update_vscode_env import get_environment_mappings
+
+ENVS = {
+    "default": {"dependencies": ["x"], "matrix-name-format": "{variable}_{value}"},
+    "test": {
+        "vsc-mapping": "tests",
+        "matrix": [
+            {"python": ["3.11", "3.12"], "django": ["4", "5"]},
+            {"py": ["pypy3.10"], "feature": ["a"]},
+        ],
+    },
+    "lint": {"detached": True, "matrix": [{"tool": ["ruff"]}]},
+    "child": {"template": "test", "matrix-name-format": "{value}"},
+    "grand": {"template": "child", "matrix": [{"x": ["1"], "python": ["3.9"]}]},
+}
+
+
+def test_expand_environments_matches_hatch():
+    """Test generated environment names are exactly Hatch's."""
+    from hatch.plugin.manager import PluginManager
+    from hatch.project.config import ProjectConfig
+
+    project_config = ProjectConfig("/project", {"envs": copy.deepcopy(ENVS)}, PluginManager())
+    assert list(expand_environments(ENVS)) == list(project_config.envs)
+
+
+def test_resolve_templates_inheritance():
+    """Test keys are inherited through templates except matrices and plugin keys."""
+    resolved = resolve_templates(ENVS)
+    assert resolved["child"]["dependencies"] == ["x"]
+    assert "matrix" not in resolved["child"]
+    assert "vsc-mapping" not in resolved["child"]
+    assert "dependencies" not in resolved["lint"]
+    assert resolved["grand"]["matrix-name-format"] == "{value}"
+
+
+def test_resolve_templates_scripts_merged():
+    """Test scripts are inherited one by one."""
+    envs = {
+        "default": {"scripts": {"a": "default-a", "b": "default-b"}},
+        "test": {"scripts": {"a": "test-a"}},
+    }
+    assert resolve_templates(envs)["test"]["scripts"] == {"a": "test-a", "b": "default-b"}
+
+
+def test_resolve_templates_errors():
+    """Test unknown templates and circular inheritance are rejected."""
+    with pytest.raises(ValueError, match="unknown environment `missing`"):
+        resolve_templates({"test": {"template": "missing"}})
+    with pytest.raises(ValueError, match="a -> b -> a"):
+        resolve_templates({"a": {"template": "b"}, "b": {"template": "a"}})
+
+
+def test_resolve_templates_does_not_modify_input():
+    """Test the raw configuration is left untouched."""
+    envs = copy.deepcopy(ENVS)
+    resolve_templates(envs)
+    assert envs == ENVS
+
+
+def test_select_member():
+    """Test representatives are selected by position or name."""
+    members = ["test.py3.11", "test.py3.12"]
+    assert select_member("test", members) == "test.py3.11"
+    assert select_member("test", members, "last") == "test.py3.12"
+    assert select_member("test", members, "py3.12") == "test.py3.12"
+    assert select_member("test", members, "test.py3.12") == "test.py3.12"
+    with pytest.raises(ValueError, match="vsc-matrix-member"):
+        select_member("test", members, "py2.7")
+
+
+def test_get_representative_env_names():
+    """Test every definition is represented by one concrete environment."""
+    envs = {
+        "test": {"matrix": [{"python": ["3.11", "3.12"]}], "vsc-matrix-member": "last"},
+        "docs": {},
+    }
+    assert get_representative_env_names(envs) == {
+        "test": "test.py3.12", "docs": "docs", "default": "default"
+    }
+
+
+def test_get_environment_mappings_matrix():
+    """Test matrix environments map to their representative member."""
+    config = {"tool": {"hatch": {"envs": ENVS}}}
+    mappings = get_environment_mappings(config)
+    assert mappings["tests/**/*"] == "test.py3.11-django_4"
+    assert mappings["child/**/*"] == "child"
+    assert mappings["grand/**/*"] == "grand.py3.9-1"
@@ -0,0 +1,131 @@
+"""Tests for monorepo mode."""
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from hatch_vsc.monorepo import (
+    consolidate,
+    discover_projects,
+    load_projects,
+    update_monorepo,
+)
+from hatch_vsc.update_vscode_env import get_interpreter_path
+
+
+def make_project(path, envs=""):
+    """Create a Hatch project with the given environment tables."""
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "pyproject.toml").write_text(f"[tool.hatch.version]\nsource = \"vcs\"\n{envs}")
+    return path
+
+
+def fake_env_paths(env_names, project_name=None, root=None):
+    """Resolve environment paths without Hatch."""
+    return {name: Path("/envs") / Path(root).name / name for name in env_names}
+
+
+def test_discover_projects_prunes(tmp_path):
+    """Test discovery finds nested projects and skips pruned directories."""
+    make_project(tmp_path)
+    make_project(tmp_path / "libs" / "a")
+    make_project(tmp_path / "libs" / "b" / "nested")
+    make_project(tmp_path / "node_modules" / "pkg")
+    make_project(tmp_path / ".git" / "pkg")
+    venv = make_project(tmp_path / "env")
+    (venv / "pyvenv.cfg").write_text("")
+
+    assert discover_projects(tmp_path) == [
+        tmp_path,
+        tmp_path / "libs" / "a",
+        tmp_path / "libs" / "b" / "nested",
+    ]
+
+
+def test_load_projects_parallel(tmp_path, monkeypatch):
+    """Test projects are loaded in worker processes, keeping their order."""
+    monkeypatch.setenv("PATH", "")
+    dirs = [
+        make_project(tmp_path / f"p{i}", f'[tool.hatch.envs.e{i}]\nvsc-mapping = "d{i}"\n')
+        for i in range(4)
+    ]
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "pyproject.toml").write_text("[project]\nname = \"other\"\n")
+
+    projects = load_projects([*dirs, tmp_path / "other"], jobs=2)
+
+    assert [p["root"] for p in projects] == [str(d) for d in dirs]
+    assert projects[2]["mappings"] == {"src/**/*": "default", "d2/**/*": "e2"}
+
+
+def test_consolidate_roots_patterns(tmp_path):
+    """Test sub-project patterns are rooted at their directories."""
+    projects = [
+        {"root": str(tmp_path), "mappings": {"src/**/*": "default"},
+         "env_paths": {"default": "/envs/root"}},
+        {"root": str(tmp_path / "libs" / "a"),
+         "mappings": {"src/**/*": "default", "tests/**/*": "test"},
+         "env_paths": {"default": "/envs/a", "test": "/envs/a-test"}},
+    ]
+    mappings, env_paths = consolidate(tmp_path, projects)
+
+    assert mappings == {
+        "libs/a/src/**/*": "libs/a:default",
+        "libs/a/tests/**/*": "libs/a:test",
+        "src/**/*": "default",
+    }
+    assert env_paths["libs/a:test"] == Path("/envs/a-test")
+    assert env_paths["default"] == Path("/envs/root")
+
+
+def test_update_monorepo_consolidated(tmp_path):
+    """Test a single configuration is written for all projects."""
+    make_project(tmp_path / "libs" / "a", '[tool.hatch.envs.test]\nvsc-mapping = "tests"\n')
+    make_project(tmp_path / "libs" / "b")
+
+    with patch("hatch_vsc.monorepo.get_environment_paths", side_effect=fake_env_paths):
+        update_monorepo(tmp_path, jobs=1)
+
+    env_config = json.loads((tmp_path / ".vscode" / "python.env.json").read_text())
+    assert env_config["python.envInterpreters"]["libs/a/tests/**/*"] == str(
+        get_interpreter_path(Path("/envs/a/test"))
+    )
+    settings = json.loads((tmp_path / ".vscode" / "settings.json").read_text())
+    default_interpreter = get_interpreter_path(Path("/envs/a/default"))
+    assert settings["python.defaultInterpreterPath"] == str(default_interpreter)
+
+
+def test_update_monorepo_collector_options(tmp_path):
+    """Test each project's collector options apply, the root project's when consolidated."""
+    options = "[tool.hatch.env.collectors.vscode]\ntesting = false\nterminal = false\n"
+    envs = '[tool.hatch.envs.test]\ndependencies = ["pytest"]\nvsc-mapping = "tests"\n'
+    make_project(tmp_path, options)
+    make_project(tmp_path / "libs" / "a", envs + options)
+    make_project(tmp_path / "libs" / "b", envs)
+
+    with patch("hatch_vsc.monorepo.get_environment_paths", side_effect=fake_env_paths):
+        update_monorepo(tmp_path, jobs=1)
+        update_monorepo(tmp_path, tmp_path / "repo.code-workspace", jobs=1)
+
+    for project in [tmp_path, tmp_path / "libs" / "a"]:
+        settings = json.loads((project / ".vscode" / "settings.json").read_text())
+        assert "python.testing.pytestArgs" not in settings
+        assert "python.terminal.activateEnvironment" not in settings
+    settings = json.loads((tmp_path / "libs" / "b" / ".vscode" / "settings.json").read_text())
+    assert settings["python.testing.pytestArgs"] == ["tests"]
+
+
+def test_update_monorepo_workspace(tmp_path):
+    """Test workspace mode writes per-project configuration and a workspace file."""
+    make_project(tmp_path / "libs" / "a")
+    make_project(tmp_path / "libs" / "b")
+    workspace_file = tmp_path / "repo.code-workspace"
+    workspace_file.write_text('{"folders": [], "settings": {"editor.rulers": [100]}}')
+
+    with patch("hatch_vsc.monorepo.get_environment_paths", side_effect=fake_env_paths):
+        update_monorepo(tmp_path, workspace_file, jobs=1)
+
+    workspace = json.loads(workspace_file.read_text())
+    assert workspace["folders"] == [{"path": "libs/a"}, {"path": "libs/b"}]
+    assert workspace["settings"] == {"editor.rulers": [100]}
+    assert (tmp_path / "libs" / "b" / ".vscode" / "python.env.json").exists()
+    assert not (tmp_path / ".vscode").exists()
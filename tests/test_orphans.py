@@ -0,0 +1,105 @@
+"""Tests for orphaned environment detection."""
+import os
+
+import pytest
+
+from hatch_vsc.locations import get_project_id
+from hatch_vsc.orphans import find_orphaned_envs, format_size, get_disk_usage
+from hatch_vsc.update_vscode_env import main
+
+PYPROJECT = """\
+[project]
+name = "my-project"
+
+[tool.hatch.envs.test]
+[[tool.hatch.envs.test.matrix]]
+python = ["3.11", "3.12"]
+
+[tool.hatch.envs.docs]
+path = ".docs"
+"""
+
+
+@pytest.fixture
+def project(tmp_path, hatch_dirs):
+    """Create a project with a storage directory holding current and orphaned environments."""
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "pyproject.toml").write_text(PYPROJECT)
+    root = root.resolve()
+    virtual = tmp_path / "data" / "env" / "virtual"
+    storage = virtual / "my-project" / get_project_id(root)
+    for name in [
+        "my-project", "my-project-build", "test.py3.11", "test.py3.11-build",
+        "hatch-build", "test.py3.10", "test.py3.10-build", "docs",
+    ]:
+        (storage / name / "bin").mkdir(parents=True)
+    (virtual / "old-name" / get_project_id(root) / "old-name").mkdir(parents=True)
+    (virtual / "other" / "otherid0" / "other").mkdir(parents=True)
+    return root, storage, virtual
+
+
+def test_find_orphaned_envs(project):
+    """Test removed, relocated and renamed-project environments are found, and only those.
+
+    Build environments of configured environments aren't orphaned.
+    """
+    root, storage, virtual = project
+    assert find_orphaned_envs(root) == sorted([
+        (storage / "docs", "has an explicit path"),
+        (storage / "test.py3.10", "not configured"),
+        (storage / "test.py3.10-build", "not configured"),
+        (virtual / "old-name" / get_project_id(root), "stored under project name old-name"),
+    ])
+
+
+def test_find_orphaned_envs_shared_storage(project, tmp_path, monkeypatch):
+    """Test directories shared with other projects are refused."""
+    root, _, _ = project
+    monkeypatch.setenv("HOME", str(tmp_path))
+    (tmp_path / "config.toml").write_text('[dirs.env]\nvirtual = "~/.virtualenvs"\n')
+    with pytest.raises(ValueError, match="shared"):
+        find_orphaned_envs(root)
+
+
+def test_get_disk_usage_hardlinks(tmp_path):
+    """Test nested files are counted, and hardlinked files only once."""
+    first, second = tmp_path / "first", tmp_path / "second"
+    (first / "lib" / "pkg").mkdir(parents=True)
+    second.mkdir()
+    (first / "lib" / "pkg" / "data").write_bytes(b"x" * 100_000)
+    os.link(first / "lib" / "pkg" / "data", second / "data")
+    (second / "own").write_bytes(b"y" * 50_000)
+
+    usage = get_disk_usage([first, second], jobs=4)
+    data_usage = os.stat(first / "lib" / "pkg" / "data").st_blocks * 512
+    own_usage = os.stat(second / "own").st_blocks * 512
+    assert sum(usage.values()) == data_usage + own_usage
+    assert usage[second] >= own_usage
+
+
+def test_format_size():
+    """Test sizes are formatted with binary units."""
+    assert format_size(512) == "512 B"
+    assert format_size(3 * 1024 ** 3 // 2) == "1.5 GiB"
+
+
+def test_gc_command(project, monkeypatch, capsys):
+    """Test the report, and deletion."""
+    root, storage, _ = project
+    (storage / "test.py3.10" / "bin" / "python").write_bytes(b"x" * 10_000)
+    monkeypatch.chdir(root)
+
+    main(["gc"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].endswith(f"{storage / 'test.py3.10'}  (not configured)")
+    assert "4 orphaned environments" in lines[-1]
+    assert (storage / "test.py3.10").exists()
+
+    main(["gc", "--delete"])
+    assert "Deleted 4 orphaned environments" in capsys.readouterr().out
+    assert not (storage / "test.py3.10").exists()
+    assert (storage / "test.py3.11").exists()
+    assert (storage / "test.py3.11-build").exists()
+    main(["gc"])
+    assert capsys.readouterr().out.strip() == "No orphaned environments"
@@ -1,8 +1,14 @@
 """Tests for VSCode plugin."""
+import json
 from pathlib import Path
-from unittest.mock import Mock, mock_open, patch
+from unittest.mock import Mock, patch
 
+from hatch.utils.fs import Path as HatchPath
+
+from hatch_vsc import plugin
+from hatch_vsc.cache import FINGERPRINT_KEY
 from hatch_vsc.plugin import VSCodeEnvironmentCollector
+from hatch_vsc.update_vscode_env import get_interpreter_path
 
 
 def test_vscode_collector_initialization():
@@ -13,17 +19,158 @@ def test_vscode_collector_initialization():
     assert collector.config_file == "python.env.json"
 
 
-def test_vscode_collector_collect():
+def make_app(envs, env_root, raw_envs=None):
+    """Create a fake Hatch application exposing resolved environments."""
+    app = Mock()
+    app.project.config.envs = envs
+    app.project.config.config = {"envs": envs if raw_envs is None else raw_envs}
+    app.project.location = HatchPath(env_root.parent / "project")
+    app.get_env_directory.return_value = env_root
+
+    def get_environment(env_name):
+        environment = Mock()
+        environment.virtual_env.directory = env_root / env_name
+        return environment
+
+    app.get_environment.side_effect = get_environment
+    return app
+
+
+def test_vscode_collector_collect(tmp_path):
     """Test environment collection."""
-    root = Path("/test/root")
     config = {"project": {"name": "test-project"}}
-    collector = VSCodeEnvironmentCollector(root=root, config=config)
-    mock_app = Mock()
-    
-    mock_settings = "{}"
-    with patch("pathlib.Path.exists", return_value=True), \
-         patch("pathlib.Path.mkdir"), \
-         patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=Path("/mock/env")), \
-         patch("builtins.open", mock_open(read_data=mock_settings)), \
-         patch("json.dump"):
-        collector.collect(mock_app) 
\ No newline at end of file
+    collector = VSCodeEnvironmentCollector(root=tmp_path, config=config)
+    envs = {
+        "default": {"type": "virtual"},
+        "test": {"type": "virtual", "dependencies": ["pytest"]},
+    }
+    env_root = Path("/mock/env")
+    mock_app = make_app(envs, env_root)
+
+    with patch("subprocess.run") as mock_run, \
+         patch("hatch_vsc.update_vscode_env.read_pyproject_toml") as mock_read:
+        collector.collect(mock_app)
+        mock_run.assert_not_called()
+        mock_read.assert_not_called()
+
+    env_config = json.loads((tmp_path / ".vscode" / "python.env.json").read_text())
+    assert env_config["python.envInterpreters"] == {
+        "src/**/*": str(get_interpreter_path(env_root / "default")),
+        "tests/**/*": str(get_interpreter_path(env_root / "test")),
+    }
+    settings = json.loads((tmp_path / ".vscode" / "settings.json").read_text())
+    default_interpreter = get_interpreter_path(env_root / "default")
+    assert settings["python.defaultInterpreterPath"] == str(default_interpreter)
+
+
+def test_vscode_collector_skips_non_virtual(tmp_path):
+    """Test environments without a virtual environment directory are skipped."""
+    collector = VSCodeEnvironmentCollector(root=tmp_path, config={})
+    envs = {"default": {}, "docs": {"vsc-mapping": "docs"}}
+    mock_app = make_app(envs, Path("/mock/env"))
+    mock_app.get_environment.side_effect = lambda name: (
+        Mock(spec=[]) if name == "docs" else Mock(virtual_env=Mock(directory=Path("/mock/env")))
+    )
+
+    collector.collect(mock_app)
+
+    env_config = json.loads((tmp_path / ".vscode" / "python.env.json").read_text())
+    assert list(env_config["python.envInterpreters"]) == ["src/**/*"]
+
+
+def test_vscode_collector_ignores_inherited_config(tmp_path):
+    """Test mappings use each environment's own keys, not those inherited from its template."""
+    collector = VSCodeEnvironmentCollector(root=tmp_path, config={})
+    raw_envs = {
+        "default": {
+            "dependencies": ["pytest"],
+            "scripts": {"build": "cd tools && make"},
+        },
+        "docs": {"dependencies": ["mkdocs"]},
+    }
+    # Hatch's resolved configuration, with template values inherited
+    envs = {
+        "default": raw_envs["default"],
+        "docs": {"dependencies": ["mkdocs"], "scripts": {"build": "cd tools && make"}},
+    }
+    mock_app = make_app(envs, Path("/mock/env"), raw_envs)
+
+    collector.collect(mock_app)
+
+    env_config = json.loads((tmp_path / ".vscode" / "python.env.json").read_text())
+    interpreters = env_config["python.envInterpreters"]
+    assert interpreters["docs/**/*"] == str(get_interpreter_path(Path("/mock/env/docs")))
+    assert "tools/**/*" not in interpreters
+    assert "tests/**/*" not in interpreters
+
+
+def test_vscode_collector_matrix(tmp_path):
+    """Test matrix environments are mapped to the selected member."""
+    collector = VSCodeEnvironmentCollector(root=tmp_path, config={})
+    raw_envs = {
+        "test": {
+            "vsc-mapping": "tests",
+            "vsc-matrix-member": "last",
+            "matrix": [{"python": ["3.11", "3.12"]}],
+        },
+    }
+    envs = {"default": {}, "test.py3.11": {}, "test.py3.12": {}}
+    mock_app = make_app(envs, Path("/mock/env"), raw_envs)
+
+    collector.collect(mock_app)
+
+    env_config = json.loads((tmp_path / ".vscode" / "python.env.json").read_text())
+    assert env_config["python.envInterpreters"]["tests/**/*"] == str(
+        get_interpreter_path(Path("/mock/env/test.py3.12"))
+    )
+
+
+def test_vscode_collector_fingerprint(tmp_path):
+    """Test unchanged inputs skip the update, within a process and across processes."""
+    root = tmp_path / "project"
+    root.mkdir()
+    collector = VSCodeEnvironmentCollector(root=root, config={})
+    env_root = tmp_path / "env" / "virtual"
+    envs = {"default": {}, "test": {"vsc-mapping": "tests"}}
+    mock_app = make_app(envs, env_root)
+    mock_app.project.location = HatchPath(root)
+    storage = env_root / "project" / mock_app.project.location.id
+    (storage / "default").mkdir(parents=True)
+
+    collector.collect(mock_app)
+    env_config = json.loads((root / ".vscode" / "python.env.json").read_text())
+    assert env_config[FINGERPRINT_KEY]
+
+    with patch("hatch_vsc.update_vscode_env.update_vscode_config") as mock_update:
+        collector.collect(mock_app)
+        with patch("hatch_vsc.cache.read_stored_fingerprint") as mock_read:
+            collector.collect(mock_app)
+            mock_read.assert_not_called()
+        # A new process only has the stored fingerprint
+        plugin._applied_fingerprints.clear()
+        collector.collect(mock_app)
+        mock_update.assert_not_called()
+
+        # Creating an environment changes the storage directory
+        (storage / "test").mkdir()
+        collector.collect(mock_app)
+        assert mock_update.call_count == 1
+
+    (root / ".vscode" / "settings.json").unlink()
+    plugin._applied_fingerprints.clear()
+    collector.collect(mock_app)
+    assert (root / ".vscode" / "settings.json").exists()
+
+
+def test_vscode_collector_fingerprint_config_change(tmp_path):
+    """Test changing the environment configuration invalidates the fingerprint."""
+    collector = VSCodeEnvironmentCollector(root=tmp_path, config={})
+    raw_envs = {"test": {"vsc-mapping": "tests"}}
+    mock_app = make_app({"default": {}, "test": {}}, Path("/mock/env"), raw_envs)
+    collector.collect(mock_app)
+
+    raw_envs["test"]["vsc-mapping"] = "checks"
+    collector.collect(mock_app)
+
+    env_config = json.loads((tmp_path / ".vscode" / "python.env.json").read_text())
+    assert "checks/**/*" in env_config["python.envInterpreters"]
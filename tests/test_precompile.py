@@ -0,0 +1,77 @@
+"""Tests for bytecode precompilation."""
+import importlib.util
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from hatch_vsc.precompile import (
+    compile_enabled,
+    compile_environments,
+    get_compile_jobs,
+    get_mapped_directories,
+)
+from hatch_vsc.update_vscode_env import get_interpreter_path
+
+
+@pytest.fixture
+def env_path(tmp_path):
+    """Create an environment whose interpreter is the running one."""
+    env_path = tmp_path / "envs" / "test"
+    get_interpreter_path(env_path).parent.mkdir(parents=True)
+    get_interpreter_path(env_path).symlink_to(sys.executable)
+    return env_path
+
+
+def test_compile_options():
+    """Test precompilation is opt-in and the CPU budget is bounded."""
+    assert not compile_enabled(None)
+    assert compile_enabled({"compile": True})
+    with patch("os.cpu_count", return_value=8):
+        assert get_compile_jobs(0.5) == 4
+        assert get_compile_jobs(0.01) == 1
+        assert get_compile_jobs(3) == 3
+        assert get_compile_jobs(64) == 8
+
+
+def test_get_mapped_directories(temp_project_dir):
+    """Test only existing literal directories are compiled."""
+    (temp_project_dir / "tests" / "unit").mkdir(parents=True)
+    mappings = {
+        "src/**/*": "default",
+        "tests/unit/**/*": "test",
+        "tests/*.py": "test",
+        "./**/*": "lint",
+    }
+    assert get_mapped_directories(temp_project_dir, mappings) == {
+        "test": [temp_project_dir / "tests" / "unit"],
+    }
+
+
+def test_compile_environments(temp_project_dir, env_path, tmp_path):
+    """Test mapped directories are compiled, and site-packages only when they change."""
+    (temp_project_dir / "tests").mkdir()
+    (temp_project_dir / "tests" / "test_a.py").write_text("x = 1\n")
+    (temp_project_dir / "tests" / "broken.py").write_text("def (\n")
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    (site_packages / "module.py").write_text("y = 2\n")
+    interpreters = {"test": {"site_packages": [str(site_packages)]}}
+    mappings = {"tests/**/*": "test"}
+    env_paths = {"test": env_path, "missing": tmp_path / "envs" / "missing"}
+
+    errors = compile_environments(
+        temp_project_dir, mappings, env_paths, interpreters, site_packages=True
+    )
+    assert errors == {}
+    for source in [temp_project_dir / "tests" / "test_a.py", site_packages / "module.py"]:
+        assert os.path.exists(importlib.util.cache_from_source(str(source)))
+
+    with patch("subprocess.run", wraps=subprocess.run) as mock_run:
+        compile_environments(temp_project_dir, mappings, env_paths, interpreters, True)
+        (site_packages / "new.py").write_text("z = 3\n")
+        compile_environments(temp_project_dir, mappings, env_paths, interpreters, True)
+    assert str(site_packages) not in mock_run.call_args_list[0].args[0]
+    assert str(site_packages) in mock_run.call_args_list[1].args[0]
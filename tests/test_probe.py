@@ -0,0 +1,111 @@
+"""Tests for interpreter probing."""
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from hatch_vsc.probe import create_environments, probe_interpreters
+from hatch_vsc.update_vscode_env import get_interpreter_path, main, probe_environments
+
+
+@pytest.fixture
+def interpreter(tmp_path):
+    """Link to the running interpreter, like an environment's bin/python."""
+    path = tmp_path / "env" / "bin" / "python"
+    path.parent.mkdir(parents=True)
+    path.symlink_to(sys.executable)
+    return path
+
+
+def test_probe_interpreters(interpreter, tmp_path):
+    """Test interpreters are probed for their metadata and missing ones reported."""
+    missing = tmp_path / "missing" / "bin" / "python"
+    results = probe_interpreters([interpreter, missing])
+
+    info = results[str(interpreter)]
+    assert info["version"] == "%d.%d.%d" % sys.version_info[:3]
+    assert info["prefix"] == sys.prefix
+    assert info["site_packages"]
+    assert results[str(missing)] is None
+
+
+def test_probe_interpreters_cached(interpreter):
+    """Test warm runs don't spawn the interpreter until it changes."""
+    first = probe_interpreters([interpreter])
+    with patch("hatch_vsc.probe._probe_all") as mock_probe:
+        assert probe_interpreters([interpreter]) == first
+        mock_probe.assert_not_called()
+
+    # Recreating the environment changes the symlink
+    stat = os.lstat(interpreter)
+    os.utime(interpreter, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9), follow_symlinks=False)
+    with patch("hatch_vsc.probe._probe_all", return_value=[{"version": "3.12.0"}]):
+        assert probe_interpreters([interpreter]) == {str(interpreter): {"version": "3.12.0"}}
+
+
+def test_probe_environments_windows_layout(tmp_path):
+    """Test Windows environments are probed through Scripts/python.exe."""
+    env_path = tmp_path / "env"
+    with patch("sys.platform", "win32"):
+        interpreter = get_interpreter_path(env_path)
+        with patch("hatch_vsc.probe.probe_interpreters", return_value={
+            str(interpreter): {"version": "3.12.0"},
+        }) as mock_probe:
+            assert probe_environments({"test": env_path}) == {"test": {"version": "3.12.0"}}
+
+    assert interpreter == env_path / "Scripts" / "python.exe"
+    assert list(mock_probe.call_args.args[0]) == [interpreter]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell script")
+def test_probe_interpreters_broken(tmp_path):
+    """Test failing interpreters are reported and not cached."""
+    broken = tmp_path / "python"
+    broken.write_text("#!/bin/sh\necho 'No module named encodings' >&2\nexit 1\n")
+    broken.chmod(0o755)
+
+    results = probe_interpreters([broken])
+    assert results[str(broken)] == {"error": "No module named encodings"}
+    with patch("hatch_vsc.probe._probe_all", return_value=[{"version": "3.12.0"}]):
+        assert probe_interpreters([broken])[str(broken)] == {"version": "3.12.0"}
+
+
+def test_create_environments(tmp_path):
+    """Test environments are created with Hatch and failures reported."""
+    calls = []
+
+    class Process:
+        def __init__(self, returncode):
+            self.returncode = returncode
+
+        async def communicate(self):
+            return b"", b"" if self.returncode == 0 else b"Unknown environment: docs"
+
+    async def create_subprocess_exec(*args, **kwargs):
+        calls.append((args, kwargs["cwd"]))
+        return Process(1 if args[-1] == "docs" else 0)
+
+    with patch("asyncio.create_subprocess_exec", create_subprocess_exec):
+        errors = create_environments(["test", "docs", "test"], root=tmp_path, jobs=2)
+
+    assert errors == {"docs": "Unknown environment: docs"}
+    assert sorted(calls) == [
+        (("hatch", "env", "create", "docs"), str(tmp_path)),
+        (("hatch", "env", "create", "test"), str(tmp_path)),
+    ]
+
+
+def test_main_reports_missing(temp_project_dir, monkeypatch, capsys):
+    """Test the update command warns about missing environments."""
+    monkeypatch.chdir(temp_project_dir)
+    config = {"tool": {"hatch": {"envs": {"test": {"vsc-mapping": "tests"}}}}}
+
+    with patch("hatch_vsc.update_vscode_env.read_pyproject_toml", return_value=config), \
+         patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=Path("/mock")), \
+         patch("hatch_vsc.probe.create_environments", return_value={}) as mock_create:
+        main(["update", "--create-missing", "-j", "2"])
+
+    assert "Environment test does not exist" in capsys.readouterr().err
+    mock_create.assert_called_once_with(["default", "test"], jobs=2)
@@ -0,0 +1,78 @@
+"""Tests for the file-to-environment resolver."""
+import io
+
+import pytest
+
+from hatch_vsc.resolver import EnvironmentResolver
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    """Create a resolver for a typical set of mappings."""
+    mappings = {
+        "src/**/*": "default",
+        "tests/**/*": "test",
+        "tests/integration/**/*": "integration",
+        "docs/*.md": "docs",
+    }
+    return EnvironmentResolver(mappings, tmp_path)
+
+
+@pytest.mark.parametrize("path, env_name", [
+    ("src/pkg/module.py", "default"),
+    ("tests/test_a.py", "test"),
+    ("tests/integration/test_b.py", "integration"),
+    ("tests/integration", "test"),
+    ("docs/index.md", "docs"),
+    ("src", None),
+    ("scripts/run.py", None),
+    ("./tests//unit/../test_c.py", "test"),
+    ("../outside/src/a.py", None),
+])
+def test_resolve(resolver, path, env_name):
+    """Test the most specific pattern wins."""
+    assert resolver.resolve(path) == env_name
+
+
+def test_resolve_absolute(resolver, tmp_path):
+    """Test absolute paths are resolved relative to the root."""
+    assert resolver.resolve(str(tmp_path / "tests" / "test_a.py")) == "test"
+    assert resolver.resolve(str(tmp_path.parent / "src" / "a.py")) is None
+
+
+def test_resolve_first_pattern_wins():
+    """Test duplicate directory patterns keep the first environment."""
+    resolver = EnvironmentResolver({"src/**/*": "default", "src/./**/*": "other"}, "/repo")
+    assert resolver.resolve("src/a.py") == "default"
+
+
+def test_resolve_many(resolver):
+    """Test batches are resolved lazily and in order."""
+    results = resolver.resolve_many(iter(["src/a.py", "other.py"]))
+    assert next(results) == ("src/a.py", "default")
+    assert list(results) == [("other.py", None)]
+
+
+def test_main_which_stdin(temp_project_dir, monkeypatch, capsys):
+    """Test the which subcommand streams answers for paths read from stdin."""
+    monkeypatch.chdir(temp_project_dir)
+    (temp_project_dir / "pyproject.toml").write_text(
+        '[tool.hatch.envs.test]\nvsc-mapping = "tests"\n'
+    )
+    monkeypatch.setattr("sys.stdin", io.StringIO("tests/test_a.py\nsrc/a.py\n\nREADME.md\n"))
+
+    from hatch_vsc.update_vscode_env import main
+    main(["which"])
+
+    assert capsys.readouterr().out == "tests/test_a.py\ttest\nsrc/a.py\tdefault\nREADME.md\t\n"
+
+
+def test_main_which_args(temp_project_dir, monkeypatch, capsys):
+    """Test the which subcommand resolves paths given as arguments."""
+    monkeypatch.chdir(temp_project_dir)
+    (temp_project_dir / "pyproject.toml").write_text("")
+
+    from hatch_vsc.update_vscode_env import main
+    main(["which", str(temp_project_dir / "src" / "a.py")])
+
+    assert capsys.readouterr().out == f"{temp_project_dir / 'src' / 'a.py'}\tdefault\n"
@@ -0,0 +1,118 @@
+"""Tests for the resident resolver daemon."""
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from hatch_vsc.locations import get_project_id
+from hatch_vsc.server import Client, ResolverServer, find_project_root
+from hatch_vsc.update_vscode_env import get_interpreter_path
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="The daemon needs Unix domain sockets"
+)
+
+PYPROJECT = '[project]\nname = "served"\n\n[tool.hatch.envs.test]\nvsc-mapping = "tests"\n'
+
+
+@pytest.fixture
+def project(tmp_path, hatch_dirs):
+    """Create a project mapping tests to a test environment."""
+    root = tmp_path / "served"
+    root.mkdir()
+    (root / "pyproject.toml").write_text(PYPROJECT)
+    return root.resolve()
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run a daemon in a thread."""
+    server = ResolverServer(tmp_path / "s.sock", idle_timeout=30)
+    thread = threading.Thread(target=server.serve_until_idle, daemon=True)
+    thread.start()
+    yield server
+    server.stop()
+    thread.join(5)
+
+
+def interpreter(tmp_path, root, env_name):
+    """Get where Hatch would put an environment's interpreter."""
+    storage = tmp_path / "data" / "env" / "virtual" / "served" / get_project_id(root)
+    return str(get_interpreter_path(storage / env_name))
+
+
+def test_find_project_root(project):
+    """Test paths belong to the nearest directory with a pyproject.toml."""
+    nested = project / "packages" / "nested"
+    nested.mkdir(parents=True)
+    (nested / "pyproject.toml").touch()
+    roots = {}
+    assert find_project_root(str(nested / "src"), roots) == str(nested)
+    assert find_project_root(str(project / "packages"), roots) == str(project)
+    assert roots[str(project / "packages")] == str(project)
+
+
+def test_which_batch(project, server, tmp_path):
+    """Test batched queries, relative paths and paths outside of projects."""
+    with Client(server.socket_path) as client:
+        which, mappings = client.batch([
+            ("which", {"paths": ["tests/test_a.py", str(project / "src" / "a.py"), "/x.py"],
+                       "cwd": str(project)}),
+            ("mappings", {"root": str(project)}),
+        ])
+
+    assert [(result["env"], result["interpreter"]) for result in which] == [
+        ("test", interpreter(tmp_path, project, "test")),
+        ("default", interpreter(tmp_path, project, "served")),
+        (None, None),
+    ]
+    assert which[0]["root"] == str(project)
+    assert mappings == {"src/**/*": "default", "tests/**/*": "test"}
+
+
+def test_invalidated_on_change(project, server):
+    """Test configuration changes are picked up by the next query."""
+    with Client(server.socket_path) as client:
+        params = {"paths": [str(project / "tests" / "test_a.py")]}
+        assert client.call("which", params)[0]["env"] == "test"
+        (project / "pyproject.toml").write_text('[project]\nname = "served"\n')
+        assert client.call("which", params)[0]["env"] == "default"
+
+
+def test_errors(project, server):
+    """Test errors are answered per request, and invalid messages rejected."""
+    with Client(server.socket_path) as client:
+        with pytest.raises(RuntimeError, match="Unknown method"):
+            client.call("unknown")
+        with pytest.raises(RuntimeError, match="must be an absolute path"):
+            client.call("settings", {"root": "relative"})
+        settings = client.call("settings", {"root": str(project)})
+        assert "python.envInterpreters" in settings["env_config"]
+        assert not (project / ".vscode").exists()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(server.socket_path))
+        sock.sendall(b"not json\n")
+        response = json.loads(sock.makefile("rb").readline())
+    assert response["error"]["code"] == -32700
+
+
+def test_idle_shutdown(tmp_path):
+    """Test the daemon exits once idle, removing its socket."""
+    server = ResolverServer(tmp_path / "s.sock", idle_timeout=0.2)
+    thread = threading.Thread(target=server.serve_until_idle, daemon=True)
+    thread.start()
+    with Client(server.socket_path) as client:
+        time.sleep(0.4)
+        assert client.call("ping") == "pong"
+    thread.join(5)
+    assert not thread.is_alive()
+    assert not server.socket_path.exists()
+
+
+def test_already_running(server):
+    """Test a second daemon doesn't take over the socket."""
+    with pytest.raises(RuntimeError, match="already listening"):
+        ResolverServer(server.socket_path)
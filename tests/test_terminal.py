@@ -0,0 +1,122 @@
+"""Tests for precomputed terminal environments."""
+import json
+import os
+from pathlib import Path
+
+from hatch_vsc.terminal import (
+    ACTIVATE_ENVIRONMENT,
+    ENV_FILE_DIR,
+    format_env_file,
+    format_env_var,
+    get_activation_env,
+    get_env_vars,
+    get_scripts_dir,
+    get_terminal_env_key,
+)
+from hatch_vsc.update_vscode_env import load_project_summary, update_vscode_config
+
+
+def read_settings(project):
+    """Read the generated settings.json."""
+    return json.loads((project / ".vscode" / "settings.json").read_text())
+
+
+def test_format_env_var(tmp_path, monkeypatch):
+    """Test Hatch's context fields are formatted, and unset variables deferred to VSCode."""
+    monkeypatch.delenv("UNSET_VAR", raising=False)
+    value = "{root}{/}data{;}{env:UNSET_VAR}{;}{env:UNSET_VAR:fallback}{;}{env_name}{;}{matrix:x}"
+    sep = os.pathsep
+    assert format_env_var(value, "test", tmp_path) == (
+        f"{tmp_path}{os.sep}data{sep}${{env:UNSET_VAR}}{sep}fallback{sep}test{sep}{{matrix:x}}"
+    )
+
+
+def test_get_env_vars(tmp_path):
+    """Test variables are inherited as a whole from templates, and by matrix members."""
+    config = {"tool": {"hatch": {"envs": {
+        "default": {"env-vars": {"MODE": "dev"}},
+        "test": {"env-vars": {"DATA": "{root}/data"}, "matrix": [{"python": ["3.12"]}]},
+        "lint": {},
+        "docs": {"template": "docs"},
+    }}}}
+    assert get_env_vars(config, tmp_path) == {
+        "default": {"MODE": "dev"},
+        "test.py3.12": {"DATA": f"{tmp_path}/data"},
+        "lint": {"MODE": "dev"},
+    }
+
+
+def test_activation_env_file(tmp_path):
+    """Test activation variables are written as a dotenv file, quoted where needed."""
+    env_path = tmp_path / "envs" / "test"
+    activation = get_activation_env("test", env_path, {"GREETING": "hello world", "PATH": "x"})
+    assert activation["PATH"] == f"{get_scripts_dir(env_path)}{os.pathsep}${{env:PATH}}"
+    assert activation["PYTHONHOME"] is None
+    assert format_env_file(activation).splitlines() == [
+        'GREETING="hello world"',
+        f"PATH={get_scripts_dir(env_path)}{os.pathsep}${{env:PATH}}",
+        f"VIRTUAL_ENV={env_path}",
+        "HATCH_ENV_ACTIVE=test",
+    ]
+
+
+def test_update_vscode_config_terminal(temp_project_dir, monkeypatch):
+    """Test terminals get the default environment and user variables are kept."""
+    monkeypatch.chdir(temp_project_dir)
+    key = get_terminal_env_key()
+    (temp_project_dir / ".vscode" / "settings.json").write_text(
+        json.dumps({key: {"EDITOR": "vim"}})
+    )
+    env_paths = {"default": Path("/envs/default"), "test": Path("/envs/test")}
+    mappings = {"tests/**/*": "test"}
+
+    update_vscode_config(mappings, env_paths, env_vars={"default": {"MODE": "dev"}})
+    settings = read_settings(temp_project_dir)
+    assert settings[ACTIVATE_ENVIRONMENT] is False
+    assert settings[key]["EDITOR"] == "vim"
+    assert settings[key]["MODE"] == "dev"
+    assert settings[key]["VIRTUAL_ENV"] == str(Path("/envs/default"))
+    env_dir = temp_project_dir / ".vscode" / ENV_FILE_DIR
+    assert sorted(path.name for path in env_dir.iterdir()) == ["default.env", "test.env"]
+    assert "HATCH_ENV_ACTIVE=test" in (env_dir / "test.env").read_text()
+
+    update_vscode_config(mappings, env_paths, collector_config={"terminal": False})
+    settings = read_settings(temp_project_dir)
+    assert settings[ACTIVATE_ENVIRONMENT] is True
+    assert settings[key] == {"EDITOR": "vim"}
+    assert list(env_dir.iterdir()) == []
+
+
+def test_update_vscode_config_keeps_user_activation(temp_project_dir, monkeypatch):
+    """Test an explicit activation setting isn't overridden."""
+    monkeypatch.chdir(temp_project_dir)
+    (temp_project_dir / ".vscode" / "settings.json").write_text(
+        json.dumps({ACTIVATE_ENVIRONMENT: True})
+    )
+    update_vscode_config({}, {"default": Path("/envs/default")})
+    assert read_settings(temp_project_dir)[ACTIVATE_ENVIRONMENT] is True
+
+
+def test_summary_env_vars(temp_project_dir):
+    """Test the formatted variables are part of the project summary."""
+    (temp_project_dir / "pyproject.toml").write_text(
+        '[tool.hatch.envs.default.env-vars]\nDATA = "{root}/data"\n'
+    )
+    summary = load_project_summary(temp_project_dir)
+    assert summary["env-vars"] == {"default": {"DATA": f"{temp_project_dir.resolve()}/data"}}
+
+
+def test_summary_env_vars_environ(temp_project_dir, monkeypatch):
+    """Test variables resolved with their defaults are formatted again when they change."""
+    monkeypatch.delenv("HATCH_VSC_MODE", raising=False)
+    pyproject = temp_project_dir / "pyproject.toml"
+    pyproject.write_text(
+        '[tool.hatch.envs.default.env-vars]\nMODE = "{env:HATCH_VSC_MODE:dev}"\n'
+    )
+    os.utime(pyproject, (1_000_000_000, 1_000_000_000))
+    assert load_project_summary(temp_project_dir)["env-vars"] == {"default": {"MODE": "dev"}}
+
+    monkeypatch.setenv("HATCH_VSC_MODE", "prod")
+    summary = load_project_summary(temp_project_dir)
+    assert summary["env-vars"] == {"default": {"MODE": "prod"}}
+    assert summary["environ"] == {"HATCH_VSC_MODE": "prod"}
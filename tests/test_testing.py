@@ -0,0 +1,109 @@
+"""Tests for scoped test discovery settings."""
+import json
+
+from hatch_vsc.terminal import get_scripts_dir
+from hatch_vsc.testing import (
+    BEHAVE_FEATURES_PATH,
+    PYTEST_ARGS,
+    PYTEST_ENABLED,
+    PYTEST_PATH,
+    TESTING_CWD,
+    UNITTEST_ARGS,
+    UNITTEST_ENABLED,
+    estimate_discovery,
+    get_test_framework,
+    get_test_roots,
+    get_testing_settings,
+)
+from hatch_vsc.update_vscode_env import update_vscode_config
+
+
+def read_settings(project):
+    """Read the generated settings.json."""
+    return json.loads((project / ".vscode" / "settings.json").read_text())
+
+
+def test_get_test_framework():
+    """Test frameworks are recognized from dependencies and scripts."""
+    assert get_test_framework({"dependencies": ["pytest-cov"]}) == "pytest"
+    assert get_test_framework({"scripts": {"test": ["cd features", "behave"]}}) == "behave"
+    assert get_test_framework({"scripts": {"test": "python -m unittest discover"}}) == "unittest"
+    assert get_test_framework({"dependencies": ["ruff"]}) is None
+
+
+def test_get_test_roots():
+    """Test roots come from the mappings and are owned by the environment mapped to them."""
+    envs = {
+        "default": {"dependencies": ["pytest"]},
+        "test": {"dependencies": ["pytest"], "vsc-mapping": "tests/unit"},
+        "bdd": {"scripts": {"test": "cd features/web && behave"}},
+        "lint": {"dependencies": ["ruff"]},
+    }
+    assert get_test_roots(envs, {"test": "test.py3.12"}) == [
+        {"framework": "pytest", "root": "tests", "env": "default"},
+        {"framework": "pytest", "root": "tests/unit", "env": "test.py3.12"},
+        {"framework": "behave", "root": "features/web", "env": "bdd"},
+    ]
+
+
+def test_get_testing_settings(tmp_path):
+    """Test pytest uses the owning environment's executable, and takes precedence over unittest."""
+    env_paths = {"test": tmp_path / "test"}
+    tests = [
+        {"framework": "pytest", "root": "tests", "env": "test"},
+        {"framework": "unittest", "root": "legacy", "env": "test"},
+    ]
+    assert get_testing_settings(tests, env_paths) == {
+        PYTEST_ENABLED: True,
+        PYTEST_ARGS: ["tests"],
+        PYTEST_PATH: str(get_scripts_dir(tmp_path / "test") / "pytest"),
+        TESTING_CWD: "${workspaceFolder}",
+    }
+    unittest = get_testing_settings(tests[1:], env_paths)
+    assert unittest[UNITTEST_ENABLED] and unittest[UNITTEST_ARGS][2] == "legacy"
+    assert get_testing_settings([], env_paths) == {}
+
+
+def test_testing_settings_merge(temp_project_dir, tmp_path):
+    """Test the user's settings are kept, and generated ones reverted once tests are gone."""
+    (temp_project_dir / ".vscode" / "settings.json").write_text(json.dumps({
+        PYTEST_ARGS: ["-x"],
+        PYTEST_PATH: "/custom/pytest",
+    }))
+    env_paths = {"default": tmp_path / "default", "test": tmp_path / "test"}
+    mappings = {"tests/**/*": "test"}
+    behave = {"framework": "behave", "root": "features", "env": "default"}
+    tests = [{"framework": "pytest", "root": "tests", "env": "test"}, behave]
+
+    update_vscode_config(mappings, env_paths, root=temp_project_dir, tests=tests)
+    settings = read_settings(temp_project_dir)
+    assert settings[PYTEST_ARGS] == ["-x", "tests"]
+    assert settings[PYTEST_PATH] == "/custom/pytest"
+    assert settings[PYTEST_ENABLED] and settings[BEHAVE_FEATURES_PATH] == "features"
+
+    update_vscode_config(mappings, env_paths, root=temp_project_dir, tests=[behave])
+    settings = read_settings(temp_project_dir)
+    assert settings[PYTEST_ARGS] == ["-x"]
+    assert settings[PYTEST_ENABLED] is False
+    assert settings[BEHAVE_FEATURES_PATH] == "features"
+
+    update_vscode_config(
+        mappings, env_paths, root=temp_project_dir, tests=tests,
+        collector_config={"testing": False},
+    )
+    settings = read_settings(temp_project_dir)
+    assert settings[BEHAVE_FEATURES_PATH] == "features"  # The extension's default
+    assert settings[TESTING_CWD] is None
+
+
+def test_estimate_discovery(temp_project_dir):
+    """Test only the framework's test files are counted, outside hidden directories."""
+    for name in ["test_a.py", "b_test.py", "conftest.py", "sub/test_c.py", ".tox/test_d.py"]:
+        path = temp_project_dir / "tests" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    estimates = estimate_discovery(
+        temp_project_dir, [{"framework": "pytest", "root": "tests", "env": "default"}]
+    )
+    assert [(root, count) for root, count, _ in estimates] == [("tests", 3)]
+    assert estimates[0][2] > 0
@@ -0,0 +1,71 @@
+"""Tests for per-phase timings."""
+import io
+import json
+import pstats
+from pathlib import Path
+from unittest.mock import patch
+
+from hatch_vsc.timing import Timings, get_timings_options, phase, record_timings
+from hatch_vsc.update_vscode_env import main
+
+
+def test_phase_without_recording():
+    """Test phases are no-ops when timings aren't recorded."""
+    with phase("parse"):
+        pass
+
+
+def test_record_timings_nested():
+    """Test nested phases are recorded in order with their depth."""
+    stream = io.StringIO()
+    with record_timings("json", stream=stream) as timings:
+        with phase("update"):
+            with phase("write settings.json"):
+                pass
+
+    assert [(name, depth) for name, depth, _ in timings.records] == [
+        ("update", 0), ("write settings.json", 1)
+    ]
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["phase"] for line in lines] == ["update", "write settings.json"]
+    assert lines[0]["seconds"] >= lines[1]["seconds"]
+
+
+def test_format_table():
+    """Test the table lists every phase and the total of top-level phases."""
+    timings = Timings()
+    timings.records = [("parse", 0, 0.001), ("mapping inference", 0, 0.002), ("inner", 1, 0.5)]
+    lines = timings.format_table().splitlines()
+    assert lines[0].startswith("phase")
+    assert lines[3].startswith("  inner")
+    assert lines[-1].startswith("total") and lines[-1].endswith("3.00 ms")
+
+
+def test_get_timings_options(monkeypatch):
+    """Test timings and profiling are requested through the environment."""
+    monkeypatch.delenv("HATCH_VSC_TIMINGS", raising=False)
+    monkeypatch.delenv("HATCH_VSC_PROFILE", raising=False)
+    assert get_timings_options() == (None, None)
+
+    monkeypatch.setenv("HATCH_VSC_TIMINGS", "1")
+    monkeypatch.setenv("HATCH_VSC_PROFILE", "out.prof")
+    assert get_timings_options() == ("table", "out.prof")
+
+    monkeypatch.setenv("HATCH_VSC_TIMINGS", "JSON")
+    assert get_timings_options()[0] == "json"
+
+
+def test_main_timings_and_profile(temp_project_dir, monkeypatch, capsys):
+    """Test the command line reports timings and dumps a profile."""
+    monkeypatch.chdir(temp_project_dir)
+    config = {"tool": {"hatch": {"envs": {"test": {"vsc-mapping": "tests"}}}}}
+    profile = temp_project_dir / "run.prof"
+
+    with patch("hatch_vsc.update_vscode_env.read_pyproject_toml", return_value=config), \
+         patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=Path("/mock")):
+        main(["--timings", "json", "--profile", str(profile), "update", "--no-probe"])
+
+    phases = [json.loads(line)["phase"] for line in capsys.readouterr().err.splitlines()]
+    assert phases[:4] == ["config", "parse", "mapping inference", "env path resolution"]
+    assert {"update", "write python.env.json", "write settings.json"} <= set(phases)
+    assert pstats.Stats(str(profile)).total_calls > 0
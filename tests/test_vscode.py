@@ -3,16 +3,16 @@ import json
 import os
 import sys
 from pathlib import Path
-from unittest.mock import Mock, mock_open, patch
+from unittest.mock import patch
 
 import pytest
 
 from hatch_vsc.update_vscode_env import (
-    get_hatch_env_path,
-    get_macos_hatch_path,
+    get_interpreter_path,
     infer_test_directory,
     read_pyproject_toml,
-    update_vscode_config
+    update_vscode_config,
+    write_if_changed
 )
 
 
@@ -22,116 +22,6 @@ def mock_env_path():
     return Path("/mock/hatch/env/virtual")
 
 
-def test_get_macos_hatch_path(monkeypatch):
-    """Test macOS Hatch path detection."""
-    test_user = "testuser"
-    test_project = "test-project"
-    monkeypatch.setenv("USER", test_user)
-    
-    # Create mock paths
-    base_str = str(Path(f"/Users/{test_user}/Library/Application Support/hatch/env/virtual"))
-    project_str = str(Path(f"{base_str}/{test_project}"))
-    env_str = str(Path(f"{project_str}/{test_project}"))  # Default environment
-    
-    # Create real Path objects for testing
-    base_path = Path(base_str)
-    project_path = Path(project_str)
-    env_path = Path(env_str)
-    
-    def mock_exists(self):
-        return str(self) in {base_str, project_str}
-    
-    def mock_is_dir(self):
-        return str(self) in {project_str, env_str}
-    
-    def mock_iterdir(self):
-        if str(self) == project_str:
-            return [env_path]
-        return []
-    
-    def mock_cwd():
-        return Path(f"/some/path/{test_project}")
-    
-    with patch.object(Path, "exists", mock_exists), \
-         patch.object(Path, "is_dir", mock_is_dir), \
-         patch.object(Path, "iterdir", mock_iterdir), \
-         patch.object(Path, "cwd", staticmethod(mock_cwd)):
-        
-        path = get_macos_hatch_path()
-        assert path.name == test_project
-        assert Path(base_str) in path.parents
-
-
-def test_get_macos_hatch_path_no_user(monkeypatch):
-    """Test macOS path detection with no user."""
-    monkeypatch.delenv("USER", raising=False)
-    
-    with pytest.raises(RuntimeError, match="Could not determine username"):
-        get_macos_hatch_path()
-
-
-def test_get_hatch_env_path(monkeypatch):
-    """Test Hatch environment path detection."""
-    test_user = "testuser"
-    test_project = "test-project"
-    monkeypatch.setenv("USER", test_user)
-    
-    # Create mock paths
-    base_str = str(Path(f"/Users/{test_user}/Library/Application Support/hatch/env/virtual"))
-    project_str = str(Path(f"{base_str}/{test_project}"))
-    env_str = str(Path(f"{project_str}/{test_project}"))  # Default environment
-    
-    # Create real Path objects for testing
-    base_path = Path(base_str)
-    project_path = Path(project_str)
-    env_path = Path(env_str)
-    
-    def mock_exists(self):
-        return str(self) in {base_str, project_str}
-    
-    def mock_is_dir(self):
-        return str(self) == project_str
-    
-    def mock_iterdir(self):
-        if str(self) == project_str:
-            return [env_path]
-        return []
-    
-    def mock_cwd():
-        return Path(f"/some/path/{test_project}")
-    
-    with patch("platform.system", return_value="Darwin"), \
-         patch.object(Path, "exists", mock_exists), \
-         patch.object(Path, "is_dir", mock_is_dir), \
-         patch.object(Path, "iterdir", mock_iterdir), \
-         patch.object(Path, "cwd", staticmethod(mock_cwd)):
-        
-        path = get_hatch_env_path()
-        # Check that all required path components are present in order
-        assert all(component in path.parts for component in ('hatch', 'env', 'virtual'))
-        assert list(component for component in path.parts if component in ('hatch', 'env', 'virtual')) == ['hatch', 'env', 'virtual']
-
-
-def test_get_hatch_env_path_unsupported():
-    """Test environment path detection on unsupported platform."""
-    with patch("platform.system", return_value="Windows"), \
-         patch("subprocess.run", side_effect=Exception("Command failed")):
-        with pytest.raises(NotImplementedError, match="Platform .* not supported yet"):
-            get_hatch_env_path()
-
-
-def test_get_hatch_env_path_subprocess():
-    """Test environment path detection using subprocess."""
-    mock_result = Mock()
-    mock_result.returncode = 0
-    mock_result.stdout = str(Path("/path/to/env")) + "\n"
-    
-    with patch("platform.system", return_value="Linux"), \
-         patch("subprocess.run", return_value=mock_result):
-        path = get_hatch_env_path()
-        assert path == Path("/path/to")
-
-
 def test_read_pyproject_toml_missing():
     """Test reading missing pyproject.toml."""
     with patch("pathlib.Path.exists", return_value=False):
@@ -139,6 +29,18 @@ def test_read_pyproject_toml_missing():
             read_pyproject_toml()
 
 
+def test_read_pyproject_toml_hatch_toml(tmp_path):
+    """Test hatch.toml tables take precedence over [tool.hatch]."""
+    (tmp_path / "pyproject.toml").write_text(
+        '[tool.hatch.envs.test]\nvsc-mapping = "tests"\n[tool.hatch.version]\nsource = "vcs"\n'
+    )
+    (tmp_path / "hatch.toml").write_text('[envs.docs]\nvsc-mapping = "docs"\n')
+    
+    hatch_config = read_pyproject_toml(tmp_path)["tool"]["hatch"]
+    assert hatch_config["envs"] == {"docs": {"vsc-mapping": "docs"}}
+    assert hatch_config["version"] == {"source": "vcs"}
+
+
 def test_infer_test_directory_behave_cd():
     """Test test directory inference for behave with cd."""
     config = {
@@ -148,43 +50,29 @@ def test_infer_test_directory_behave_cd():
     assert infer_test_directory(config) == "features/acceptance"
 
 
-def test_update_vscode_config(mock_env_path):
+def test_update_vscode_config(mock_env_path, temp_project_dir, monkeypatch):
     """Test VSCode configuration update."""
-    mock_project_dir = Path("/mock/project")
+    monkeypatch.chdir(temp_project_dir)
     
     mappings = {
         "src/**/*": "default",
         "tests/**/*": "test"
     }
     
-    mock_settings = "{}"
-    
-    with patch("pathlib.Path.exists", return_value=True), \
-         patch("pathlib.Path.mkdir"), \
-         patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=mock_env_path), \
-         patch("pathlib.Path.cwd", return_value=mock_project_dir), \
-         patch("builtins.open", mock_open(read_data=mock_settings)), \
-         patch("json.dump") as mock_dump:
+    with patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=mock_env_path):
         update_vscode_config(mappings)
-        
-        # Verify json.dump was called with correct arguments
-        assert mock_dump.call_count == 2  # Once for each config file
-        
-        # First call should be for python.env.json
-        env_config_call = mock_dump.call_args_list[0]
-        env_config = env_config_call[0][0]  # First argument of first call
-        assert "python.envInterpreters" in env_config
-        
-        # Second call should be for settings.json
-        settings_call = mock_dump.call_args_list[1]
-        settings = settings_call[0][0]  # First argument of second call
-        assert "python.defaultInterpreterPath" in settings
-        assert "python.analysis.extraPaths" in settings
+    
+    env_config = json.loads((temp_project_dir / ".vscode" / "python.env.json").read_text())
+    assert "python.envInterpreters" in env_config
+    
+    settings = json.loads((temp_project_dir / ".vscode" / "settings.json").read_text())
+    assert "python.defaultInterpreterPath" in settings
+    assert "python.analysis.extraPaths" in settings
 
 
-def test_update_vscode_config_existing_settings(mock_env_path):
+def test_update_vscode_config_existing_settings(mock_env_path, temp_project_dir, monkeypatch):
     """Test VSCode configuration update with existing settings."""
-    mock_project_dir = Path("/mock/project")
+    monkeypatch.chdir(temp_project_dir)
     
     mappings = {
         "src/**/*": "default",
@@ -195,30 +83,70 @@ def test_update_vscode_config_existing_settings(mock_env_path):
         "python.linting.enabled": True,
         "python.formatting.provider": "black"
     }
-    mock_settings = json.dumps(existing_settings)
+    (temp_project_dir / ".vscode" / "settings.json").write_text(json.dumps(existing_settings))
     
-    with patch("pathlib.Path.exists", return_value=True), \
-         patch("pathlib.Path.mkdir"), \
-         patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=mock_env_path), \
-         patch("pathlib.Path.cwd", return_value=mock_project_dir), \
-         patch("builtins.open", mock_open(read_data=mock_settings)), \
-         patch("json.dump") as mock_dump:
+    with patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=mock_env_path):
         update_vscode_config(mappings)
-        
-        # Verify json.dump was called with correct arguments
-        assert mock_dump.call_count == 2
-        
-        # Check settings.json preserves existing settings
-        settings_call = mock_dump.call_args_list[1]
-        settings = settings_call[0][0]
-        assert settings["python.linting.enabled"] is True
-        assert settings["python.formatting.provider"] == "black"
-        assert "python.defaultInterpreterPath" in settings
-        assert "python.analysis.extraPaths" in settings 
+    
+    # Check settings.json preserves existing settings
+    settings = json.loads((temp_project_dir / ".vscode" / "settings.json").read_text())
+    assert settings["python.linting.enabled"] is True
+    assert settings["python.formatting.provider"] == "black"
+    assert "python.defaultInterpreterPath" in settings
+    assert "python.analysis.extraPaths" in settings
+
+
+def test_update_vscode_config_skips_unchanged(mock_env_path, temp_project_dir, monkeypatch):
+    """Test unchanged configuration files are not rewritten."""
+    monkeypatch.chdir(temp_project_dir)
+    mappings = {"src/**/*": "default", "tests/**/*": "test"}
+    
+    with patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=mock_env_path):
+        update_vscode_config(mappings)
+        with patch("hatch_vsc.update_vscode_env.atomic_write_text") as mock_write:
+            update_vscode_config(mappings)
+            mock_write.assert_not_called()
+
+
+def test_update_vscode_config_extra_paths_order(temp_project_dir, monkeypatch):
+    """Test analysis paths are the site-packages of mapped environments, in mapping order."""
+    monkeypatch.chdir(temp_project_dir)
+    mappings = {f"dir{i}/**/*": f"env{i}" for i in range(20)}
+    env_paths = {f"env{i}": temp_project_dir / "envs" / f"env{i}" for i in range(20)}
+    for env_path in env_paths.values():
+        (env_path / "lib" / "python3.12" / "site-packages").mkdir(parents=True)
+    
+    update_vscode_config(mappings, env_paths)
+    
+    settings = json.loads((temp_project_dir / ".vscode" / "settings.json").read_text())
+    assert settings["python.analysis.extraPaths"] == [
+        str(env_paths[f"env{i}"] / "lib" / "python3.12" / "site-packages") for i in range(20)
+    ]
+
+
+def test_write_if_changed(tmp_path):
+    """Test files are only written when their content changes."""
+    path = tmp_path / "settings.json"
+    assert write_if_changed(path, "{}") is True
+    assert write_if_changed(path, "{}") is False
+    assert write_if_changed(path, "{ }") is True
+    assert path.read_text() == "{ }"
+
+
+def test_write_if_changed_atomic(tmp_path):
+    """Test a failed write leaves the previous file intact."""
+    path = tmp_path / "settings.json"
+    path.write_text("{}")
+    with patch("os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            write_if_changed(path, '{"a": 1}')
+    assert path.read_text() == "{}"
+    assert [p.name for p in tmp_path.iterdir()] == ["settings.json"]
 
 
-def test_main_success():
+def test_main_success(temp_project_dir, monkeypatch):
     """Test successful main execution."""
+    monkeypatch.chdir(temp_project_dir)
     config = {
         "tool": {
             "hatch": {
@@ -232,16 +160,11 @@ def test_main_success():
         }
     }
     
-    mock_settings = "{}"
     with patch("hatch_vsc.update_vscode_env.read_pyproject_toml", return_value=config), \
-         patch("pathlib.Path.exists", return_value=True), \
-         patch("pathlib.Path.mkdir"), \
          patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=Path("/mock/env")), \
-         patch("builtins.open", mock_open(read_data=mock_settings)), \
-         patch("json.dump"), \
          patch("builtins.print") as mock_print:
         from hatch_vsc.update_vscode_env import main
-        main()
+        main([])
         
         # Verify output
         mock_print.assert_any_call("Updating VSCode configuration with Hatch environments...")
@@ -251,12 +174,28 @@ def test_main_success():
 
 def test_main_error():
     """Test main execution with error."""
-    with patch("hatch_vsc.update_vscode_env.read_pyproject_toml", side_effect=Exception("Test error")), \
+    error = Exception("Test error")
+    with patch("hatch_vsc.update_vscode_env.read_pyproject_toml", side_effect=error), \
          patch("sys.exit") as mock_exit, \
          patch("builtins.print") as mock_print:
         from hatch_vsc.update_vscode_env import main
-        main()
+        main([])
         
         # Verify error handling
         mock_print.assert_any_call("⚠️  Error: Test error", file=sys.stderr)
-        mock_exit.assert_called_once_with(1) 
\ No newline at end of file
+        mock_exit.assert_called_once_with(1) 
+
+def test_update_vscode_config_preserves_comments(mock_env_path, temp_project_dir, monkeypatch):
+    """Test hand-maintained JSONC settings keep their comments and formatting."""
+    monkeypatch.chdir(temp_project_dir)
+    settings_file = temp_project_dir / ".vscode" / "settings.json"
+    settings_file.write_text('{\n    // Team settings\n    "editor.rulers": [100],\n}\n')
+    (temp_project_dir / "pyproject.toml").write_text('[project]\nname = "Test_Project"\n')
+
+    with patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=mock_env_path):
+        update_vscode_config({"src/**/*": "default"})
+
+    content = settings_file.read_text()
+    assert content.startswith('{\n    // Team settings\n    "editor.rulers": [100],\n')
+    interpreter = json.dumps(str(get_interpreter_path(mock_env_path / "test-project")))
+    assert f'    "python.defaultInterpreterPath": {interpreter},' in content
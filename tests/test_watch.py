@@ -0,0 +1,169 @@
+"""Tests for watch mode."""
+import json
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from hatch_vsc.terminal import get_terminal_env_key
+from hatch_vsc.watch import CONFIG, ENVS, ConfigWatcher, InotifyWatcher, PollingWatcher
+
+
+def test_polling_watcher_config_change(tmp_path):
+    """Test the polling watcher reports configuration changes."""
+    (tmp_path / "pyproject.toml").write_text("")
+    watcher = PollingWatcher(tmp_path, None, interval=0.01)
+    assert watcher.wait(0.05) == set()
+
+    (tmp_path / "hatch.toml").write_text("[envs.test]\n")
+    assert watcher.wait(1) == {CONFIG}
+
+
+def test_polling_watcher_env_change(tmp_path):
+    """Test the polling watcher reports environment storage changes."""
+    env_path = tmp_path / "envs"
+    env_path.mkdir()
+    watcher = PollingWatcher(tmp_path, env_path, interval=0.01)
+
+    (env_path / "test").mkdir()
+    assert watcher.wait(1) == {ENVS}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_watcher(tmp_path):
+    """Test the inotify watcher reports configuration and environment changes."""
+    env_path = tmp_path / "envs"
+    env_path.mkdir()
+    watcher = InotifyWatcher(tmp_path, env_path)
+    try:
+        assert watcher.wait(0.05) == set()
+
+        (tmp_path / "other.txt").write_text("ignored")
+        assert watcher.wait(0.05) == set()
+
+        (tmp_path / "pyproject.toml").write_text("")
+        assert CONFIG in watcher.wait(1)
+
+        (env_path / "test").mkdir()
+        assert watcher.wait(1) == {ENVS}
+    finally:
+        watcher.close()
+
+
+def test_config_watcher_refresh_stages(tmp_path):
+    """Test only the stages whose inputs changed are re-run."""
+    summary = {"mappings": {"tests/**/*": "test"}}
+    watcher = ConfigWatcher(tmp_path)
+
+    with patch("hatch_vsc.watch.load_project_summary", return_value=summary) as mock_read, \
+         patch("hatch_vsc.watch.get_hatch_env_path", return_value=Path("/mock/env")), \
+         patch("hatch_vsc.watch.update_project_config") as mock_update:
+        assert watcher.refresh({CONFIG, ENVS}) is True
+        assert mock_read.call_count == 1
+
+        # Environment changes don't need the configuration to be parsed again
+        assert watcher.refresh({ENVS}) is True
+        assert mock_read.call_count == 1
+        assert mock_update.call_count == 2
+
+        # Configuration edits that don't affect the summary are ignored
+        assert watcher.refresh({CONFIG}) is False
+        assert mock_update.call_count == 2
+
+
+def test_config_watcher_collect_changes_debounce():
+    """Test bursts of events are merged."""
+    class FakeWatcher:
+        def __init__(self):
+            self.events = [{CONFIG}, {ENVS}, {CONFIG}, set()]
+
+        def wait(self, timeout):
+            return self.events.pop(0)
+
+    assert ConfigWatcher(Path(".")).collect_changes(FakeWatcher(), None) == {CONFIG, ENVS}
+
+
+def test_config_watcher_run(tmp_path):
+    """Test the watch loop regenerates configuration on changes until stopped."""
+    (tmp_path / "pyproject.toml").write_text("")
+    stop = threading.Event()
+    started = threading.Event()
+    watcher = ConfigWatcher(tmp_path, debounce=0.01, force_polling=True, interval=0.01)
+
+    def refresh(changes):
+        if started.is_set():
+            stop.set()
+        else:
+            # Edits made while the initial run is in progress must not be lost
+            (tmp_path / "pyproject.toml").write_text("[project]\n")
+            started.set()
+        return True
+
+    with patch.object(watcher, "refresh", side_effect=refresh) as mock_refresh:
+        thread = threading.Thread(target=watcher.run, args=(stop,), daemon=True)
+        thread.start()
+        thread.join(5)
+
+    assert not thread.is_alive()
+    assert mock_refresh.call_count == 2
+    assert mock_refresh.call_args[0][0] == {CONFIG}
+
+
+def test_config_watcher_refresh_root(tmp_path):
+    """Test the watched project is read and written relative to its root."""
+    (tmp_path / "pyproject.toml").write_text('[tool.hatch.envs.test]\nvsc-mapping = "tests"\n')
+    (tmp_path / "hatch.toml").write_text('[envs.docs]\nvsc-mapping = "docs"\n')
+    (tmp_path / ".vscode").mkdir()
+    watcher = ConfigWatcher(tmp_path)
+
+    with patch("hatch_vsc.watch.get_hatch_env_path", return_value=Path("/mock/env")), \
+         patch("hatch_vsc.update_vscode_env.get_hatch_env_path", return_value=Path("/mock/env")):
+        watcher.refresh({CONFIG, ENVS})
+
+    assert watcher.summary["mappings"] == {"src/**/*": "default", "docs/**/*": "docs"}
+    assert (tmp_path / ".vscode" / "python.env.json").exists()
+
+
+def test_config_watcher_refresh_keeps_settings(tmp_path, hatch_dirs):
+    """Test a refresh generates the same settings as `hatch-vsc update`."""
+    (tmp_path / "pyproject.toml").write_text(
+        '[project]\nname = "demo"\n\n'
+        '[tool.hatch.envs.default]\nenv-vars = { MODE = "dev" }\n\n'
+        '[tool.hatch.envs.test]\ndependencies = ["pytest"]\nvsc-mapping = "tests"\n'
+    )
+    (tmp_path / ".vscode").mkdir()
+    ConfigWatcher(tmp_path).refresh({CONFIG, ENVS})
+
+    settings = json.loads((tmp_path / ".vscode" / "settings.json").read_text())
+    assert settings["python.testing.pytestArgs"] == ["tests"]
+    assert settings["python.testing.pytestEnabled"] is True
+    assert settings[get_terminal_env_key()]["MODE"] == "dev"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_watcher_missing_env_dir(tmp_path):
+    """Test creation of a missing environment storage directory is reported."""
+    env_path = tmp_path / "data" / "env" / "virtual"
+    watcher = InotifyWatcher(tmp_path, env_path)
+    try:
+        (tmp_path / "data").mkdir()
+        assert watcher.wait(1) == set()
+        (tmp_path / "data" / "env").mkdir()
+        assert watcher.wait(1) == set()
+        env_path.mkdir()
+        assert watcher.wait(1) == {ENVS}
+
+        (env_path / "test").mkdir()
+        assert watcher.wait(1) == {ENVS}
+    finally:
+        watcher.close()
+
+
+def test_main_watch():
+    """Test the watch subcommand starts watching the current directory."""
+    with patch("hatch_vsc.watch.watch") as mock_watch, patch("builtins.print"):
+        from hatch_vsc.update_vscode_env import main
+        main(["watch", "--poll"])
+        mock_watch.assert_called_once_with(Path.cwd(), debounce=0.2, force_polling=True)